@@ -1,17 +1,33 @@
 import os
 from flask import Flask
 from flask_cors import CORS
-from extensions import db, login_manager
+from extensions import db, login_manager, instrumentation, response_cache, submission_queue, job_queue, static_files, compression
+from services.json_provider import FastJSONProvider
+from services import database, images, storage, uploads
+from services.migrations import check_schema, migrate_cli
+from services.static_files import assets_cli
 
 def create_app():
     app = Flask(__name__)
+    app.json = FastJSONProvider(app)
+    app.request_class = uploads.UploadRequest
     
     # Configuration
     app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'dev-secret-key-change-in-production')
     app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', f"sqlite:///{os.path.join(app.instance_path, 'database.db')}")
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    # Apply pending migrations on boot. Off by default: deploys run `flask migrate upgrade` before the workers start
+    app.config['AUTO_MIGRATE'] = os.environ.get('AUTO_MIGRATE', 'false').lower() == 'true'
     app.config['UPLOAD_FOLDER'] = os.path.join('static', 'uploads')
     app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB limit
+    # Bearer token for admin API calls made without a login session (bulk imports); empty = session only
+    app.config['API_TOKEN'] = os.environ.get('API_TOKEN', '')
+    database.load_config(app)
+    images.load_config(app)
+    storage.load_config(app)
+    uploads.load_config(app)
+    # Lists longer than this are streamed to the client in chunks of this size
+    app.config['JSON_STREAM_THRESHOLD'] = int(os.environ.get('JSON_STREAM_THRESHOLD', 500))
 
     # Ensure upload folder exists
     os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
@@ -23,7 +39,7 @@ def create_app():
             "origins": "*",
             "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
             "allow_headers": ["Content-Type", "Authorization", "X-Requested-With"],
-            "expose_headers": ["Content-Type", "Authorization"],
+            "expose_headers": ["Content-Type", "Authorization", "X-Next-Cursor", "ETag", "Last-Modified", "Server-Timing"],
             "supports_credentials": False,
             "max_age": 3600
         }
@@ -37,8 +53,14 @@ def create_app():
 
     # Initialize extensions with app
     db.init_app(app)
+    instrumentation.init_app(app)
     login_manager.init_app(app)
     login_manager.login_view = 'admin.login'
+    response_cache.init_app(app)
+    submission_queue.init_app(app)
+    job_queue.init_app(app)
+    static_files.init_app(app)
+    compression.init_app(app)
 
     # Register Blueprints
     from routes.main import main_bp
@@ -49,32 +71,16 @@ def create_app():
     app.register_blueprint(api_bp, url_prefix='/api')
     app.register_blueprint(admin_bp, url_prefix='/admin')
 
-    # Create tables
+    # Bring the database schema up to date (see migrations/)
+    app.cli.add_command(migrate_cli)
+    app.cli.add_command(images.images_cli)
+    app.cli.add_command(storage.storage_cli)
+    app.cli.add_command(assets_cli)
     with app.app_context():
-        db.create_all()
-        # Ensure database schema is up to date (Migration for slug columns)
-        try:
-            from sqlalchemy import inspect
-            inspector = inspect(db.engine)
-            
-            # Check Project table
-            columns = [c['name'] for c in inspector.get_columns('project')]
-            if 'slug' not in columns:
-                db.session.execute(db.text('ALTER TABLE project ADD COLUMN slug VARCHAR(150)'))
-                db.session.commit()
-                print("Added slug column to project table.")
-
-            # Check Event table
-            columns = [c['name'] for c in inspector.get_columns('event')]
-            if 'slug' not in columns:
-                db.session.execute(db.text('ALTER TABLE event ADD COLUMN slug VARCHAR(150)'))
-                db.session.commit()
-                print("Added slug column to event table.")
-        except Exception as e:
-            print(f"Migration error: {e}")
-            db.session.rollback()
-
-        create_initial_admin()
+        database.tune_engine(app, db.engine)
+        instrumentation.watch_engine(db.engine)
+        if check_schema(app):
+            create_initial_admin()
 
     @app.template_filter('nl2br')
     def nl2br_filter(value):
@@ -102,6 +108,8 @@ def load_user(user_id):
     return User.query.get(int(user_id))
 
 if __name__ == '__main__':
+    # The development server is a single process, so it can bring the schema up to date itself
+    os.environ.setdefault('AUTO_MIGRATE', 'true')
     app = create_app()
     debug_mode = os.environ.get('FLASK_DEBUG', 'False').lower() == 'true'
     port = int(os.environ.get('PORT', 5000))
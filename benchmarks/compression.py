@@ -0,0 +1,106 @@
+"""Bytes on the wire and CPU cost of response compression.
+
+Seeds a throwaway SQLite database with projects and events and requests
+public API lists and an admin page through the test client with no
+Accept-Encoding, gzip and brotli. For each encoding it reports the body
+size and the CPU time per request, both with an empty compressed-body cache
+(every request compresses) and with a warm one (compressed once, then sent
+from the cache). The response cache is on in every run, so the numbers
+isolate compression from querying and serializing.
+
+Run from the repository root:
+    python -m benchmarks.compression [projects]
+"""
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+ROWS = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+REPEAT = 50
+
+tmp = tempfile.mkdtemp()
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+os.environ['AUTO_MIGRATE'] = 'true'
+os.environ['JOBS_ENABLED'] = 'false'
+
+from app import create_app
+from extensions import db, compression
+from models import Project, Event, Media
+from services.compression import brotli
+
+URLS = [
+    '/api/projects',
+    '/api/projects?limit=20',
+    '/api/projects?fields=id,title,slug,thumbnail,studentName',
+    '/api/events',
+    '/admin/projects',
+]
+ENCODINGS = [('identity', 'identity'), ('gzip', 'gzip')] + ([('br', 'br')] if brotli else [])
+
+
+def seed():
+    start = datetime(2024, 1, 1)
+    db.session.execute(Project.__table__.insert(), [{
+        'title': f'Project {i}',
+        'slug': f'project-{i}',
+        'student_name': f'Student {i}',
+        'college': 'Example College of Engineering',
+        'year': '2024',
+        'description': 'Short summary ' * 10,
+        'full_description': f'Long description of project {i}. ' * 40,
+        'duration': '3 months',
+        'tech_stack': 'Python,Flask,SQLite,JavaScript',
+        'thumbnail': f'/static/uploads/projects/{i}.jpg',
+        'live_link': 'https://example.com',
+        'repo_link': 'https://github.com/example/project',
+        'timestamp': start + timedelta(minutes=i),
+    } for i in range(ROWS)])
+    db.session.execute(Event.__table__.insert(), [{
+        'title': f'Event {i}', 'slug': f'event-{i}', 'category': 'Workshop', 'venue': 'Main Hall',
+        'organizer': 'Tech Club', 'short_desc': 'A workshop. ' * 10, 'full_desc': f'Details of event {i}. ' * 40,
+        'main_image': f'/static/uploads/events/{i}.jpg', 'timestamp': start + timedelta(minutes=i),
+    } for i in range(ROWS // 10)])
+    db.session.execute(Media.__table__.insert(), [{
+        'owner_type': 'project', 'owner_id': i + 1, 'position': n,
+        'path': f'/static/uploads/projects/screenshots/{i}_{n}.jpg',
+    } for i in range(ROWS) for n in range(4)])
+    db.session.commit()
+
+
+def measure(client, url, encoding, warm):
+    """(body bytes, CPU ms per request)"""
+    headers = {'Accept-Encoding': encoding}
+    size = len(client.get(url, headers=headers).get_data())
+    cpu = []
+    for _ in range(REPEAT):
+        if not warm:
+            compression._cache.clear()
+        t0 = time.process_time()
+        client.get(url, headers=headers).get_data()
+        cpu.append(time.process_time() - t0)
+    return size, min(cpu) * 1000
+
+
+def main():
+    app = create_app()
+    with app.app_context():
+        seed()
+    client = app.test_client()
+    client.post('/admin/login', data={'username': 'admin', 'password': 'admin123'})
+
+    print(f"{ROWS} projects, {ROWS // 10} events; CPU ms per request, best of {REPEAT}\n")
+    print(f"{'URL':<58}{'encoding':<10}{'bytes':>10}{'ratio':>8}{'cpu cold':>10}{'cpu warm':>10}")
+    for url in URLS:
+        identity = None
+        for label, encoding in ENCODINGS:
+            size, cold = measure(client, url, encoding, warm=False)
+            _, warm = measure(client, url, encoding, warm=True)
+            identity = identity or size
+            print(f"{url:<58}{label:<10}{size:>10}{size / identity:>8.2f}{cold:>10.2f}{warm:>10.2f}")
+        print()
+
+
+if __name__ == '__main__':
+    main()
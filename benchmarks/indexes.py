@@ -0,0 +1,96 @@
+"""Query plans and latency of the hot list queries with and without indexes.
+
+Seeds a throwaway SQLite database with 100k rows per table, drops the
+indexes declared in models.py, times the queries the API and admin pages run,
+then creates them with the migration helpers and times the same queries again.
+
+Run from the repository root:
+    python -m benchmarks.indexes [rows]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+ROWS = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+REPEAT = 20
+
+tmp = tempfile.mkdtemp()
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+os.environ['AUTO_MIGRATE'] = 'true'
+
+from app import create_app
+from extensions import db
+from models import ContactQuery, Project, Vacancy
+from services.migrations import create_indexes
+
+QUERIES = [
+    ('GET /api/projects?limit=20',
+     'SELECT id, title, thumbnail FROM project ORDER BY timestamp DESC, id DESC LIMIT 21', {}),
+    ('GET /api/projects deep cursor',
+     'SELECT id, title, thumbnail FROM project WHERE timestamp <= :ts AND (timestamp < :ts OR id < :id) '
+     'ORDER BY timestamp DESC, id DESC LIMIT 21', {'ts': '2020-02-01 00:00:00.000000', 'id': 1}),
+    ('GET /api/vacancies',
+     'SELECT id, title FROM vacancy WHERE is_active = 1 ORDER BY timestamp DESC', {}),
+    ('/admin/contacts page 1',
+     'SELECT * FROM contact_query ORDER BY timestamp DESC, id DESC LIMIT 25 OFFSET 0', {}),
+    ('contact lookup by email',
+     'SELECT id FROM contact_query WHERE email = :email', {'email': 'user12345@example.com'}),
+]
+
+
+def seed():
+    start = datetime(2020, 1, 1)
+    stamps = [start + timedelta(minutes=random.randrange(5_000_000)) for _ in range(ROWS)]
+    db.session.execute(ContactQuery.__table__.insert(), [{
+        'name': f'User {i}', 'email': f'user{i}@example.com', 'type': 'General',
+        'message': 'Hello ' * 20, 'timestamp': stamps[i]
+    } for i in range(ROWS)])
+    db.session.execute(Project.__table__.insert(), [{
+        'title': f'Project {i}', 'slug': f'project-{i}', 'student_name': f'Student {i}',
+        'thumbnail': f'/static/uploads/projects/{i}.jpg', 'full_description': 'Text ' * 100,
+        'timestamp': stamps[i]
+    } for i in range(ROWS)])
+    db.session.execute(Vacancy.__table__.insert(), [{
+        'title': f'Vacancy {i}', 'slug': f'vacancy-{i}', 'is_active': i % 50 == 0, 'timestamp': stamps[i]
+    } for i in range(ROWS)])
+    db.session.commit()
+
+
+def drop_indexes():
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            index.drop(db.engine, checkfirst=True)
+
+
+def run(label):
+    print(f"--- {label} ---")
+    for name, sql, params in QUERIES:
+        plan = db.session.execute(db.text('EXPLAIN QUERY PLAN ' + sql), params).fetchall()
+        times = []
+        for _ in range(REPEAT):
+            t0 = time.perf_counter()
+            db.session.execute(db.text(sql), params).fetchall()
+            times.append(time.perf_counter() - t0)
+        print(f"{name:<32}{min(times) * 1000:9.2f} ms   " + ' | '.join(row[-1] for row in plan))
+    print()
+
+
+def main():
+    app = create_app()
+    with app.app_context():
+        drop_indexes()
+        seed()
+        db.session.execute(db.text('ANALYZE'))
+        print(f"{ROWS} rows per table, best of {REPEAT}\n")
+        run('without indexes')
+        with db.engine.begin() as conn:
+            create_indexes(conn, *[m.class_ for m in db.Model.registry.mappers])
+        db.session.execute(db.text('ANALYZE'))
+        run('with indexes')
+
+
+if __name__ == '__main__':
+    main()
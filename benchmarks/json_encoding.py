@@ -0,0 +1,105 @@
+"""Compare JSON encoders for the list endpoints.
+
+Encodes project- and event-shaped lists the way /api/projects and
+/api/events return them, with Flask's default provider, FastJSONProvider
+(orjson when installed) and FastJSONProvider.stream_array, reporting the
+best encode time and the peak memory allocated while encoding.
+
+Run from the repository root:
+    python -m benchmarks.json_encoding [rows]
+"""
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+from services import json_provider
+from services.json_provider import FastJSONProvider
+
+ROWS = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+REPEAT = 5
+
+
+def projects(n):
+    start = datetime(2024, 1, 1)
+    return [{
+        'id': i,
+        'title': f'Project {i}',
+        'slug': f'project-{i}',
+        'studentName': f'Student {i}',
+        'college': 'Example College of Engineering',
+        'year': '2024',
+        'description': 'Short summary ' * 10,
+        'fullDescription': 'Long description of the project. ' * 60,
+        'duration': '3 months',
+        'techStack': ['Python', 'Flask', 'SQLite', 'JavaScript'],
+        'thumbnail': f'/static/uploads/projects/{i}.jpg',
+        'screenshots': [f'/static/uploads/projects/screenshots/{i}_{n}.jpg' for n in range(4)],
+        'liveLink': 'https://example.com',
+        'repoLink': 'https://github.com/example/project',
+        'timestamp': (start + timedelta(minutes=i)).isoformat(),
+    } for i in range(n)]
+
+
+def events(n):
+    start = datetime(2024, 1, 1)
+    return [{
+        'id': i,
+        'title': f'Workshop {i}',
+        'slug': f'workshop-{i}',
+        'category': 'Workshop',
+        'date': '2024-03-01',
+        'time': '10:00',
+        'venue': 'Main Auditorium',
+        'organizer': 'AI Labs',
+        'shortDesc': 'Hands-on session ' * 8,
+        'fullDesc': 'Detailed agenda for the workshop. ' * 40,
+        'mainImage': f'/static/uploads/events/{i}.jpg',
+        'gallery': [f'/static/uploads/events/gallery/{i}_{n}.jpg' for n in range(6)],
+        'timestamp': (start + timedelta(minutes=i)).isoformat(),
+    } for i in range(n)]
+
+
+def measure(fn):
+    times = []
+    for _ in range(REPEAT):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return min(times), peak
+
+
+def consume(response):
+    size = 0
+    for chunk in response.response:
+        size += len(chunk)
+    return size
+
+
+def main():
+    app = Flask(__name__)
+    default = DefaultJSONProvider(app)
+    fast = FastJSONProvider(app)
+    encoder = 'orjson' if json_provider.orjson is not None else 'stdlib fallback'
+
+    print(f"{ROWS} rows, best of {REPEAT}; FastJSONProvider uses {encoder}\n")
+    print(f"{'':<40}{'time':>10}{'peak mem':>12}")
+    with app.test_request_context():
+        for name, data in (('projects', projects(ROWS)), ('events', events(ROWS))):
+            for label, fn in (
+                ('default provider', lambda: default.response(data).get_data()),
+                ('FastJSONProvider', lambda: fast.response(data).get_data()),
+                ('FastJSONProvider.stream_array', lambda: consume(fast.stream_array(iter(data)))),
+            ):
+                seconds, peak = measure(fn)
+                print(f"{name + ': ' + label:<40}{seconds * 1000:8.1f} ms{peak / 2**20:9.1f} MiB")
+            print()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""Full-text search latency on a 100k document corpus.
+
+Seeds a throwaway SQLite database with projects, events and vacancies
+(100k rows in total, text drawn from a fixed vocabulary), builds the FTS5
+index with services.search.rebuild() and compares GET /api/search style
+queries (ranked, with snippets) against the LIKE '%word%' scan that finding
+every match without an index needs; ranking needs every match, so the scan
+cannot stop early.
+
+Run from the repository root:
+    python -m benchmarks.search [documents]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+DOCUMENTS = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+REPEAT = 10
+
+tmp = tempfile.mkdtemp()
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+os.environ['AUTO_MIGRATE'] = 'true'
+
+from app import create_app
+from extensions import db
+from models import Project, Event, Vacancy
+from services import search
+
+random.seed(7)
+VOCABULARY = [f'word{i}' for i in range(5000)] + [
+    'python', 'flask', 'react', 'machine', 'learning', 'attendance', 'workshop', 'hackathon',
+    'nagpur', 'pune', 'developer', 'intern', 'vision', 'blockchain', 'robotics', 'analytics']
+QUERIES = ['python', 'machine learning', 'nagpur developer', 'robot', 'word123', 'zzzz']
+
+
+def words(n):
+    return ' '.join(random.choices(VOCABULARY, k=n))
+
+
+def seed():
+    projects, events = DOCUMENTS * 6 // 10, DOCUMENTS * 2 // 10
+    vacancies = DOCUMENTS - projects - events
+    db.session.execute(Project.__table__.insert(), [{
+        'title': words(4).title(), 'slug': f'project-{i}', 'student_name': words(2).title(),
+        'college': words(3).title(), 'description': words(25), 'full_description': words(120),
+        'tech_stack': ','.join(random.sample(VOCABULARY[-16:], 3))
+    } for i in range(projects)])
+    db.session.execute(Event.__table__.insert(), [{
+        'title': words(3).title(), 'slug': f'event-{i}', 'venue': words(2).title(),
+        'short_desc': words(20), 'full_desc': words(100)
+    } for i in range(events)])
+    db.session.execute(Vacancy.__table__.insert(), [{
+        'title': words(3).title(), 'slug': f'vacancy-{i}', 'location': words(1).title(),
+        'description': words(60), 'requirements': ','.join(words(5).split()), 'is_active': True
+    } for i in range(vacancies)])
+    db.session.commit()
+
+
+def like_search(q):
+    """Every match without an index: a LIKE scan of every text column"""
+    results = []
+    for kind, (_, model, columns) in search.KINDS.items():
+        conditions = []
+        for word in search.parse_query(q):
+            conditions.append(db.or_(*[getattr(model, c).ilike(f'%{word}%') for c in ['title'] + columns]))
+        results += db.session.query(model.id).filter(*conditions).all()
+    return results
+
+
+def best(fn, *args):
+    times = []
+    for _ in range(REPEAT):
+        t0 = time.perf_counter()
+        fn(*args)
+        times.append(time.perf_counter() - t0)
+    return min(times) * 1000
+
+
+def main():
+    app = create_app()
+    with app.app_context():
+        seed()
+        t0 = time.perf_counter()
+        with db.engine.begin() as conn:
+            search.rebuild(conn)
+        print(f"{DOCUMENTS} documents, index built in {time.perf_counter() - t0:.1f}s, best of {REPEAT}\n")
+        print(f"{'query':<22}{'FTS5 top 20':>12}{'LIKE scan':>12}{'matches':>9}")
+        for q in QUERIES:
+            matches = len(like_search(q))
+            print(f"{q:<22}{best(search.search, db.session, q):10.2f}ms{best(like_search, q):10.2f}ms{matches:>9}")
+
+
+if __name__ == '__main__':
+    main()
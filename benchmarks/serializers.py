@@ -0,0 +1,120 @@
+"""Compare the hand-built project dicts with the precompiled serializer.
+
+Seeds a throwaway SQLite database with 10k projects and times both the
+complete list path (query + serialize) and the serialization step alone.
+Both sides load the screenshots from the media table the same way.
+
+Run from the repository root:
+    python -m benchmarks.serializers [rows]
+"""
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+ROWS = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+REPEAT = 5
+
+tmp = tempfile.mkdtemp()
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+os.environ['AUTO_MIGRATE'] = 'true'
+
+from app import create_app
+from extensions import db
+from models import Project, Media
+from services.media import media_paths
+from services.serializers import project_serializer
+
+
+def legacy_dict(project, screenshots):
+    # Body of the loop get_projects used before the serializer layer
+    return {
+        'id': project.id,
+        'title': project.title,
+        'slug': project.slug,
+        'studentName': project.student_name,
+        'college': project.college,
+        'year': project.year,
+        'description': project.description,
+        'fullDescription': project.full_description,
+        'duration': project.duration,
+        'techStack': project.tech_stack.split(',') if project.tech_stack else [],
+        'thumbnail': project.thumbnail,
+        'screenshots': screenshots[project.id],
+        'liveLink': project.live_link,
+        'repoLink': project.repo_link,
+        'timestamp': project.timestamp.isoformat() if project.timestamp else None
+    }
+
+
+def legacy_dicts(projects):
+    screenshots = media_paths(db.session, 'project', [p.id for p in projects])
+    return [legacy_dict(p, screenshots) for p in projects]
+
+
+def seed():
+    start = datetime(2024, 1, 1)
+    db.session.execute(Project.__table__.insert(), [{
+        'title': f'Project {i}',
+        'slug': f'project-{i}',
+        'student_name': f'Student {i}',
+        'college': 'Example College of Engineering',
+        'year': '2024',
+        'description': 'Short summary ' * 10,
+        'full_description': 'Long description of the project. ' * 60,
+        'duration': '3 months',
+        'tech_stack': 'Python,Flask,SQLite,JavaScript',
+        'thumbnail': f'/static/uploads/projects/{i}.jpg',
+        'live_link': 'https://example.com',
+        'repo_link': 'https://github.com/example/project',
+        'timestamp': start + timedelta(minutes=i),
+    } for i in range(ROWS)])
+    db.session.execute(Media.__table__.insert(), [{
+        'owner_type': 'project', 'owner_id': i + 1, 'position': n,
+        'path': f'/static/uploads/projects/screenshots/{i}_{n}.jpg',
+    } for i in range(ROWS) for n in range(4)])
+    db.session.commit()
+
+
+def best(fn):
+    times = []
+    for _ in range(REPEAT):
+        db.session.expunge_all()
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return min(times)
+
+
+def report(label, seconds):
+    print(f"{label:<42}{seconds * 1000:9.1f} ms{seconds / ROWS * 1e6:9.2f} us/row")
+
+
+def main():
+    app = create_app()
+    with app.app_context():
+        seed()
+        fields = tuple(project_serializer.fields)
+
+        def legacy_full():
+            return legacy_dicts(Project.query.order_by(Project.timestamp.desc()).all())
+
+        def serializer_full():
+            rows = project_serializer.query(fields).order_by(Project.timestamp.desc()).all()
+            return project_serializer.dump_rows(rows, fields)
+
+        assert legacy_full() == serializer_full()
+
+        print(f"{ROWS} projects, best of {REPEAT}\n")
+        report('query + serialize, ORM + dict loop', best(legacy_full))
+        report('query + serialize, rows + serializer', best(serializer_full))
+
+        projects = Project.query.all()
+        rows = project_serializer.query(fields).all()
+        report('serialize only, dict loop', best(lambda: legacy_dicts(projects)))
+        report('serialize only, serializer', best(lambda: project_serializer.dump_rows(rows, fields)))
+
+
+if __name__ == '__main__':
+    main()
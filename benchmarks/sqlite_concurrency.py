@@ -0,0 +1,90 @@
+"""Hammer one SQLite file with concurrent readers and writers.
+
+Runs the same workload against a fresh database twice: once with
+SQLITE_TUNING=false (SQLite defaults: rollback journal, synchronous=FULL)
+and once with the tuning profile from services.database. Writer processes
+commit contact submissions the way /api/contact does; reader processes run
+the admin contact list query. Reports throughput, latency percentiles and
+"database is locked" errors.
+
+Run from the repository root:
+    python -m benchmarks.sqlite_concurrency [writers] [readers] [seconds]
+"""
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+WRITERS = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+READERS = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+SECONDS = float(sys.argv[3]) if len(sys.argv) > 3 else 5
+
+
+def worker(role, env, deadline, results):
+    os.environ.update(env)
+    from sqlalchemy.exc import OperationalError
+    from app import create_app
+    from extensions import db
+    from models import ContactQuery
+
+    app = create_app()
+    latencies, errors = [], 0
+    with app.app_context():
+        while time.time() < deadline:
+            t0 = time.perf_counter()
+            try:
+                if role == 'write':
+                    db.session.add(ContactQuery(name='Bench', email='bench@example.com', type='General', message='Hello ' * 20))
+                    db.session.commit()
+                else:
+                    ContactQuery.query.order_by(ContactQuery.timestamp.desc()).limit(25).all()
+                    db.session.query(db.func.count(ContactQuery.id)).scalar()
+                    db.session.rollback()
+                latencies.append(time.perf_counter() - t0)
+            except OperationalError as e:
+                db.session.rollback()
+                if 'locked' not in str(e):
+                    raise
+                errors += 1
+    results.put((role, latencies, errors))
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))] if values else 0
+
+
+def run(label, tuning):
+    path = os.path.join(tempfile.mkdtemp(), 'bench.db')
+    env = {'DATABASE_URL': f'sqlite:///{path}', 'SQLITE_TUNING': tuning, 'AUTO_MIGRATE': 'true'}
+    # Create the schema up front so workers only run the workload
+    worker('read', env, 0, multiprocessing.Queue())
+
+    results = multiprocessing.Queue()
+    deadline = time.time() + SECONDS + 2  # workers need ~1s to import and boot
+    procs = [multiprocessing.Process(target=worker, args=(role, env, deadline, results))
+             for role in ['write'] * WRITERS + ['read'] * READERS]
+    for p in procs:
+        p.start()
+    collected = [results.get() for _ in procs]
+    for p in procs:
+        p.join()
+
+    print(f"--- {label} ---")
+    for role in ('write', 'read'):
+        latencies = [l for r, ls, _ in collected if r == role for l in ls]
+        errors = sum(e for r, _, e in collected if r == role)
+        print(f"{role + 's':<8}{len(latencies):>8} ops  p50 {percentile(latencies, 0.5) * 1000:7.2f} ms"
+              f"  p99 {percentile(latencies, 0.99) * 1000:8.2f} ms  locked errors {errors}")
+    print()
+
+
+def main():
+    print(f"{WRITERS} writer and {READERS} reader processes\n")
+    run('SQLite defaults', 'false')
+    run('tuning profile', 'true')
+
+
+if __name__ == '__main__':
+    main()
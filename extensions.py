@@ -1,5 +1,17 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
+from services.cache import ResponseCache
+from services.compression import Compression
+from services.ingest import SubmissionQueue
+from services.instrumentation import Instrumentation
+from services.jobs import JobQueue
+from services.static_files import StaticFiles
 
 db = SQLAlchemy()
 login_manager = LoginManager()
+instrumentation = Instrumentation()
+response_cache = ResponseCache()
+submission_queue = SubmissionQueue()
+job_queue = JobQueue()
+static_files = StaticFiles()
+compression = Compression()
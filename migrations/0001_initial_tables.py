@@ -0,0 +1,87 @@
+"""Original tables, plus the slug columns added to project and event after launch.
+
+The DDL is frozen as the tables were when versioning started, not built from
+models.py, so later migrations always find the schema they were written for.
+"""
+from sqlalchemy import Boolean, Column, DateTime, Integer, MetaData, String, Table, Text
+from services.migrations import add_column_if_missing
+
+metadata = MetaData()
+
+Table('user', metadata,
+      Column('id', Integer, primary_key=True),
+      Column('username', String(80), unique=True, nullable=False),
+      Column('password_hash', String(120), nullable=False))
+
+Table('contact_query', metadata,
+      Column('id', Integer, primary_key=True),
+      Column('name', String(100), nullable=False),
+      Column('email', String(120), nullable=False),
+      Column('type', String(50)),
+      Column('message', Text, nullable=False),
+      Column('timestamp', DateTime))
+
+Table('partnership_request', metadata,
+      Column('id', Integer, primary_key=True),
+      Column('college_name', String(150), nullable=False),
+      Column('email', String(120), nullable=False),
+      Column('phone', String(20), nullable=False),
+      Column('timestamp', DateTime))
+
+Table('job_application', metadata,
+      Column('id', Integer, primary_key=True),
+      Column('job_role', String(100), nullable=False),
+      Column('name', String(100), nullable=False),
+      Column('email', String(120), nullable=False),
+      Column('resume_link', String(255)),
+      Column('cover_letter', Text),
+      Column('timestamp', DateTime))
+
+Table('vacancy', metadata,
+      Column('id', Integer, primary_key=True),
+      Column('title', String(100), nullable=False),
+      Column('slug', String(150), unique=True),
+      Column('location', String(100)),
+      Column('type', String(50)),
+      Column('description', Text),
+      Column('requirements', Text),
+      Column('is_active', Boolean),
+      Column('timestamp', DateTime))
+
+Table('project', metadata,
+      Column('id', Integer, primary_key=True),
+      Column('title', String(150), nullable=False),
+      Column('slug', String(150), unique=True),
+      Column('student_name', String(100), nullable=False),
+      Column('college', String(150)),
+      Column('year', String(20)),
+      Column('description', Text),
+      Column('full_description', Text),
+      Column('duration', String(50)),
+      Column('tech_stack', Text),
+      Column('thumbnail', String(255)),
+      Column('screenshots', Text),
+      Column('live_link', String(255)),
+      Column('repo_link', String(255)),
+      Column('timestamp', DateTime))
+
+Table('event', metadata,
+      Column('id', Integer, primary_key=True),
+      Column('title', String(150), nullable=False),
+      Column('slug', String(150), unique=True),
+      Column('category', String(50)),
+      Column('date', String(50)),
+      Column('time', String(50)),
+      Column('venue', String(150)),
+      Column('organizer', String(100)),
+      Column('short_desc', Text),
+      Column('full_desc', Text),
+      Column('main_image', String(255)),
+      Column('gallery', Text),
+      Column('timestamp', DateTime))
+
+
+def upgrade(conn):
+    metadata.create_all(conn, checkfirst=True)
+    add_column_if_missing(conn, 'project', 'slug', 'VARCHAR(150)')
+    add_column_if_missing(conn, 'event', 'slug', 'VARCHAR(150)')
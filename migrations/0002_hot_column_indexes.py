@@ -0,0 +1,33 @@
+"""Indexes on timestamp and email columns and on vacancy (is_active, timestamp)"""
+from sqlalchemy import Boolean, Column, DateTime, Index, Integer, MetaData, String, Table
+from services.migrations import create_indexes
+
+metadata = MetaData()
+
+tables = [
+    Table(name, metadata,
+          Column('id', Integer, primary_key=True),
+          Column('email', String(120)),
+          Column('timestamp', DateTime),
+          Index(f'ix_{name}_email', 'email'),
+          Index(f'ix_{name}_timestamp', 'timestamp'))
+    for name in ('contact_query', 'partnership_request', 'job_application')
+]
+tables.append(Table('vacancy', metadata,
+                    Column('id', Integer, primary_key=True),
+                    Column('is_active', Boolean),
+                    Column('timestamp', DateTime),
+                    Index('ix_vacancy_timestamp', 'timestamp'),
+                    # Public job listing: WHERE is_active ORDER BY timestamp DESC
+                    Index('ix_vacancy_is_active_timestamp', 'is_active', 'timestamp')))
+tables += [
+    Table(name, metadata,
+          Column('id', Integer, primary_key=True),
+          Column('timestamp', DateTime),
+          Index(f'ix_{name}_timestamp', 'timestamp'))
+    for name in ('project', 'event')
+]
+
+
+def upgrade(conn):
+    create_indexes(conn, *tables)
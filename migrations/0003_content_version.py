@@ -0,0 +1,22 @@
+"""Change counters used for ETags of the content API"""
+from datetime import datetime
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table
+from services.migrations import create_tables
+
+VERSIONED_TABLES = ['event', 'project', 'vacancy']
+
+content_version = Table(
+    'content_version', MetaData(),
+    Column('table_name', String(50), primary_key=True),
+    Column('version', Integer, nullable=False),
+    Column('updated_at', DateTime),
+)
+
+
+def upgrade(conn):
+    create_tables(conn, content_version)
+    table = content_version
+    existing = {row[0] for row in conn.execute(table.select().with_only_columns(table.c.table_name))}
+    rows = [{'table_name': t, 'version': 0, 'updated_at': datetime.utcnow()} for t in VERSIONED_TABLES if t not in existing]
+    if rows:
+        conn.execute(table.insert(), rows)
@@ -0,0 +1,30 @@
+"""Unique index on project/event slug for databases where the column was added by ALTER TABLE.
+
+Such databases never got the UNIQUE constraint, so duplicate slugs may exist;
+later duplicates are renamed to <slug>-<id> before the index is created.
+"""
+from sqlalchemy import inspect, text
+
+TABLES = ['project', 'event', 'vacancy']
+
+
+def has_unique_slug(inspector, table):
+    constraints = inspector.get_unique_constraints(table) + [ix for ix in inspector.get_indexes(table) if ix['unique']]
+    return any(c['column_names'] == ['slug'] for c in constraints)
+
+
+def upgrade(conn):
+    inspector = inspect(conn)
+    for table in TABLES:
+        if has_unique_slug(inspector, table):
+            continue
+        duplicates = conn.execute(text(
+            f'SELECT id, slug FROM {table} WHERE slug IN '
+            f'(SELECT slug FROM {table} GROUP BY slug HAVING COUNT(*) > 1) ORDER BY slug, id')).all()
+        seen = set()
+        for id, slug in duplicates:
+            if slug not in seen:
+                seen.add(slug)  # the oldest row keeps the slug
+                continue
+            conn.execute(text(f'UPDATE {table} SET slug = :slug WHERE id = :id'), {'slug': f'{slug}-{id}', 'id': id})
+        conn.execute(text(f'CREATE UNIQUE INDEX uq_{table}_slug ON {table} (slug)'))
@@ -0,0 +1,26 @@
+"""technology and project_technology tables, backfilled from project.tech_stack"""
+from sqlalchemy import Column, ForeignKey, Integer, MetaData, String, Table, Text, select
+from services.migrations import create_tables
+from services.technologies import sync_projects
+
+BATCH_SIZE = 1000
+
+metadata = MetaData()
+project = Table('project', metadata,
+                Column('id', Integer, primary_key=True),
+                Column('tech_stack', Text))
+technology = Table('technology', metadata,
+                   Column('id', Integer, primary_key=True),
+                   Column('key', String(100), unique=True, nullable=False),
+                   Column('name', String(100), nullable=False))
+# (technology_id, project_id) primary key serves ?tech= lookups, project_id index serves resyncs
+project_technology = Table('project_technology', metadata,
+                           Column('technology_id', Integer, ForeignKey('technology.id', ondelete='CASCADE'), primary_key=True),
+                           Column('project_id', Integer, ForeignKey('project.id', ondelete='CASCADE'), primary_key=True, index=True))
+
+
+def upgrade(conn):
+    create_tables(conn, technology, project_technology)
+    rows = conn.execute(select(project.c.id, project.c.tech_stack).where(project.c.tech_stack != '')).all()
+    for i in range(0, len(rows), BATCH_SIZE):
+        sync_projects(conn, dict(rows[i:i + BATCH_SIZE]))
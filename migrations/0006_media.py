@@ -0,0 +1,51 @@
+"""media table, backfilled from project.screenshots and event.gallery.
+
+Dimensions and byte size of existing uploads are read from their files here,
+once; later media rows copy them from the blob table.
+"""
+import os
+from sqlalchemy import Column, DateTime, Index, Integer, MetaData, String, Table, Text, select
+from services.media import local_file, split_paths
+from services.migrations import create_tables
+from services.storage import image_size
+
+BATCH_SIZE = 1000
+
+metadata = MetaData()
+media = Table('media', metadata,
+              Column('id', Integer, primary_key=True),
+              Column('owner_type', String(20), nullable=False),
+              Column('owner_id', Integer, nullable=False),
+              Column('path', String(255), nullable=False),
+              Column('position', Integer, nullable=False),
+              Column('width', Integer),
+              Column('height', Integer),
+              Column('byte_size', Integer),
+              Column('timestamp', DateTime),
+              Index('ix_media_owner', 'owner_type', 'owner_id', 'position'))
+# owner_type -> (owner table, comma-separated column)
+OWNERS = {
+    'project': (Table('project', metadata, Column('id', Integer, primary_key=True), Column('screenshots', Text)), 'screenshots'),
+    'event': (Table('event', metadata, Column('id', Integer, primary_key=True), Column('gallery', Text)), 'gallery'),
+}
+
+
+def file_info(path):
+    filename = local_file(path)
+    if not filename or not os.path.isfile(filename):
+        return {'byte_size': None, 'width': None, 'height': None}
+    width, height = image_size(filename)
+    return {'byte_size': os.path.getsize(filename), 'width': width, 'height': height}
+
+
+def upgrade(conn):
+    create_tables(conn, media)
+    for owner_type, (table, column) in OWNERS.items():
+        done = select(media.c.owner_id).where(media.c.owner_type == owner_type)
+        rows = conn.execute(select(table.c.id, table.c[column])
+                            .where(table.c[column] != '', table.c.id.notin_(done))).all()
+        for i in range(0, len(rows), BATCH_SIZE):
+            batch = [dict(owner_type=owner_type, owner_id=owner_id, path=path, position=position, **file_info(path))
+                     for owner_id, value in rows[i:i + BATCH_SIZE] for position, path in enumerate(split_paths(value))]
+            if batch:
+                conn.execute(media.insert(), batch)
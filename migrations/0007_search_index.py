@@ -0,0 +1,10 @@
+"""Full-text search index (FTS5 on SQLite, tsvector + GIN on PostgreSQL), built from existing rows"""
+from services.search import create_index, rebuild, supported
+
+
+def upgrade(conn):
+    if not supported(conn):
+        print(f"Skipping search index: not supported on {conn.dialect.name}")
+        return
+    create_index(conn)
+    rebuild(conn)
@@ -0,0 +1,21 @@
+"""image_variant table for resized upload copies (generated by `flask images generate`)"""
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table
+from services.migrations import create_tables
+
+image_variant = Table(
+    'image_variant', MetaData(),
+    Column('id', Integer, primary_key=True),
+    Column('source_path', String(255), nullable=False, index=True),
+    Column('path', String(255), nullable=False),
+    Column('format', String(10), nullable=False),
+    Column('width', Integer, nullable=False),
+    Column('height', Integer, nullable=False),
+    Column('byte_size', Integer),
+    Column('source_width', Integer),
+    Column('source_height', Integer),
+    Column('timestamp', DateTime),
+)
+
+
+def upgrade(conn):
+    create_tables(conn, image_variant)
@@ -0,0 +1,26 @@
+"""job table for the background job queue"""
+from sqlalchemy import Column, DateTime, Index, Integer, MetaData, String, Table, Text
+from services.migrations import create_tables
+
+job = Table(
+    'job', MetaData(),
+    Column('id', Integer, primary_key=True),
+    Column('kind', String(50), nullable=False),
+    Column('payload', Text, nullable=False),
+    Column('status', String(20), nullable=False),
+    Column('attempts', Integer, nullable=False),
+    Column('max_attempts', Integer, nullable=False),
+    Column('run_after', DateTime, nullable=False),
+    Column('worker', String(100)),
+    Column('last_error', Text),
+    Column('result', Text),
+    Column('created_at', DateTime),
+    Column('started_at', DateTime),
+    Column('finished_at', DateTime),
+    # The dispatcher's "next runnable job" lookup
+    Index('ix_job_status_run_after', 'status', 'run_after'),
+)
+
+
+def upgrade(conn):
+    create_tables(conn, job)
@@ -0,0 +1,16 @@
+"""blob table for content-addressed uploads"""
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table
+from services.migrations import create_tables
+
+blob = Table(
+    'blob', MetaData(),
+    Column('hash', String(64), primary_key=True),
+    Column('path', String(255), unique=True, nullable=False),
+    Column('byte_size', Integer),
+    Column('ref_count', Integer, nullable=False, index=True),
+    Column('stored_at', DateTime),
+)
+
+
+def upgrade(conn):
+    create_tables(conn, blob)
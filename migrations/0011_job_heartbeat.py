@@ -0,0 +1,6 @@
+"""job.heartbeat_at, refreshed by the dispatcher while it runs a job"""
+from services.migrations import add_column_if_missing
+
+
+def upgrade(conn):
+    add_column_if_missing(conn, 'job', 'heartbeat_at', 'TIMESTAMP')
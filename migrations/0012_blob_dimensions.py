@@ -0,0 +1,20 @@
+"""blob.width and blob.height, read once here from the files of existing blobs"""
+from sqlalchemy import Column, Integer, MetaData, String, Table, select
+from services.migrations import add_column_if_missing
+from services.media import local_file
+from services.storage import image_size
+
+blob = Table('blob', MetaData(),
+             Column('hash', String(64), primary_key=True),
+             Column('path', String(255)),
+             Column('width', Integer),
+             Column('height', Integer))
+
+
+def upgrade(conn):
+    add_column_if_missing(conn, 'blob', 'width', 'INTEGER')
+    add_column_if_missing(conn, 'blob', 'height', 'INTEGER')
+    for digest, path in conn.execute(select(blob.c.hash, blob.c.path).where(blob.c.width.is_(None))).all():
+        width, height = image_size(local_file(path))
+        if width:
+            conn.execute(blob.update().where(blob.c.hash == digest).values(width=width, height=height))
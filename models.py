@@ -10,28 +10,33 @@ class User(UserMixin, db.Model):
 class ContactQuery(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
-    email = db.Column(db.String(120), nullable=False)
+    email = db.Column(db.String(120), nullable=False, index=True)
     type = db.Column(db.String(50))
     message = db.Column(db.Text, nullable=False)
-    timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+    timestamp = db.Column(db.DateTime, default=datetime.utcnow, index=True)
 
 class PartnershipRequest(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     college_name = db.Column(db.String(150), nullable=False)
-    email = db.Column(db.String(120), nullable=False)
+    email = db.Column(db.String(120), nullable=False, index=True)
     phone = db.Column(db.String(20), nullable=False)
-    timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+    timestamp = db.Column(db.DateTime, default=datetime.utcnow, index=True)
 
 class JobApplication(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     job_role = db.Column(db.String(100), nullable=False)
     name = db.Column(db.String(100), nullable=False)
-    email = db.Column(db.String(120), nullable=False)
+    email = db.Column(db.String(120), nullable=False, index=True)
     resume_link = db.Column(db.String(255))
     cover_letter = db.Column(db.Text)
-    timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+    timestamp = db.Column(db.DateTime, default=datetime.utcnow, index=True)
 
 class Vacancy(db.Model):
+    __table_args__ = (
+        # Public job listing: WHERE is_active ORDER BY timestamp DESC
+        db.Index('ix_vacancy_is_active_timestamp', 'is_active', 'timestamp'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(100), nullable=False)
     slug = db.Column(db.String(150), unique=True)
@@ -40,7 +45,7 @@ class Vacancy(db.Model):
     description = db.Column(db.Text)
     requirements = db.Column(db.Text) # Comma-separated or bullet points
     is_active = db.Column(db.Boolean, default=True)
-    timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+    timestamp = db.Column(db.DateTime, default=datetime.utcnow, index=True)
 
 class Project(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -54,10 +59,23 @@ class Project(db.Model):
     duration = db.Column(db.String(50))
     tech_stack = db.Column(db.Text)  # Stored as comma-separated string
     thumbnail = db.Column(db.String(255))
-    screenshots = db.Column(db.Text)  # Stored as comma-separated URLs
+    # Screenshots are Media rows (owner_type 'project'); the old comma-separated
+    # `screenshots` column stays in the table but is no longer read or written
     live_link = db.Column(db.String(255))
     repo_link = db.Column(db.String(255))
-    timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+    timestamp = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+class Technology(db.Model):
+    """One entry of a project tech stack; `key` is the lowercased name used for filtering"""
+    id = db.Column(db.Integer, primary_key=True)
+    key = db.Column(db.String(100), unique=True, nullable=False)
+    name = db.Column(db.String(100), nullable=False)
+
+class ProjectTechnology(db.Model):
+    """Project <-> Technology links, kept in sync with Project.tech_stack (services/technologies.py)"""
+    # (technology_id, project_id) primary key serves ?tech= lookups, project_id index serves resyncs
+    technology_id = db.Column(db.Integer, db.ForeignKey('technology.id', ondelete='CASCADE'), primary_key=True)
+    project_id = db.Column(db.Integer, db.ForeignKey('project.id', ondelete='CASCADE'), primary_key=True, index=True)
 
 class Event(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -71,5 +89,73 @@ class Event(db.Model):
     short_desc = db.Column(db.Text)
     full_desc = db.Column(db.Text)
     main_image = db.Column(db.String(255))
-    gallery = db.Column(db.Text)  # Stored as comma-separated URLs
+    # Gallery images are Media rows (owner_type 'event'); the old comma-separated
+    # `gallery` column stays in the table but is no longer read or written
+    timestamp = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+class Media(db.Model):
+    """One image of a project's screenshots or an event's gallery (services/media.py)"""
+    __table_args__ = (
+        # Galleries are always read per owner in display order
+        db.Index('ix_media_owner', 'owner_type', 'owner_id', 'position'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    owner_type = db.Column(db.String(20), nullable=False)  # project, event
+    owner_id = db.Column(db.Integer, nullable=False)
+    path = db.Column(db.String(255), nullable=False)
+    position = db.Column(db.Integer, nullable=False, default=0)
+    width = db.Column(db.Integer)
+    height = db.Column(db.Integer)
+    byte_size = db.Column(db.Integer)
+    timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+
+class ImageVariant(db.Model):
+    """A resized copy of an uploaded image in a modern format (services/images.py)"""
+    id = db.Column(db.Integer, primary_key=True)
+    source_path = db.Column(db.String(255), nullable=False, index=True)
+    path = db.Column(db.String(255), nullable=False)
+    format = db.Column(db.String(10), nullable=False)  # avif, webp
+    width = db.Column(db.Integer, nullable=False)
+    height = db.Column(db.Integer, nullable=False)
+    byte_size = db.Column(db.Integer)
+    source_width = db.Column(db.Integer)
+    source_height = db.Column(db.Integer)
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+
+class Blob(db.Model):
+    """An uploaded file stored once under its content hash (services/storage.py)"""
+    hash = db.Column(db.String(64), primary_key=True)  # sha256 hex
+    path = db.Column(db.String(255), unique=True, nullable=False)
+    byte_size = db.Column(db.Integer)
+    width = db.Column(db.Integer)  # read from the image header when stored
+    height = db.Column(db.Integer)
+    ref_count = db.Column(db.Integer, nullable=False, default=0, index=True)
+    stored_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class Job(db.Model):
+    """A unit of background work (services/jobs.py)"""
+    __table_args__ = (
+        # The dispatcher's "next runnable job" lookup
+        db.Index('ix_job_status_run_after', 'status', 'run_after'),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)
+    payload = db.Column(db.Text, nullable=False)  # JSON
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued, running, done, failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=3)
+    run_after = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    worker = db.Column(db.String(100))
+    last_error = db.Column(db.Text)
+    result = db.Column(db.Text)  # JSON
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    heartbeat_at = db.Column(db.DateTime)  # refreshed by the worker running the job
+    finished_at = db.Column(db.DateTime)
+
+class ContentVersion(db.Model):
+    """Change counter per content table, bumped in the same transaction as every write"""
+    table_name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -1,32 +1,70 @@
 import os
-import re
-from flask import Blueprint, render_template, redirect, url_for, request, flash, current_app
+from flask import Blueprint, render_template, redirect, url_for, request, flash, current_app, abort, stream_with_context, jsonify
 from flask_login import login_user, logout_user, login_required, current_user
 from werkzeug.security import check_password_hash
-from werkzeug.utils import secure_filename
-from extensions import db
-from models import User, ContactQuery, PartnershipRequest, JobApplication, Project, Event, Vacancy
+from sqlalchemy.orm import load_only
+from extensions import db, instrumentation
+from models import User, ContactQuery, PartnershipRequest, JobApplication, Project, Event, Vacancy, Media, Job, Blob
+from services.dashboard import get_dashboard_data
+from services.database import pool_status
+from services.images import queue_variants
+from services.media import add_media, delete_media, media_paths, remove_paths, reorder_media
+from services.pagination import Listing
+from services.exports import parse_date_range, export_query, generate_ndjson, generate_csv
+from services.slugs import save_with_slug, wanted_slug
+from services.storage import store
+from services import uploads
+from services.serializers import contact_serializer, partnership_serializer, application_serializer, job_serializer
 
 admin_bp = Blueprint('admin', __name__)
 
-def slugify(text):
-    text = text.lower()
-    text = re.sub(r'[^\w\s-]', '', text)
-    text = re.sub(r'[\s_-]+', '-', text).strip('-')
-    return text
-
-def save_file(file, folder):
+# Admin list pages: sortable columns (?sort= key -> column) and ?q= search columns
+CONTACT_LISTING = Listing(ContactQuery,
+    sortable={'id': 'id', 'name': 'name', 'email': 'email', 'type': 'type', 'timestamp': 'timestamp'},
+    searchable=['name', 'email', 'type', 'message'])
+PARTNERSHIP_LISTING = Listing(PartnershipRequest,
+    sortable={'id': 'id', 'college': 'college_name', 'email': 'email', 'timestamp': 'timestamp'},
+    searchable=['college_name', 'email', 'phone'])
+APPLICATION_LISTING = Listing(JobApplication,
+    sortable={'id': 'id', 'role': 'job_role', 'name': 'name', 'email': 'email', 'timestamp': 'timestamp'},
+    searchable=['job_role', 'name', 'email'])
+VACANCY_LISTING = Listing(Vacancy,
+    sortable={'id': 'id', 'title': 'title', 'location': 'location', 'type': 'type', 'status': 'is_active', 'timestamp': 'timestamp'},
+    searchable=['title', 'location', 'type'])
+PROJECT_LISTING = Listing(Project,
+    sortable={'id': 'id', 'title': 'title', 'student': 'student_name', 'college': 'college', 'timestamp': 'timestamp'},
+    searchable=['title', 'student_name', 'college', 'tech_stack'],
+    options=[load_only(Project.id, Project.thumbnail, Project.title, Project.student_name,
+                       Project.college, Project.tech_stack, Project.timestamp)])
+EVENT_LISTING = Listing(Event,
+    sortable={'id': 'id', 'title': 'title', 'category': 'category', 'date': 'date', 'venue': 'venue', 'organizer': 'organizer', 'timestamp': 'timestamp'},
+    searchable=['title', 'category', 'venue', 'organizer'],
+    options=[load_only(Event.id, Event.main_image, Event.title, Event.category, Event.date,
+                       Event.venue, Event.organizer, Event.timestamp)])
+
+EXPORTS = {
+    'contacts': contact_serializer,
+    'partnerships': partnership_serializer,
+    'careers': application_serializer
+}
+
+def save_file(file):
+    """Store an upload (once per distinct content, see services/storage.py) and return its /static/uploads/... URL"""
     if not file or file.filename == '':
         return None
-    filename = secure_filename(file.filename)
-    # Add timestamp prefix to avoid collisions
-    from datetime import datetime
-    filename = f"{datetime.now().strftime('%Y%m%d%H%M%S')}_{filename}"
-    upload_path = os.path.join(current_app.config['UPLOAD_FOLDER'], folder)
-    os.makedirs(upload_path, exist_ok=True)
-    file.save(os.path.join(upload_path, filename))
-    # Return as relative path for web access: /static/uploads/...
-    return f"/static/uploads/{folder}/{filename}"
+    path, created = store(file)
+    if created:
+        # Resized variants are made by a background job once the form is saved
+        queue_variants(path)
+    return path
+
+def uploaded_paths(field):
+    """Paths of resumable uploads (see /uploads below) listed in a comma-separated form field"""
+    paths = [p for p in request.form.get(field, '').split(',') if p]
+    if not paths:
+        return []
+    known = {p for (p,) in db.session.query(Blob.path).filter(Blob.path.in_(paths))}
+    return [p for p in paths if p in known]
 
 
 @admin_bp.route('/login', methods=['GET', 'POST'])
@@ -57,25 +95,128 @@ def logout():
 @admin_bp.route('/dashboard')
 @login_required
 def dashboard():
-    contact_queries = ContactQuery.query.order_by(ContactQuery.timestamp.desc()).all()
-    partnership_requests = PartnershipRequest.query.order_by(PartnershipRequest.timestamp.desc()).all()
-    job_applications = JobApplication.query.order_by(JobApplication.timestamp.desc()).all()
-    projects_count = Project.query.count()
-    events_count = Event.query.count()
-    
-    return render_template('admin/dashboard.html', 
-                         contact_queries=contact_queries,
-                         partnership_requests=partnership_requests,
-                         job_applications=job_applications,
-                         projects_count=projects_count,
-                         events_count=events_count)
+    return render_template('admin/dashboard.html', **get_dashboard_data())
+
+@admin_bp.route('/pool-stats')
+@login_required
+def pool_stats():
+    """Connection pool occupancy of the worker process serving this request"""
+    options = {k: v for k, v in current_app.config['SQLALCHEMY_ENGINE_OPTIONS'].items() if k not in ('poolclass', 'connect_args')}
+    return jsonify({'status': pool_status(db.engine.pool, current_app.extensions['pool_counters']), 'options': options})
+
+@admin_bp.route('/request-stats', methods=['GET', 'DELETE'])
+@login_required
+def request_stats():
+    """Per-endpoint request timings of the worker process serving this request; DELETE resets them"""
+    if request.method == 'DELETE':
+        instrumentation.reset()
+    return jsonify({'pid': os.getpid(), 'enabled': instrumentation.enabled, 'endpoints': instrumentation.snapshot()})
+
+@admin_bp.route('/jobs')
+@login_required
+def jobs():
+    """Background job counts by status and the latest jobs, optionally ?status= and ?ids=1,2,3"""
+    try:
+        query = job_serializer.query(tuple(job_serializer.fields))
+        if request.args.get('status'):
+            query = query.filter(Job.status == request.args['status'])
+        if request.args.get('ids'):
+            ids = [int(i) for i in request.args['ids'].split(',') if i.strip()][:100]
+            query = query.filter(Job.id.in_(ids))
+        rows = query.order_by(Job.id.desc()).limit(50).all()
+        counts = dict(db.session.query(Job.status, db.func.count()).group_by(Job.status).all())
+        return jsonify({'counts': counts, 'jobs': job_serializer.dump_rows(rows)})
+    except ValueError:
+        return jsonify({'error': 'ids must be comma-separated integers'}), 400
+
+@admin_bp.route('/jobs/<int:id>')
+@login_required
+def job_status(id):
+    """Status of one background job, for polling"""
+    row = job_serializer.query(tuple(job_serializer.fields)).filter(Job.id == id).first()
+    if not row:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job_serializer.dump_row(row))
+
+# --- Resumable Uploads (services/uploads.py) ---
+@admin_bp.route('/uploads', methods=['POST'])
+@login_required
+def start_upload():
+    """Begin a resumable upload: {"filename", "size"}"""
+    data = request.get_json(silent=True) or {}
+    try:
+        upload_id = uploads.start(current_app.config['UPLOAD_RESUME_DIR'], data.get('filename'), data.get('size'),
+                                  current_app.config['UPLOAD_MAX_FILE_SIZE'])
+    except uploads.UploadError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({'id': upload_id, 'offset': 0, 'chunkSize': current_app.config['UPLOAD_CHUNK_SIZE']}), 201
+
+@admin_bp.route('/uploads/<upload_id>', methods=['GET'])
+@login_required
+def upload_status(upload_id):
+    """Offset to resume a resumable upload from"""
+    try:
+        info = uploads.status(current_app.config['UPLOAD_RESUME_DIR'], upload_id)
+    except uploads.UploadError as e:
+        return jsonify({'error': str(e)}), 400
+    if info is None:
+        return jsonify({'error': 'Upload not found'}), 404
+    return jsonify({'offset': info['offset'], 'size': info['size']})
+
+@admin_bp.route('/uploads/<upload_id>', methods=['PUT'])
+@login_required
+def upload_chunk(upload_id):
+    """Append the request body at the Upload-Offset header; the last chunk returns the stored file's path"""
+    directory = current_app.config['UPLOAD_RESUME_DIR']
+    try:
+        offset = int(request.headers['Upload-Offset'])
+    except (KeyError, ValueError):
+        return jsonify({'error': 'Upload-Offset header required'}), 400
+    try:
+        offset = uploads.append(directory, upload_id, offset, request.stream)
+        info = uploads.status(directory, upload_id)
+        if offset < info['size']:
+            return jsonify({'offset': offset})
+        path, created = uploads.finish(directory, upload_id)
+        if created:
+            queue_variants(path)
+        db.session.commit()
+        return jsonify({'offset': offset, 'path': path})
+    except uploads.OffsetMismatch as e:
+        return jsonify({'error': str(e), 'offset': e.offset}), 409
+    except uploads.UploadError as e:
+        return jsonify({'error': str(e)}), 400
+    except FileNotFoundError:
+        return jsonify({'error': 'Upload not found'}), 404
+
+# --- Export Routes ---
+@admin_bp.route('/export/<kind>.<fmt>')
+@login_required
+def export(kind, fmt):
+    """Stream a submissions table as NDJSON or CSV, optionally limited to ?from=&to= (YYYY-MM-DD)"""
+    serializer = EXPORTS.get(kind)
+    if serializer is None or fmt not in ('ndjson', 'csv'):
+        abort(404)
+    try:
+        start, end = parse_date_range(request.args.get('from'), request.args.get('to'))
+    except ValueError as e:
+        abort(400, str(e))
+
+    rows = export_query(serializer, start, end)
+    if fmt == 'ndjson':
+        body, mimetype = generate_ndjson(serializer, rows), 'application/x-ndjson'
+    else:
+        body, mimetype = generate_csv(serializer, rows), 'text/csv'
+    response = current_app.response_class(stream_with_context(body), mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename="{kind}.{fmt}"'
+    return response
 
 # --- Contact Routes ---
 @admin_bp.route('/contacts')
 @login_required
 def contacts():
-    contact_queries = ContactQuery.query.order_by(ContactQuery.timestamp.desc()).all()
-    return render_template('admin/contacts.html', contact_queries=contact_queries)
+    listing = CONTACT_LISTING.paginate(request.args)
+    return render_template('admin/contacts.html', contact_queries=listing.items, listing=listing)
 
 @admin_bp.route('/contacts/delete/<int:id>', methods=['POST'])
 @login_required
@@ -96,8 +237,8 @@ def view_contact(id):
 @admin_bp.route('/partnerships')
 @login_required
 def partnerships():
-    partnership_requests = PartnershipRequest.query.order_by(PartnershipRequest.timestamp.desc()).all()
-    return render_template('admin/partnerships.html', partnership_requests=partnership_requests)
+    listing = PARTNERSHIP_LISTING.paginate(request.args)
+    return render_template('admin/partnerships.html', partnership_requests=listing.items, listing=listing)
 
 @admin_bp.route('/partnerships/delete/<int:id>', methods=['POST'])
 @login_required
@@ -118,8 +259,8 @@ def view_partnership(id):
 @admin_bp.route('/careers')
 @login_required
 def careers():
-    job_applications = JobApplication.query.order_by(JobApplication.timestamp.desc()).all()
-    return render_template('admin/careers.html', job_applications=job_applications)
+    listing = APPLICATION_LISTING.paginate(request.args)
+    return render_template('admin/careers.html', job_applications=listing.items, listing=listing)
 
 @admin_bp.route('/careers/delete/<int:id>', methods=['POST'])
 @login_required
@@ -140,8 +281,8 @@ def view_career(id):
 @admin_bp.route('/vacancies')
 @login_required
 def vacancies():
-    all_vacancies = Vacancy.query.order_by(Vacancy.timestamp.desc()).all()
-    return render_template('admin/vacancies.html', vacancies=all_vacancies)
+    listing = VACANCY_LISTING.paginate(request.args)
+    return render_template('admin/vacancies.html', vacancies=listing.items, listing=listing)
 
 @admin_bp.route('/vacancies/add', methods=['GET', 'POST'])
 @login_required
@@ -149,24 +290,16 @@ def add_vacancy():
     if request.method == 'POST':
         try:
             title = request.form.get('title')
-            slug = slugify(title)
-            # Ensure unique slug
-            existing = Vacancy.query.filter_by(slug=slug).first()
-            if existing:
-                import random
-                slug = f"{slug}-{random.randint(100, 999)}"
-
             new_vacancy = Vacancy(
                 title=title,
-                slug=slug,
                 location=request.form.get('location'),
                 type=request.form.get('type'),
                 description=request.form.get('description'),
                 requirements=request.form.get('requirements'),
                 is_active=True
             )
-            db.session.add(new_vacancy)
-            db.session.commit()
+            # Auto-generate a unique slug from the title
+            save_with_slug(new_vacancy, wanted_slug(Vacancy, title=title))
             flash('Job vacancy added successfully!', 'success')
             return redirect(url_for('admin.vacancies'))
         except Exception as e:
@@ -213,8 +346,8 @@ def view_vacancy(id):
 @admin_bp.route('/projects')
 @login_required
 def projects():
-    all_projects = Project.query.order_by(Project.timestamp.desc()).all()
-    return render_template('admin/projects.html', projects=all_projects)
+    listing = PROJECT_LISTING.paginate(request.args)
+    return render_template('admin/projects.html', projects=listing.items, listing=listing)
 
 @admin_bp.route('/projects/add', methods=['GET', 'POST'])
 @login_required
@@ -223,34 +356,26 @@ def add_project():
         try:
             title = request.form.get('title')
             full_description = request.form.get('full_description', '')
-            
-            # Auto-generate slug
-            slug = slugify(title)
-            # Ensure unique slug
-            existing = Project.query.filter_by(slug=slug).first()
-            if existing:
-                import random
-                slug = f"{slug}-{random.randint(100, 999)}"
 
             # Auto-generate short description from full description (first 150 chars)
             description = full_description[:150] + ('...' if len(full_description) > 150 else '')
 
             # Handle file uploads
             thumbnail_file = request.files.get('thumbnail')
-            thumbnail_path = save_file(thumbnail_file, 'projects')
+            thumbnail_path = save_file(thumbnail_file)
 
             screenshot_files = request.files.getlist('screenshots')
             screenshot_paths = []
             for f in screenshot_files:
-                path = save_file(f, 'projects/screenshots')
+                path = save_file(f)
                 if path:
                     screenshot_paths.append(path)
+            screenshot_paths += uploaded_paths('uploaded_screenshots')
             
             tech_stack = request.form.get('tech_stack', '')
             
             new_project = Project(
                 title=title,
-                slug=slug,
                 student_name=request.form.get('student_name'),
                 college=request.form.get('college'),
                 year=request.form.get('year'),
@@ -259,12 +384,12 @@ def add_project():
                 duration=request.form.get('duration'),
                 tech_stack=tech_stack,
                 thumbnail=thumbnail_path,
-                screenshots=','.join(screenshot_paths),
                 live_link=request.form.get('live_link'),
                 repo_link=request.form.get('repo_link')
             )
-            db.session.add(new_project)
-            db.session.commit()
+            # Auto-generate a unique slug from the title
+            save_with_slug(new_project, wanted_slug(Project, title=title),
+                           then=lambda p: add_media(db.session, 'project', p.id, screenshot_paths))
             flash('Project added successfully!', 'success')
             return redirect(url_for('admin.projects'))
         except Exception as e:
@@ -301,26 +426,21 @@ def edit_project(id):
             # Handle file uploads
             thumbnail_file = request.files.get('thumbnail')
             if thumbnail_file and thumbnail_file.filename:
-                project.thumbnail = save_file(thumbnail_file, 'projects')
+                project.thumbnail = save_file(thumbnail_file)
 
             # Handle existing screenshots deletion
-            deleted_screenshots = request.form.get('deleted_screenshots', '').split(',')
-            current_screenshots = project.screenshots.split(',') if project.screenshots else []
-            updated_screenshots = [s for s in current_screenshots if s and s not in deleted_screenshots]
+            deleted_screenshots = [s for s in request.form.get('deleted_screenshots', '').split(',') if s]
+            remove_paths(db.session, 'project', project.id, deleted_screenshots)
 
             # Append new screenshots
             screenshot_files = request.files.getlist('screenshots')
             new_screenshots = []
             for f in screenshot_files:
-                path = save_file(f, 'projects/screenshots')
+                path = save_file(f)
                 if path:
                     new_screenshots.append(path)
-            
-            # Combine remaining existing and new screenshots
-            if updated_screenshots or new_screenshots:
-                project.screenshots = ','.join(updated_screenshots + new_screenshots)
-            else:
-                project.screenshots = ''
+            new_screenshots += uploaded_paths('uploaded_screenshots')
+            add_media(db.session, 'project', project.id, new_screenshots)
             
             db.session.commit()
             flash('Project updated successfully!', 'success')
@@ -328,20 +448,22 @@ def edit_project(id):
         except Exception as e:
             flash(f'Error updating project: {str(e)}', 'danger')
             
-    return render_template('admin/edit_project.html', project=project)
+    screenshots = media_paths(db.session, 'project', [project.id])[project.id]
+    return render_template('admin/edit_project.html', project=project, screenshots=screenshots)
 
 @admin_bp.route('/projects/view/<int:id>')
 @login_required
 def view_project(id):
     project = Project.query.get_or_404(id)
-    return render_template('admin/view_project.html', project=project)
+    screenshots = media_paths(db.session, 'project', [project.id])[project.id]
+    return render_template('admin/view_project.html', project=project, screenshots=screenshots)
 
 # --- Events Routes ---
 @admin_bp.route('/events')
 @login_required
 def events():
-    all_events = Event.query.order_by(Event.timestamp.desc()).all()
-    return render_template('admin/events.html', events=all_events)
+    listing = EVENT_LISTING.paginate(request.args)
+    return render_template('admin/events.html', events=listing.items, listing=listing)
 
 @admin_bp.route('/events/add', methods=['GET', 'POST'])
 @login_required
@@ -350,14 +472,6 @@ def add_event():
         try:
             title = request.form.get('title')
             full_desc = request.form.get('full_desc', '')
-            
-            # Auto-generate slug
-            slug = slugify(title)
-            # Ensure unique slug
-            existing = Event.query.filter_by(slug=slug).first()
-            if existing:
-                import random
-                slug = f"{slug}-{random.randint(100, 999)}"
 
             # Auto-generate short description from full description (first 150 chars)
             short_desc = full_desc[:150] + ('...' if len(full_desc) > 150 else '')
@@ -369,18 +483,18 @@ def add_event():
 
             # Handle file uploads
             main_image_file = request.files.get('main_image')
-            main_image_path = save_file(main_image_file, 'events')
+            main_image_path = save_file(main_image_file)
 
             gallery_files = request.files.getlist('gallery')
             gallery_paths = []
             for f in gallery_files:
-                path = save_file(f, 'events/gallery')
+                path = save_file(f)
                 if path:
                     gallery_paths.append(path)
+            gallery_paths += uploaded_paths('uploaded_gallery')
             
             new_event = Event(
                 title=title,
-                slug=slug,
                 category=category,
                 date=request.form.get('date'),
                 time=request.form.get('time'),
@@ -388,11 +502,11 @@ def add_event():
                 organizer=request.form.get('organizer'),
                 short_desc=short_desc,
                 full_desc=full_desc,
-                main_image=main_image_path,
-                gallery=','.join(gallery_paths)
+                main_image=main_image_path
             )
-            db.session.add(new_event)
-            db.session.commit()
+            # Auto-generate a unique slug from the title
+            save_with_slug(new_event, wanted_slug(Event, title=title),
+                           then=lambda e: add_media(db.session, 'event', e.id, gallery_paths))
             flash('Event added successfully!', 'success')
             return redirect(url_for('admin.events'))
         except Exception as e:
@@ -432,19 +546,17 @@ def edit_event(id):
             # Handle images
             main_image_file = request.files.get('main_image')
             if main_image_file and main_image_file.filename:
-                event.main_image = save_file(main_image_file, 'events')
+                event.main_image = save_file(main_image_file)
 
             # Append new gallery images
             gallery_files = request.files.getlist('gallery')
             new_gallery = []
             for f in gallery_files:
-                path = save_file(f, 'events/gallery')
+                path = save_file(f)
                 if path:
                     new_gallery.append(path)
-            
-            if new_gallery:
-                current_gallery = event.gallery.split(',') if event.gallery else []
-                event.gallery = ','.join(current_gallery + new_gallery)
+            new_gallery += uploaded_paths('uploaded_gallery')
+            add_media(db.session, 'event', event.id, new_gallery)
             
             db.session.commit()
             flash('Event updated successfully!', 'success')
@@ -452,10 +564,41 @@ def edit_event(id):
         except Exception as e:
             flash(f'Error updating event: {str(e)}', 'danger')
 
-    return render_template('admin/edit_event.html', event=event)
+    gallery = media_paths(db.session, 'event', [event.id])[event.id]
+    return render_template('admin/edit_event.html', event=event, gallery=gallery)
 
 @admin_bp.route('/events/view/<int:id>')
 @login_required
 def view_event(id):
     event = Event.query.get_or_404(id)
-    return render_template('admin/view_event.html', event=event)
+    gallery = media_paths(db.session, 'event', [event.id])[event.id]
+    return render_template('admin/view_event.html', event=event, gallery=gallery)
+
+# --- Media Routes (JSON, used by the edit pages) ---
+@admin_bp.route('/media/<int:id>/delete', methods=['POST'])
+@login_required
+def delete_media_item(id):
+    media = Media.query.get_or_404(id)
+    try:
+        delete_media(db.session, media)
+        db.session.commit()
+        return jsonify({'message': 'Media deleted'})
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@admin_bp.route('/media/reorder', methods=['POST'])
+@login_required
+def reorder_media_items():
+    """Body: {"ownerType": "project"|"event", "ownerId": 1, "order": [media ids]}"""
+    data = request.get_json(silent=True) or {}
+    try:
+        reorder_media(db.session, data.get('ownerType'), data.get('ownerId'), data.get('order') or [])
+        db.session.commit()
+        return jsonify({'message': 'Media reordered'})
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
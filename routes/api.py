@@ -1,37 +1,113 @@
-from flask import Blueprint, request, jsonify
-import re
-from extensions import db
-from models import ContactQuery, PartnershipRequest, JobApplication, Project, Event, Vacancy
+import hmac
+from functools import wraps
+from flask import Blueprint, request, jsonify, current_app
+from flask_login import current_user
+from itertools import chain, islice
+from extensions import db, response_cache, submission_queue
+from models import Project, Event, Vacancy
+from services.pagination import keyset_page, parse_limit
+from services.slugs import save_with_slug, wanted_slug
+from services.technologies import filter_by_technologies, sync_inserted
+from services.bulk import BulkImporter
+from services.ingest import ValidationError
+from services import images, media, search, storage
+from services.media import OWNERS, add_media, load_media
+from services.serializers import project_serializer, event_serializer, vacancy_serializer, \
+    contact_serializer, partnership_serializer, application_serializer, media_serializer
+from services.versioning import conditional
 
 api_bp = Blueprint('api', __name__)
 
-def slugify(text):
-    if not text: return ""
-    text = text.lower()
-    text = re.sub(r'[^\w\s-]', '', text)
-    text = re.sub(r'[\s_-]+', '-', text).strip('-')
-    return text
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+# Public form submissions go through the write-behind queue (services/ingest.py)
+submission_queue.register('contact', contact_serializer)
+submission_queue.register('partnership', partnership_serializer)
+submission_queue.register('careers', application_serializer)
+
+# Bulk create endpoints (services/bulk.py)
+PROJECT_IMPORTER = BulkImporter(project_serializer, required=['title', 'studentName'],
+                                after_insert=[sync_inserted, media.inserted_hook('project'), search.inserted_hook('project'),
+                                              storage.inserted_hook('project')])
+EVENT_IMPORTER = BulkImporter(event_serializer, required=['title'],
+                              after_insert=[media.inserted_hook('event'), search.inserted_hook('event'), storage.inserted_hook('event')])
+VACANCY_IMPORTER = BulkImporter(vacancy_serializer, required=['title'], after_insert=[search.inserted_hook('vacancy')])
+
+# Fields holding upload paths; responses add their resized variants as `images` (services/images.py)
+PROJECT_IMAGES = ('thumbnail', 'screenshots')
+EVENT_IMAGES = ('mainImage', 'gallery')
+
+def list_response(query, serializer, fields=None, image_fields=()):
+    """jsonify short lists; stream long ones so the full list is never held in memory"""
+    fields = fields or tuple(serializer.fields)
+    threshold = current_app.config['JSON_STREAM_THRESHOLD']
+    rows = iter(query.yield_per(threshold))
+    head = list(islice(rows, threshold))
+    if len(head) < threshold:
+        return jsonify(images.attach_images(db.session, serializer.dump_rows(head, fields), image_fields))
+
+    def chunks():
+        # Media and variants are looked up once per chunk
+        for chunk in chain([head], iter(lambda: list(islice(rows, threshold)), [])):
+            yield from images.attach_images(db.session, serializer.dump_rows(chunk, fields), image_fields)
+    return current_app.json.stream_array(chunks(), threshold)
+
+def submit(kind, data, message):
+    """Queue a form submission: 202 once spooled, 201 when written synchronously"""
+    try:
+        queued = submission_queue.submit(kind, data)
+        return jsonify({'message': message}), 202 if queued else 201
+    except ValidationError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def media_response(owner_type, id_or_slug):
+    """The media of one project/event, looked up by id or slug"""
+    model = OWNERS[owner_type][0]
+    query = db.session.query(model.id)
+    if id_or_slug.isdigit():
+        owner_id = query.filter(model.id == int(id_or_slug)).scalar()
+    else:
+        owner_id = query.filter(model.slug == id_or_slug).scalar()
+    if owner_id is None:
+        return jsonify({'error': f'{model.__name__} not found'}), 404
+    media = load_media(db.session, owner_type, [owner_id])[owner_id]
+    return jsonify([media_serializer.dump(m) for m in media]), 200
+
+def admin_required(view):
+    """Allow logged-in admins and callers sending `Authorization: Bearer <API_TOKEN>`; 401 for anyone else"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        token = current_app.config['API_TOKEN']
+        sent = request.headers.get('Authorization', '')
+        if current_user.is_authenticated or (token and hmac.compare_digest(sent.encode(), f'Bearer {token}'.encode())):
+            return view(*args, **kwargs)
+        return jsonify({'error': 'Authentication required'}), 401
+    return wrapper
+
+def bulk_create(importer, message):
+    """Create every item of a JSON array or none; 400 lists the invalid items"""
+    try:
+        results, errors = importer.create(request.get_json(silent=True))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+    if errors:
+        return jsonify({'error': 'Invalid items, nothing was created', 'errors': errors}), 400
+    return jsonify({'message': message, 'count': len(results), 'results': results}), 201
 
 @api_bp.route('/vacancies', methods=['GET'])
+@conditional(Vacancy)
+@response_cache.cached(Vacancy)
 def get_vacancies():
     """Get all active job vacancies for frontend"""
     try:
-        vacancies = Vacancy.query.filter_by(is_active=True).order_by(Vacancy.timestamp.desc()).all()
-        vacancies_list = []
-        
-        for v in vacancies:
-            vacancies_list.append({
-                'id': v.id,
-                'title': v.title,
-                'slug': v.slug,
-                'location': v.location,
-                'type': v.type,
-                'description': v.description,
-                'requirements': v.requirements.split(',') if v.requirements else [],
-                'timestamp': v.timestamp.isoformat() if v.timestamp else None
-            })
-        
-        return jsonify(vacancies_list), 200
+        rows = vacancy_serializer.query(tuple(vacancy_serializer.fields)) \
+            .filter(Vacancy.is_active == True).order_by(Vacancy.timestamp.desc()).all()
+        return jsonify(vacancy_serializer.dump_rows(rows)), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -44,47 +120,33 @@ def add_vacancy():
 
     try:
         title = data.get('title')
-        # Auto-generate slug if not provided
-        slug = data.get('slug') or slugify(title)
-        
-        # Ensure unique slug
-        if Vacancy.query.filter_by(slug=slug).first():
-            import random
-            slug = f"{slug}-{random.randint(100, 999)}"
-
         new_vacancy = Vacancy(
             title=title,
-            slug=slug,
             location=data.get('location'),
             type=data.get('type'),
             description=data.get('description'),
             requirements=','.join(data.get('requirements', [])) if isinstance(data.get('requirements'), list) else data.get('requirements'),
             is_active=True
         )
-        db.session.add(new_vacancy)
-        db.session.commit()
+        # Auto-generate slug if not provided
+        save_with_slug(new_vacancy, wanted_slug(Vacancy, data.get('slug'), title))
         return jsonify({'message': 'Job vacancy added successfully', 'id': new_vacancy.id}), 201
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@api_bp.route('/vacancies/bulk', methods=['POST'])
+@admin_required
+def add_vacancies_bulk():
+    """Add many vacancies at once from a JSON array (Admin use)"""
+    return bulk_create(VACANCY_IMPORTER, 'Job vacancies added successfully')
+
 @api_bp.route('/contact', methods=['POST'])
 def contact():
     data = request.get_json()
     if not data:
         return jsonify({'error': 'No data provided'}), 400
     
-    try:
-        new_query = ContactQuery(
-            name=data.get('name'),
-            email=data.get('email'),
-            type=data.get('type'),
-            message=data.get('message')
-        )
-        db.session.add(new_query)
-        db.session.commit()
-        return jsonify({'message': 'Contact query submitted successfully'}), 201
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+    return submit('contact', data, 'Contact query submitted successfully')
 
 @api_bp.route('/academy/partnership', methods=['POST'])
 def partnership():
@@ -92,17 +154,7 @@ def partnership():
     if not data:
         return jsonify({'error': 'No data provided'}), 400
 
-    try:
-        new_partnership = PartnershipRequest(
-            college_name=data.get('collegeName'),
-            email=data.get('email'),
-            phone=data.get('phone')
-        )
-        db.session.add(new_partnership)
-        db.session.commit()
-        return jsonify({'message': 'Partnership request submitted successfully'}), 201
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+    return submit('partnership', data, 'Partnership request submitted successfully')
 
 @api_bp.route('/careers/apply', methods=['POST'])
 def careers():
@@ -110,81 +162,73 @@ def careers():
     if not data:
         return jsonify({'error': 'No data provided'}), 400
 
-    try:
-        new_application = JobApplication(
-            job_role=data.get('jobRole'),
-            name=data.get('name'),
-            email=data.get('email'),
-            resume_link=data.get('resumeLink'),
-            cover_letter=data.get('coverLetter')
-        )
-        db.session.add(new_application)
-        db.session.commit()
-        return jsonify({'message': 'Job application submitted successfully'}), 201
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+    return submit('careers', data, 'Job application submitted successfully')
 
 # ============ PROJECTS API ============
 
 @api_bp.route('/projects', methods=['GET'])
+@conditional(Project)
+@response_cache.cached(Project)
 def get_projects():
-    """Get all projects for frontend showcase"""
+    """Get projects for frontend showcase.
+
+    Optional query params:
+        fields  comma-separated subset of fields to return (e.g. id,title,thumbnail)
+        limit   page size; enables cursor pagination (newest first)
+        cursor  value of the X-Next-Cursor header from the previous page
+        tech    comma-separated technologies; only projects using all of them (e.g. python,flask)
+    """
     try:
-        projects = Project.query.order_by(Project.timestamp.desc()).all()
-        projects_list = []
-        
-        for project in projects:
-            projects_list.append({
-                'id': project.id,
-                'title': project.title,
-                'slug': project.slug,
-                'studentName': project.student_name,
-                'college': project.college,
-                'year': project.year,
-                'description': project.description,
-                'fullDescription': project.full_description,
-                'duration': project.duration,
-                'techStack': project.tech_stack.split(',') if project.tech_stack else [],
-                'thumbnail': project.thumbnail,
-                'screenshots': project.screenshots.split(',') if project.screenshots else [],
-                'liveLink': project.live_link,
-                'repoLink': project.repo_link,
-                'timestamp': project.timestamp.isoformat() if project.timestamp else None
-            })
-        
-        return jsonify(projects_list), 200
+        fields = project_serializer.parse_fields(request.args.get('fields'))
+        # id and timestamp are always selected, they make up the page cursor
+        query = project_serializer.query(fields, extra=('id', 'timestamp'))
+        if request.args.get('tech'):
+            query = filter_by_technologies(query, request.args['tech'].split(','))
+
+        next_cursor = None
+        limit = request.args.get('limit')
+        cursor = request.args.get('cursor')
+        if limit or cursor:
+            limit = parse_limit(limit, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE)
+            rows, next_cursor = keyset_page(query, Project, cursor, limit)
+        else:
+            return list_response(query.order_by(Project.timestamp.desc()), project_serializer, fields, PROJECT_IMAGES), 200
+
+        response = jsonify(images.attach_images(db.session, project_serializer.dump_rows(rows, fields), PROJECT_IMAGES))
+        if next_cursor:
+            response.headers['X-Next-Cursor'] = next_cursor
+        return response, 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @api_bp.route('/projects/<id_or_slug>', methods=['GET'])
+@conditional(Project)
+@response_cache.cached(Project)
 def get_project(id_or_slug):
     """Get single project details by ID or Slug"""
     try:
+        query = project_serializer.query(tuple(project_serializer.fields))
         if id_or_slug.isdigit():
-            project = Project.query.get(int(id_or_slug))
+            row = query.filter(Project.id == int(id_or_slug)).first()
         else:
-            project = Project.query.filter_by(slug=id_or_slug).first()
+            row = query.filter(Project.slug == id_or_slug).first()
             
-        if not project:
+        if not row:
             return jsonify({'error': 'Project not found'}), 404
             
-        return jsonify({
-            'id': project.id,
-            'title': project.title,
-            'slug': project.slug,
-            'studentName': project.student_name,
-            'college': project.college,
-            'year': project.year,
-            'description': project.description,
-            'fullDescription': project.full_description,
-            'duration': project.duration,
-            'techStack': project.tech_stack.split(',') if project.tech_stack else [],
-            'thumbnail': project.thumbnail,
-            'screenshots': project.screenshots.split(',') if project.screenshots else [],
-            'liveLink': project.live_link,
-            'repoLink': project.repo_link,
-            'timestamp': project.timestamp.isoformat() if project.timestamp else None
-        }), 200
+        return jsonify(images.attach_images(db.session, [project_serializer.dump_row(row)], PROJECT_IMAGES)[0]), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@api_bp.route('/projects/<id_or_slug>/media', methods=['GET'])
+@conditional(Project)
+@response_cache.cached(Project)
+def get_project_media(id_or_slug):
+    """Screenshots with dimensions and size, for lazy loading"""
+    try:
+        return media_response('project', id_or_slug)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -198,7 +242,6 @@ def add_project():
     try:
         # Convert arrays to comma-separated strings
         tech_stack_str = ','.join(data.get('techStack', []))
-        screenshots_str = ','.join(data.get('screenshots', []))
         
         new_project = Project(
             title=data.get('title'),
@@ -210,73 +253,62 @@ def add_project():
             duration=data.get('duration'),
             tech_stack=tech_stack_str,
             thumbnail=data.get('thumbnail'),
-            screenshots=screenshots_str,
             live_link=data.get('liveLink'),
             repo_link=data.get('repoLink')
         )
         db.session.add(new_project)
+        db.session.flush()
+        add_media(db.session, 'project', new_project.id, data.get('screenshots', []))
         db.session.commit()
         return jsonify({'message': 'Project added successfully', 'id': new_project.id}), 201
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@api_bp.route('/projects/bulk', methods=['POST'])
+@admin_required
+def add_projects_bulk():
+    """Add many projects at once from a JSON array (Admin use)"""
+    return bulk_create(PROJECT_IMPORTER, 'Projects added successfully')
+
 # ============ EVENTS API ============
 
 @api_bp.route('/events', methods=['GET'])
+@conditional(Event)
+@response_cache.cached(Event)
 def get_events():
     """Get all events for frontend"""
     try:
-        events = Event.query.order_by(Event.timestamp.desc()).all()
-        events_list = []
-        
-        for event in events:
-            events_list.append({
-                'id': event.id,
-                'title': event.title,
-                'slug': event.slug,
-                'category': event.category,
-                'date': event.date,
-                'time': event.time,
-                'venue': event.venue,
-                'organizer': event.organizer,
-                'shortDesc': event.short_desc,
-                'fullDesc': event.full_desc,
-                'mainImage': event.main_image,
-                'gallery': event.gallery.split(',') if event.gallery else [],
-                'timestamp': event.timestamp.isoformat() if event.timestamp else None
-            })
-        
-        return jsonify(events_list), 200
+        query = event_serializer.query(tuple(event_serializer.fields)).order_by(Event.timestamp.desc())
+        return list_response(query, event_serializer, image_fields=EVENT_IMAGES), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @api_bp.route('/events/<id_or_slug>', methods=['GET'])
+@conditional(Event)
+@response_cache.cached(Event)
 def get_event(id_or_slug):
     """Get single event details by ID or Slug"""
     try:
+        query = event_serializer.query(tuple(event_serializer.fields))
         if id_or_slug.isdigit():
-            event = Event.query.get(int(id_or_slug))
+            row = query.filter(Event.id == int(id_or_slug)).first()
         else:
-            event = Event.query.filter_by(slug=id_or_slug).first()
+            row = query.filter(Event.slug == id_or_slug).first()
             
-        if not event:
+        if not row:
             return jsonify({'error': 'Event not found'}), 404
             
-        return jsonify({
-            'id': event.id,
-            'title': event.title,
-            'slug': event.slug,
-            'category': event.category,
-            'date': event.date,
-            'time': event.time,
-            'venue': event.venue,
-            'organizer': event.organizer,
-            'shortDesc': event.short_desc,
-            'fullDesc': event.full_desc,
-            'mainImage': event.main_image,
-            'gallery': event.gallery.split(',') if event.gallery else [],
-            'timestamp': event.timestamp.isoformat() if event.timestamp else None
-        }), 200
+        return jsonify(images.attach_images(db.session, [event_serializer.dump_row(row)], EVENT_IMAGES)[0]), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@api_bp.route('/events/<id_or_slug>/media', methods=['GET'])
+@conditional(Event)
+@response_cache.cached(Event)
+def get_event_media(id_or_slug):
+    """Gallery images with dimensions and size, for lazy loading"""
+    try:
+        return media_response('event', id_or_slug)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -288,9 +320,6 @@ def add_event():
         return jsonify({'error': 'No data provided'}), 400
 
     try:
-        # Convert gallery array to comma-separated string
-        gallery_str = ','.join(data.get('gallery', []))
-        
         new_event = Event(
             title=data.get('title'),
             category=data.get('category'),
@@ -300,11 +329,76 @@ def add_event():
             organizer=data.get('organizer'),
             short_desc=data.get('shortDesc'),
             full_desc=data.get('fullDesc'),
-            main_image=data.get('mainImage'),
-            gallery=gallery_str
+            main_image=data.get('mainImage')
         )
         db.session.add(new_event)
+        db.session.flush()
+        add_media(db.session, 'event', new_event.id, data.get('gallery', []))
         db.session.commit()
         return jsonify({'message': 'Event added successfully', 'id': new_event.id}), 201
     except Exception as e:
         return jsonify({'error': str(e)}), 500
+
+@api_bp.route('/events/bulk', methods=['POST'])
+@admin_required
+def add_events_bulk():
+    """Add many events at once from a JSON array (Admin use)"""
+    return bulk_create(EVENT_IMPORTER, 'Events added successfully')
+
+# ============ SEARCH API ============
+
+@api_bp.route('/search', methods=['GET'])
+@conditional(Project, Event, Vacancy)
+@response_cache.cached(Project, Event, Vacancy)
+def search_content():
+    """Full-text search over projects, events and active vacancies.
+
+    Query params:
+        q       search words (the last one also matches as a prefix)
+        type    comma-separated subset of project,event,vacancy
+        limit   max results (default 20, max 100)
+        offset  results to skip
+    """
+    q = request.args.get('q', '').strip()
+    if not q:
+        return jsonify({'error': 'Query parameter q is required'}), 400
+    kinds = [k for k in request.args.get('type', '').split(',') if k]
+    unknown = [k for k in kinds if k not in search.KINDS]
+    if unknown:
+        return jsonify({'error': f"Unknown types: {', '.join(unknown)}"}), 400
+    try:
+        limit = parse_limit(request.args.get('limit'), DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE)
+        offset = max(0, int(request.args.get('offset', 0)))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    try:
+        results = search.search(db.session, q, kinds, limit, offset)
+        return jsonify({'query': q, 'results': results}), 200
+    except search.SearchUnavailable as e:
+        return jsonify({'error': str(e)}), 501
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+# ============ MEDIA API ============
+
+@api_bp.route('/media', methods=['GET'])
+@conditional(Project, Event)
+@response_cache.cached(Project, Event)
+def get_media():
+    """Media of many owners in one request: ?owner=project|event&ids=1,2,3"""
+    owner_type = request.args.get('owner')
+    if owner_type not in OWNERS:
+        return jsonify({'error': f"owner must be one of: {', '.join(OWNERS)}"}), 400
+    try:
+        ids = [int(i) for i in request.args.get('ids', '').split(',') if i.strip()]
+    except ValueError:
+        return jsonify({'error': 'ids must be comma-separated integers'}), 400
+    if len(ids) > MAX_PAGE_SIZE:
+        return jsonify({'error': f'At most {MAX_PAGE_SIZE} ids per request'}), 400
+
+    try:
+        media = load_media(db.session, owner_type, ids)
+        return jsonify({str(owner_id): [media_serializer.dump(m) for m in items] for owner_id, items in media.items()}), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
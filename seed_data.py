@@ -1,11 +1,14 @@
+import os
 import requests
 import json
 import random
 
 BASE_URL = "http://192.168.1.73:5000/api"
+# The bulk endpoints need the server's API_TOKEN
+AUTH = {"Authorization": f"Bearer {os.environ.get('API_TOKEN', '')}"}
 
 def print_response(response, name):
-    if response.status_code == 201:
+    if response.status_code in (201, 202):
         print(f"[SUCCESS] {name} created.")
     else:
         print(f"[ERROR] Failed to create {name}. Status: {response.status_code}, Body: {response.text}")
@@ -78,3 +81,78 @@ print("\n--- Seeding Job Applications ---")
 for data in jobs:
     response = requests.post(f"{BASE_URL}/careers/apply", json=data)
     print_response(response, f"Job App ({data['name']})")
+
+
+def print_bulk_response(response, name):
+    if response.status_code == 201:
+        print(f"[SUCCESS] {response.json()['count']} {name} created.")
+    else:
+        print(f"[ERROR] Failed to create {name}. Status: {response.status_code}, Body: {response.text}")
+
+# 4. Vacancies, Projects and Events (one bulk request each)
+vacancies = [
+    {
+        "title": "Python Developer Intern",
+        "location": "Nagpur",
+        "type": "Internship",
+        "description": "Work on Flask APIs and admin tooling.",
+        "requirements": ["Python", "Flask", "SQL"]
+    },
+    {
+        "title": "Frontend Developer",
+        "location": "Remote",
+        "type": "Full-time",
+        "description": "Build the public website and showcase pages.",
+        "requirements": ["React", "CSS", "REST APIs"]
+    }
+]
+
+print("\n--- Seeding Vacancies ---")
+response = requests.post(f"{BASE_URL}/vacancies/bulk", json=vacancies, headers=AUTH)
+print_bulk_response(response, "vacancies")
+
+projects = [
+    {
+        "title": f"Showcase Project {i}",
+        "studentName": random.choice(["Aarav Mehta", "Sneha Iyer", "Rohan Das", "Kavya Nair"]),
+        "college": random.choice(["RCOEM Nagpur", "VNIT Nagpur", "IIT Bombay"]),
+        "year": random.choice(["2nd Year", "3rd Year", "Final Year"]),
+        "description": "A student project built during the academy program.",
+        "duration": "3 months",
+        "techStack": random.sample(["Python", "Flask", "React", "TensorFlow", "PostgreSQL"], 3),
+        "screenshots": [],
+        "repoLink": "https://github.com/example/project"
+    }
+    for i in range(1, 21)
+]
+
+print("\n--- Seeding Projects ---")
+response = requests.post(f"{BASE_URL}/projects/bulk", json=projects, headers=AUTH)
+print_bulk_response(response, "projects")
+
+events = [
+    {
+        "title": "AI Workshop",
+        "category": "Workshop",
+        "date": "2025-02-15",
+        "time": "10:00 AM",
+        "venue": "Main Auditorium",
+        "organizer": "AI Labs",
+        "shortDesc": "Hands-on introduction to machine learning.",
+        "gallery": []
+    },
+    {
+        "title": "Hackathon 2025",
+        "category": "Competition",
+        "date": "2025-03-08",
+        "time": "09:00 AM",
+        "venue": "Innovation Hub",
+        "organizer": "AI Labs",
+        "shortDesc": "24 hour hackathon for college teams.",
+        "gallery": []
+    }
+]
+
+print("\n--- Seeding Events ---")
+response = requests.post(f"{BASE_URL}/events/bulk", json=events, headers=AUTH)
+print_bulk_response(response, "events")
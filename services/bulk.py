@@ -0,0 +1,95 @@
+"""Bulk creation of projects, events and vacancies from JSON arrays.
+
+All items are validated before anything is written; if one is invalid the
+whole batch is rejected with an error per item. Valid batches get their
+slugs allocated together (services/slugs.py) and are inserted with a single executemany INSERT
+... RETURNING in one transaction, so an import of thousands of items costs a
+handful of statements instead of a commit per item. Media fields are not
+columns: their path lists stay in the row dicts handed to the after_insert
+hooks, where services/media.py turns them into media rows.
+"""
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from extensions import db
+from services.serializers import MediaField, split_csv
+from services.slugs import MAX_ATTEMPTS, allocate_batch, wanted_slug
+
+MAX_BULK_ITEMS = 5000
+
+
+class BulkImporter:
+    def __init__(self, serializer, required, exclude=('id', 'timestamp'), after_insert=()):
+        self.model = serializer.model
+        # Each is called as hook(connection, {id: row}) inside the insert transaction
+        self.after_insert = after_insert
+        self.columns = {name: f.column for name, f in serializer.fields.items()
+                        if name not in exclude and not isinstance(f, MediaField)}
+        self.media_fields = [name for name, f in serializer.fields.items() if isinstance(f, MediaField)]
+        # Fields exposed as arrays are stored comma-separated
+        self.list_fields = {name for name, f in serializer.fields.items() if f.convert is split_csv}
+        self.required = required
+
+    def validate(self, item):
+        """Return (row, None) for a valid item or (None, error)"""
+        if not isinstance(item, dict):
+            return None, 'Expected a JSON object'
+        missing = [name for name in self.required if not item.get(name)]
+        if missing:
+            return None, f"Missing required fields: {', '.join(missing)}"
+        row = {}
+        for name, column in self.columns.items():
+            value = item.get(name)
+            if name in self.list_fields and isinstance(value, list):
+                if not all(isinstance(v, str) for v in value):
+                    return None, f"Field {name} must be a list of strings"
+                value = ','.join(value)
+            elif value is not None and not isinstance(value, str):
+                return None, f"Field {name} must be a string"
+            row[column] = value
+        for name in self.media_fields:
+            value = item.get(name)
+            if isinstance(value, str):
+                value = value.split(',')
+            if value is not None and not (isinstance(value, list) and all(isinstance(v, str) for v in value)):
+                return None, f"Field {name} must be a list of strings"
+            row[name] = [v for v in value or () if v]
+        return row, None
+
+    def create(self, items):
+        """Insert `items`; returns (results, errors) with one entry per item for whichever applies"""
+        if not isinstance(items, list) or not items:
+            raise ValueError('Expected a non-empty JSON array')
+        if len(items) > MAX_BULK_ITEMS:
+            raise ValueError(f'At most {MAX_BULK_ITEMS} items per request')
+
+        rows, errors = [], []
+        for index, item in enumerate(items):
+            row, error = self.validate(item)
+            if error:
+                errors.append({'index': index, 'error': error})
+            rows.append(row)
+        if errors:
+            return None, errors
+
+        wanted = [wanted_slug(self.model, row['slug'], row['title']) for row in rows]
+        for attempt in range(MAX_ATTEMPTS):
+            for row, slug in zip(rows, allocate_batch(self.model, wanted)):
+                row['slug'] = slug
+            try:
+                created = db.session.execute(
+                    insert(self.model).returning(self.model.id, self.model.slug, sort_by_parameter_order=True),
+                    [{c: v for c, v in row.items() if c not in self.media_fields} for row in rows]).all()
+                rows_by_id = {id: row for (id, _), row in zip(created, rows)}
+                for hook in self.after_insert:
+                    hook(db.session.connection(), rows_by_id)
+                db.session.commit()
+                break
+            except IntegrityError:
+                # A concurrent writer took one of the slugs; allocate the batch again
+                db.session.rollback()
+                if attempt == MAX_ATTEMPTS - 1:
+                    raise
+            except Exception:
+                db.session.rollback()
+                raise
+        return [{'index': index, 'id': id, 'slug': slug} for index, (id, slug) in enumerate(created)], None
@@ -0,0 +1,171 @@
+"""Response cache for the public read endpoints.
+
+Cached bodies live in a per-process LRU. Every entry remembers the version
+of each table it was built from; a commit that writes to one of those tables
+bumps the version (see services.changes), which makes the entry stale. The
+versions are kept by a pluggable backend: MemoryBackend only sees writes made
+by the same process, SQLiteBackend shares them through a small SQLite file so
+a write in one gunicorn worker invalidates the entries held by all workers.
+"""
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from flask import current_app, make_response, request
+from services.changes import on_commit
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryBackend:
+    """Table versions held in this process only"""
+
+    def __init__(self):
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def get_versions(self, tables):
+        return tuple(self._versions.get(t, 0) for t in tables)
+
+    def bump(self, tables):
+        with self._lock:
+            for t in tables:
+                self._versions[t] = self._versions.get(t, 0) + 1
+
+
+class SQLiteBackend:
+    """Table versions shared between processes through a SQLite file"""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('CREATE TABLE IF NOT EXISTS cache_version (tag TEXT PRIMARY KEY, version INTEGER NOT NULL)')
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            self._local.conn = conn
+        return conn
+
+    def get_versions(self, tables):
+        rows = self._connect().execute(
+            f"SELECT tag, version FROM cache_version WHERE tag IN ({','.join('?' * len(tables))})",
+            tuple(tables)
+        ).fetchall()
+        versions = dict(rows)
+        return tuple(versions.get(t, 0) for t in tables)
+
+    def bump(self, tables):
+        with self._connect() as conn:
+            conn.executemany(
+                'INSERT INTO cache_version (tag, version) VALUES (?, 1) '
+                'ON CONFLICT(tag) DO UPDATE SET version = version + 1',
+                [(t,) for t in tables]
+            )
+
+
+class ResponseCache:
+    def __init__(self, app=None):
+        self.backend = MemoryBackend()
+        self.max_size = 256
+        self.ttl = 60
+        self.enabled = True
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._listening = False
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('RESPONSE_CACHE_ENABLED', os.environ.get('RESPONSE_CACHE_ENABLED', 'true').lower() == 'true')
+        app.config.setdefault('RESPONSE_CACHE_SIZE', int(os.environ.get('RESPONSE_CACHE_SIZE', 256)))
+        app.config.setdefault('RESPONSE_CACHE_TTL', int(os.environ.get('RESPONSE_CACHE_TTL', 60)))
+        app.config.setdefault('RESPONSE_CACHE_BACKEND', os.environ.get('RESPONSE_CACHE_BACKEND', 'memory'))
+        app.config.setdefault('RESPONSE_CACHE_PATH', os.environ.get(
+            'RESPONSE_CACHE_PATH', os.path.join(app.instance_path, 'response_cache.db')))
+
+        self.enabled = app.config['RESPONSE_CACHE_ENABLED']
+        self.max_size = app.config['RESPONSE_CACHE_SIZE']
+        self.ttl = app.config['RESPONSE_CACHE_TTL']
+        backend = app.config['RESPONSE_CACHE_BACKEND']
+        if backend == 'sqlite':
+            self.backend = SQLiteBackend(app.config['RESPONSE_CACHE_PATH'])
+        elif backend == 'memory':
+            self.backend = MemoryBackend()
+        else:
+            raise ValueError(f"Unknown RESPONSE_CACHE_BACKEND: {backend}")
+
+        if not self._listening:
+            on_commit(self.invalidate)
+            self._listening = True
+        app.extensions['response_cache'] = self
+
+    def invalidate(self, tables):
+        """Bump the version of every table in `tables`; dependent entries go stale"""
+        try:
+            self.backend.bump(sorted(tables))
+        except sqlite3.Error:
+            logger.exception('Could not invalidate response cache for %s', ', '.join(sorted(tables)))
+            self.clear()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _get(self, key, versions):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] != versions or (self.ttl and time.monotonic() - entry[1] > self.ttl):
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[2]
+
+    def _set(self, key, versions, value):
+        with self._lock:
+            self._entries[key] = (versions, time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def cached(self, *models):
+        """Cache successful GET responses of a view until one of `models` changes"""
+        tables = tuple(sorted(m.__tablename__ for m in models))
+
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                if not self.enabled or request.method != 'GET':
+                    return view(*args, **kwargs)
+
+                key = (request.path, tuple(sorted(request.args.items(multi=True))))
+                try:
+                    versions = self.backend.get_versions(tables)
+                except sqlite3.Error:
+                    logger.exception('Response cache backend unavailable')
+                    return view(*args, **kwargs)
+
+                hit = self._get(key, versions)
+                if hit is not None:
+                    body, status, headers = hit
+                    response = current_app.response_class(body, status=status, headers=headers)
+                    response.headers['X-Cache'] = 'HIT'
+                    return response
+
+                response = make_response(view(*args, **kwargs))
+                if response.status_code == 200 and not response.is_streamed:
+                    headers = [(k, v) for k, v in response.headers if k != 'Content-Length']
+                    self._set(key, versions, (response.get_data(), response.status_code, headers))
+                response.headers['X-Cache'] = 'MISS'
+                return response
+            return wrapper
+        return decorator
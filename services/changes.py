@@ -0,0 +1,73 @@
+"""Track which tables a session transaction wrote to.
+
+Listeners registered with on_commit(fn) are called with the set of table
+names once a transaction that touched them has committed. Listeners
+registered with before_commit(fn) get (session, tables) while the
+transaction is still open, so they can write in the same transaction.
+This covers unit-of-work flushes as well as ORM-enabled insert/update/delete
+statements; code that bypasses both (e.g. bulk_insert_mappings) should call
+mark_changed() itself.
+"""
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+_commit_listeners = []
+_before_commit_listeners = []
+
+
+def on_commit(fn):
+    _commit_listeners.append(fn)
+    return fn
+
+
+def before_commit(fn):
+    _before_commit_listeners.append(fn)
+    return fn
+
+
+def mark_changed(session, *tables):
+    session.info.setdefault('changed_tables', set()).update(tables)
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_flushed(session, flush_context):
+    tables = {
+        obj.__table__.name
+        for obj in list(session.new) + list(session.dirty) + list(session.deleted)
+        if hasattr(obj, '__table__')
+    }
+    if tables:
+        mark_changed(session, *tables)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _collect_executed(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        mapper = orm_execute_state.bind_mapper
+        if mapper is not None:
+            mark_changed(orm_execute_state.session, mapper.persist_selectable.name)
+
+
+@event.listens_for(Session, 'before_commit')
+def _prepare_commit(session):
+    if not _before_commit_listeners:
+        return
+    # Flush first so writes pending at commit time are collected too
+    session.flush()
+    tables = session.info.get('changed_tables')
+    if tables:
+        for fn in _before_commit_listeners:
+            fn(session, tables)
+
+
+@event.listens_for(Session, 'after_commit')
+def _notify_commit(session):
+    tables = session.info.pop('changed_tables', None)
+    if tables:
+        for fn in _commit_listeners:
+            fn(tables)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_changes(session):
+    session.info.pop('changed_tables', None)
@@ -0,0 +1,174 @@
+"""gzip / brotli compression of dynamic responses.
+
+An after_request hook compresses text-like responses (JSON, HTML, CSS, JS,
+CSV, NDJSON, SVG) for clients that accept it, preferring brotli when the
+brotli package is installed. It leaves alone:
+
+* bodies below COMPRESS_MIN_SIZE bytes, where headers outweigh the savings
+* everything else, images in particular, which are compressed already
+* responses that already have a Content-Encoding (precompressed static
+  files) and file responses sent with direct passthrough
+* partial content, HEAD requests and `Cache-Control: no-transform`
+
+Streamed responses are compressed chunk by chunk, flushing at least every
+STREAM_FLUSH_BYTES of input so clients keep receiving data as it is
+produced.
+
+Compressed bodies of responses with an ETag are kept in a per-worker LRU
+cache (COMPRESS_CACHE_BYTES in total) keyed by ETag and encoding. The ETags
+of the content API change whenever the underlying tables do, so a hit can
+be sent as is; for a streamed list a hit also skips serializing it again.
+Compressed responses get a weak ETag, as the body is no longer the bytes
+the strong one described.
+"""
+import gzip
+import os
+import threading
+import zlib
+from collections import OrderedDict
+from flask import request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE = {
+    'application/json', 'application/javascript', 'application/x-ndjson', 'application/xml',
+    'image/svg+xml', 'text/css', 'text/csv', 'text/html', 'text/javascript', 'text/plain', 'text/xml',
+}
+STREAM_FLUSH_BYTES = 64 * 1024
+
+
+class Compression:
+    def __init__(self, app=None):
+        self.enabled = True
+        self._cache = OrderedDict()
+        self._cache_bytes = 0
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('COMPRESS_ENABLED', os.environ.get('COMPRESS_ENABLED', 'true').lower() == 'true')
+        app.config.setdefault('COMPRESS_MIN_SIZE', int(os.environ.get('COMPRESS_MIN_SIZE', 1024)))
+        app.config.setdefault('COMPRESS_GZIP_LEVEL', int(os.environ.get('COMPRESS_GZIP_LEVEL', 6)))
+        app.config.setdefault('COMPRESS_BROTLI_QUALITY', int(os.environ.get('COMPRESS_BROTLI_QUALITY', 5)))
+        app.config.setdefault('COMPRESS_CACHE_BYTES', int(os.environ.get('COMPRESS_CACHE_BYTES', 16 * 1024 * 1024)))
+
+        self.enabled = app.config['COMPRESS_ENABLED']
+        self.min_size = app.config['COMPRESS_MIN_SIZE']
+        self.gzip_level = app.config['COMPRESS_GZIP_LEVEL']
+        self.brotli_quality = app.config['COMPRESS_BROTLI_QUALITY']
+        self.cache_bytes = app.config['COMPRESS_CACHE_BYTES']
+        if self.enabled:
+            app.after_request(self.compress_response)
+        app.extensions['compression'] = self
+
+    def encoding(self):
+        """The best encoding the client accepts, None for identity"""
+        accepted = request.accept_encodings
+        options = (['br'] if brotli is not None else []) + ['gzip']
+        best = max(options, key=lambda e: accepted[e])  # ties go to the first, brotli
+        return best if accepted[best] else None
+
+    def compress(self, data, encoding):
+        if encoding == 'br':
+            return brotli.compress(data, quality=self.brotli_quality)
+        return gzip.compress(data, compresslevel=self.gzip_level, mtime=0)
+
+    def _compressor(self, encoding):
+        # (compress, flush, finish) for incremental compression
+        if encoding == 'br':
+            c = brotli.Compressor(quality=self.brotli_quality)
+            return c.process, c.flush, c.finish
+        z = zlib.compressobj(self.gzip_level, zlib.DEFLATED, 31)  # wbits 31: gzip container
+        return z.compress, lambda: z.flush(zlib.Z_SYNC_FLUSH), z.flush
+
+    def compress_response(self, response):
+        if response.mimetype not in COMPRESSIBLE:
+            return response
+        response.vary.add('Accept-Encoding')
+        if (response.status_code < 200 or response.status_code in (204, 206, 304)
+                or request.method == 'HEAD'
+                or 'Content-Encoding' in response.headers
+                or response.direct_passthrough
+                or 'no-transform' in response.headers.get('Cache-Control', '')):
+            return response
+        encoding = self.encoding()
+        if encoding is None:
+            return response
+
+        etag, weak = response.get_etag()
+        key = (etag, encoding) if etag else None
+        cached = self._get(key) if key else None
+        if cached is not None:
+            if response.is_streamed and hasattr(response.response, 'close'):
+                response.response.close()  # the body is not needed
+            response.set_data(cached)
+        elif response.is_streamed:
+            response.response = self._stream(response.response, encoding, key)
+            response.headers.pop('Content-Length', None)
+        else:
+            data = response.get_data()
+            if len(data) < self.min_size:
+                return response
+            body = self.compress(data, encoding)
+            if len(body) >= len(data):
+                return response
+            if key:
+                self._set(key, body)
+            response.set_data(body)
+
+        response.headers['Content-Encoding'] = encoding
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
+
+    def _stream(self, chunks, encoding, key):
+        compress, flush, finish = self._compressor(encoding)
+        kept = [] if key else None
+        kept_size = pending = 0
+        try:
+            for chunk in chunks:
+                if isinstance(chunk, str):
+                    chunk = chunk.encode()
+                out = compress(chunk)
+                pending += len(chunk)
+                if pending >= STREAM_FLUSH_BYTES:
+                    out += flush()
+                    pending = 0
+                if out:
+                    if kept is not None:
+                        kept.append(out)
+                        kept_size += len(out)
+                        if kept_size > self.cache_bytes // 4:
+                            kept = None  # too big to be worth caching
+                    yield out
+            out = finish()
+            if kept is not None:
+                self._set(key, b''.join(kept) + out)
+            yield out
+        finally:
+            if hasattr(chunks, 'close'):
+                chunks.close()
+
+    def _get(self, key):
+        with self._lock:
+            body = self._cache.get(key)
+            if body is not None:
+                self._cache.move_to_end(key)
+            return body
+
+    def _set(self, key, body):
+        if len(body) > self.cache_bytes // 4:
+            return
+        with self._lock:
+            old = self._cache.pop(key, None)
+            if old is not None:
+                self._cache_bytes -= len(old)
+            self._cache[key] = body
+            self._cache_bytes += len(body)
+            while self._cache_bytes > self.cache_bytes:
+                _, evicted = self._cache.popitem(last=False)
+                self._cache_bytes -= len(evicted)
@@ -0,0 +1,108 @@
+"""Data for the admin dashboard, computed with aggregates only.
+
+Totals are plain COUNT queries and the recent lists are LIMIT queries. Daily
+submission counts per type are kept in a per-process snapshot that is
+refreshed incrementally: only rows with an id above the last one seen are
+grouped and added. The snapshot is rebuilt from scratch only when the number
+of rows up to that id has dropped, i.e. rows were deleted; rows inserted
+meanwhile have higher ids and do not affect that count.
+"""
+import threading
+import time
+from datetime import date, datetime, timedelta
+from sqlalchemy import func
+from extensions import db
+from models import ContactQuery, PartnershipRequest, JobApplication, Project, Event
+
+SUBMISSION_MODELS = {
+    'contacts': ContactQuery,
+    'partnerships': PartnershipRequest,
+    'applications': JobApplication
+}
+
+SNAPSHOT_TTL = 60  # seconds between incremental refreshes
+
+
+def get_counts():
+    counts = {name: db.session.query(func.count(model.id)).scalar() for name, model in SUBMISSION_MODELS.items()}
+    counts['projects'] = db.session.query(func.count(Project.id)).scalar()
+    counts['events'] = db.session.query(func.count(Event.id)).scalar()
+    return counts
+
+
+def get_recent(model, limit=5):
+    return model.query.order_by(model.timestamp.desc()).limit(limit).all()
+
+
+class StatsSnapshot:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._refreshed_at = None
+        self._state = {name: self._empty() for name in SUBMISSION_MODELS}
+
+    @staticmethod
+    def _empty():
+        return {'last_id': 0, 'total': 0, 'per_day': {}}
+
+    def _add_rows_after(self, model, state):
+        rows = db.session.query(func.date(model.timestamp), func.count(model.id), func.max(model.id)) \
+            .filter(model.id > state['last_id']).group_by(func.date(model.timestamp)).all()
+        for day, count, max_id in rows:
+            if day is not None:
+                day = str(day)
+                state['per_day'][day] = state['per_day'].get(day, 0) + count
+            state['total'] += count
+            state['last_id'] = max(state['last_id'], max_id)
+
+    def refresh(self):
+        """Bring the snapshot up to date"""
+        with self._lock:
+            if self._refreshed_at and time.monotonic() - self._refreshed_at < SNAPSHOT_TTL:
+                return
+            for name, model in SUBMISSION_MODELS.items():
+                state = self._state[name]
+                seen = db.session.query(func.count(model.id)).filter(model.id <= state['last_id']).scalar()
+                if seen != state['total']:
+                    # Rows were deleted since the last refresh
+                    state = self._state[name] = self._empty()
+                self._add_rows_after(model, state)
+            self._refreshed_at = time.monotonic()
+
+    def summary(self, days=30, weeks=12):
+        """Daily counts for the last `days` days and ISO-week counts for the last `weeks` weeks, per type"""
+        today = datetime.utcnow().date()
+        day_labels = [(today - timedelta(days=n)).isoformat() for n in range(days - 1, -1, -1)]
+        week_starts = [today - timedelta(days=today.weekday(), weeks=n) for n in range(weeks - 1, -1, -1)]
+
+        with self._lock:
+            per_day = {name: dict(state['per_day']) for name, state in self._state.items()}
+
+        per_week = {}
+        for name, counts in per_day.items():
+            weekly = dict.fromkeys((d.isoformat() for d in week_starts), 0)
+            for day, count in counts.items():
+                d = date.fromisoformat(day)
+                key = (d - timedelta(days=d.weekday())).isoformat()
+                if key in weekly:
+                    weekly[key] += count
+            per_week[name] = weekly
+
+        return {
+            'days': day_labels,
+            'daily': {name: [counts.get(d, 0) for d in day_labels] for name, counts in per_day.items()},
+            'weeks': [d.isoformat() for d in week_starts],
+            'weekly': {name: list(weekly.values()) for name, weekly in per_week.items()}
+        }
+
+
+stats_snapshot = StatsSnapshot()
+
+
+def get_dashboard_data():
+    counts = get_counts()
+    stats_snapshot.refresh()
+    return {
+        'counts': counts,
+        'recent_contacts': get_recent(ContactQuery),
+        'stats': stats_snapshot.summary()
+    }
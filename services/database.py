@@ -0,0 +1,163 @@
+"""Engine configuration and tuning applied when the app is created.
+
+SQLALCHEMY_ENGINE_OPTIONS is built from the environment by engine_options().
+Every gunicorn worker is a separate process with its own pool, so the pool
+is sized for one worker (one connection per thread, plus overflow) and capped
+so that WEB_CONCURRENCY workers together stay under DB_MAX_CONNECTIONS. On
+PostgreSQL each connection also gets a statement_timeout.
+
+For SQLite every new DBAPI connection gets the pragmas of the tuning profile:
+WAL lets readers proceed while a writer commits, busy_timeout makes writers
+queue for the lock instead of failing with "database is locked", and
+synchronous/mmap/cache trade durability-on-power-loss and memory for speed.
+Each setting can be overridden with the environment variable of the same name.
+"""
+import os
+import threading
+import weakref
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import NullPool, QueuePool
+
+SQLITE_PROFILE = {
+    'SQLITE_JOURNAL_MODE': 'WAL',
+    'SQLITE_SYNCHRONOUS': 'NORMAL',
+    'SQLITE_BUSY_TIMEOUT': '5000',      # ms
+    'SQLITE_MMAP_SIZE': '268435456',    # bytes (256MB)
+    'SQLITE_CACHE_SIZE': '-20000',      # negative = KiB (20MB) per connection
+}
+
+POOL_CLASSES = {'queue': QueuePool, 'null': NullPool}
+
+
+def _env_int(env, key, default):
+    value = env.get(key)
+    return int(value) if value not in (None, '') else default
+
+
+def pool_sizing(env):
+    """(pool_size, max_overflow) for one worker process"""
+    workers = max(1, _env_int(env, 'WEB_CONCURRENCY', 1))
+    threads = max(1, _env_int(env, 'WEB_THREADS', 1))
+    # Connections one worker may open without the fleet exceeding the server limit
+    budget = max(1, _env_int(env, 'DB_MAX_CONNECTIONS', 100) // workers)
+    pool_size = min(_env_int(env, 'DB_POOL_SIZE', threads), budget)
+    max_overflow = min(_env_int(env, 'DB_MAX_OVERFLOW', pool_size), budget - pool_size)
+    return pool_size, max_overflow
+
+
+def engine_options(uri, env=os.environ):
+    """SQLALCHEMY_ENGINE_OPTIONS for `uri`, read from `env`.
+
+    Pool settings apply to PostgreSQL (and any other server database). SQLite
+    keeps its driver defaults unless DB_POOL_CLASS is set, which makes it a
+    local stand-in for exercising the pool configuration.
+    """
+    url = make_url(uri)
+    backend = url.get_backend_name()
+    pool_class = env.get('DB_POOL_CLASS', '').lower()
+    if pool_class and pool_class not in POOL_CLASSES:
+        raise ValueError(f"DB_POOL_CLASS must be one of: {', '.join(POOL_CLASSES)}")
+
+    options = {}
+    if backend != 'sqlite' or pool_class:
+        if pool_class:
+            options['poolclass'] = POOL_CLASSES[pool_class]
+        if pool_class != 'null':
+            options['pool_size'], options['max_overflow'] = pool_sizing(env)
+            options['pool_timeout'] = _env_int(env, 'DB_POOL_TIMEOUT', 30)
+            options['pool_recycle'] = _env_int(env, 'DB_POOL_RECYCLE', 1800)
+        options['pool_pre_ping'] = env.get('DB_POOL_PRE_PING', 'true').lower() == 'true'
+
+    if backend == 'postgresql':
+        timeout = _env_int(env, 'DB_STATEMENT_TIMEOUT', 30000)
+        if timeout:
+            # Passed as a libpq startup option, so it needs no extra round trip
+            options['connect_args'] = {'options': f'-c statement_timeout={timeout}'}
+    return options
+
+
+def load_config(app):
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', engine_options(app.config['SQLALCHEMY_DATABASE_URI']))
+    app.config.setdefault('SQLITE_TUNING', os.environ.get('SQLITE_TUNING', 'true').lower() == 'true')
+    for key, default in SQLITE_PROFILE.items():
+        app.config.setdefault(key, os.environ.get(key, default))
+
+
+def sqlite_pragmas(config):
+    return [
+        f"PRAGMA journal_mode={config['SQLITE_JOURNAL_MODE']}",
+        f"PRAGMA synchronous={config['SQLITE_SYNCHRONOUS']}",
+        f"PRAGMA busy_timeout={int(config['SQLITE_BUSY_TIMEOUT'])}",
+        f"PRAGMA mmap_size={int(config['SQLITE_MMAP_SIZE'])}",
+        f"PRAGMA cache_size={int(config['SQLITE_CACHE_SIZE'])}",
+    ]
+
+
+class PoolCounters:
+    """Counts of the pool events of one engine in this process, fed by listeners from watch_pool()"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.counts = {'connects': 0, 'checkouts': 0, 'checkins': 0, 'invalidations': 0}
+
+    def incr(self, name):
+        with self._lock:
+            self.counts[name] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.counts)
+
+
+# Counters of every watched engine or pool, so each is watched once however often it is passed in
+_watched = weakref.WeakKeyDictionary()
+
+
+def watch_pool(pool_or_engine):
+    """The PoolCounters of `pool_or_engine`, created and attached on the first call"""
+    counters = _watched.get(pool_or_engine)
+    if counters is None:
+        counters = _watched[pool_or_engine] = PoolCounters()
+        event.listen(pool_or_engine, 'connect', lambda *args: counters.incr('connects'))
+        event.listen(pool_or_engine, 'checkout', lambda *args: counters.incr('checkouts'))
+        event.listen(pool_or_engine, 'checkin', lambda *args: counters.incr('checkins'))
+        event.listen(pool_or_engine, 'invalidate', lambda *args: counters.incr('invalidations'))
+    return counters
+
+
+def pool_status(pool, counters=None):
+    """Current occupancy of `pool` plus the event counters.
+
+    Only the QueuePool interface (size/checkedin/checkedout/overflow) is
+    used, and pools without it (NullPool, StaticPool) report None, so any
+    object with those methods can stand in for a real pool.
+    """
+    status = {'pool': type(pool).__name__, 'pid': os.getpid()}
+    for name in ('size', 'checkedin', 'checkedout', 'overflow'):
+        method = getattr(pool, name, None)
+        status[name] = method() if callable(method) else None
+    timeout = getattr(pool, 'timeout', None)
+    status['timeout'] = timeout() if callable(timeout) else None
+    if counters is not None:
+        status.update(counters.snapshot())
+    return status
+
+
+def tune_engine(app, engine):
+    """Start pool metrics (app.extensions['pool_counters']) and register the SQLite tuning profile on `engine`"""
+    app.extensions['pool_counters'] = watch_pool(engine)
+    if engine.dialect.name != 'sqlite' or not app.config['SQLITE_TUNING']:
+        return
+    pragmas = sqlite_pragmas(app.config)
+
+    @event.listens_for(engine, 'connect')
+    def apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
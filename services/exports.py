@@ -0,0 +1,63 @@
+"""Streaming NDJSON / CSV exports of submission tables.
+
+Rows are read from the database with yield_per and written out in batches,
+so memory use is bounded by the batch size rather than the table size.
+"""
+import csv
+import io
+from datetime import datetime, timedelta
+from flask import current_app
+
+BATCH_SIZE = 1000
+
+
+def parse_date_range(start, end):
+    """Parse ?from= / ?to= (YYYY-MM-DD, both inclusive) into datetime bounds"""
+    try:
+        start = datetime.strptime(start, '%Y-%m-%d') if start else None
+        end = datetime.strptime(end, '%Y-%m-%d') + timedelta(days=1) if end else None
+    except ValueError:
+        raise ValueError('Dates must be formatted as YYYY-MM-DD')
+    return start, end
+
+
+def export_query(serializer, start=None, end=None):
+    model = serializer.model
+    query = serializer.query(tuple(serializer.fields))
+    if start:
+        query = query.filter(model.timestamp >= start)
+    if end:
+        query = query.filter(model.timestamp < end)
+    return query.order_by(model.id).yield_per(BATCH_SIZE)
+
+
+def _batches(rows, serialize):
+    batch = []
+    for row in rows:
+        batch.append(serialize(row))
+        if len(batch) >= BATCH_SIZE:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def generate_ndjson(serializer, rows):
+    dump_bytes = current_app.json.dump_bytes
+    for batch in _batches(rows, serializer.compile(tuple(serializer.fields))):
+        yield b''.join(dump_bytes(item, newline=True) for item in batch)
+
+
+def generate_csv(serializer, rows):
+    names = tuple(serializer.fields)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(names)
+    for batch in _batches(rows, serializer.compile(names)):
+        writer.writerows([item[n] for n in names] for item in batch)
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        # Header only, the table (or range) was empty
+        yield buffer.getvalue().encode('utf-8')
@@ -0,0 +1,191 @@
+"""Responsive variants of uploaded images.
+
+After an upload is saved, queue_variants() schedules a background job
+(services/jobs.py) that writes resized copies next to the original (<name>-640w.webp, ...) for every configured width below the
+original's, in every configured format the installed Pillow can encode,
+and records them in the image_variant table. API responses carry them as an
+`images` object keyed by original path, ready for <img srcset> / <picture>:
+
+    {"/static/uploads/projects/a.jpg": {
+        "src": "/static/uploads/projects/a.jpg", "width": 3000, "height": 2000,
+        "srcset": "/static/uploads/projects/a-320w.webp 320w, ...",
+        "sources": [{"type": "image/avif", "srcset": "..."}, {"type": "image/webp", "srcset": "..."}]}}
+
+Pillow is optional: without it no variants are generated, `images` stays
+empty and clients fall back to the original paths.
+"""
+import os
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import delete, insert
+from extensions import db, job_queue
+from models import Project, Event, Media, ImageVariant
+from services.changes import mark_changed
+from services.media import local_file
+
+try:
+    from PIL import Image, ImageOps, features
+except ImportError:
+    Image = None
+
+MIME_TYPES = {'avif': 'image/avif', 'webp': 'image/webp'}
+SAVE_OPTIONS = {
+    'avif': {'quality': 55, 'speed': 6},
+    'webp': {'quality': 80, 'method': 4},
+}
+# Tables whose API responses embed variants; their caches are invalidated when variants change
+IMAGE_TABLES = ('project', 'event')
+
+
+def load_config(app):
+    app.config.setdefault('IMAGE_VARIANTS_ENABLED', os.environ.get('IMAGE_VARIANTS_ENABLED', 'true').lower() == 'true')
+    app.config.setdefault('IMAGE_VARIANT_WIDTHS', [int(w) for w in os.environ.get('IMAGE_VARIANT_WIDTHS', '320,640,1280').split(',')])
+    app.config.setdefault('IMAGE_VARIANT_FORMATS', os.environ.get('IMAGE_VARIANT_FORMATS', 'avif,webp').split(','))
+
+
+def available_formats(formats):
+    """The formats of `formats` that the installed Pillow can write"""
+    if Image is None:
+        return []
+    return [f for f in formats if f in SAVE_OPTIONS and features.check(f)]
+
+
+def variant_path(path, width, fmt):
+    stem = path.rsplit('.', 1)[0]
+    return f'{stem}-{width}w.{fmt}'
+
+
+def generate_variants(path, widths, formats, root=None):
+    """Write the variants of the uploaded image at URL `path`; returns their image_variant rows"""
+    filename = local_file(path, root)
+    formats = available_formats(formats)
+    if not filename or not formats or not os.path.isfile(filename):
+        return []
+    try:
+        with Image.open(filename) as original:
+            image = ImageOps.exif_transpose(original)
+            image.load()
+    except Exception:
+        return []  # not an image Pillow understands
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'transparency' in image.info or image.mode in ('LA', 'PA') else 'RGB')
+
+    rows = []
+    for width in sorted(w for w in widths if w < image.width):
+        height = max(1, round(image.height * width / image.width))
+        resized = image.resize((width, height), Image.LANCZOS)
+        for fmt in formats:
+            url = variant_path(path, width, fmt)
+            target = local_file(url, root)
+            resized.save(target, fmt.upper(), **SAVE_OPTIONS[fmt])
+            rows.append({'source_path': path, 'path': url, 'format': fmt, 'width': width, 'height': height,
+                         'byte_size': os.path.getsize(target),
+                         'source_width': image.width, 'source_height': image.height})
+    return rows
+
+
+def record_variants(session, path, rows):
+    """Replace the recorded variants of one upload (the caller commits)"""
+    table = ImageVariant.__table__
+    session.execute(delete(table).where(table.c.source_path == path))
+    if rows:
+        session.execute(insert(table), rows)
+    mark_changed(session, *IMAGE_TABLES)
+
+
+def process_image(session, path, widths, formats):
+    """Generate and record the variants of one upload (the caller commits)"""
+    rows = generate_variants(path, widths, formats)
+    record_variants(session, path, rows)
+    return rows
+
+
+def _run_job(payload):
+    return generate_variants(payload['path'], payload['widths'], payload['formats'], payload['root'])
+
+
+def _finish_job(session, payload, rows):
+    record_variants(session, payload['path'], rows)
+
+
+job_queue.register('image_variants', _run_job, _finish_job)
+
+
+def queue_variants(path):
+    """Schedule variant generation for a freshly saved upload; the job is committed with the caller's transaction"""
+    config = current_app.config
+    if not path or not config['IMAGE_VARIANTS_ENABLED'] or not available_formats(config['IMAGE_VARIANT_FORMATS']):
+        return None
+    return job_queue.enqueue('image_variants', {
+        'path': path, 'root': current_app.root_path,
+        'widths': config['IMAGE_VARIANT_WIDTHS'], 'formats': config['IMAGE_VARIANT_FORMATS']})
+
+
+def srcsets(session, paths):
+    """{path: srcset structure} for the paths that have variants, with one query"""
+    paths = list({p for p in paths if p})
+    if not paths:
+        return {}
+    variants = session.query(ImageVariant.source_path, ImageVariant.path, ImageVariant.format, ImageVariant.width,
+                             ImageVariant.source_width, ImageVariant.source_height) \
+        .filter(ImageVariant.source_path.in_(paths)) \
+        .order_by(ImageVariant.source_path, ImageVariant.width).all()
+
+    images = {}
+    for source, path, fmt, width, source_width, source_height in variants:
+        image = images.setdefault(source, {'src': source, 'width': source_width, 'height': source_height, 'formats': {}})
+        image['formats'].setdefault(fmt, []).append(f'{path} {width}w')
+    for image in images.values():
+        formats = image.pop('formats')
+        # AVIF first: browsers take the first <source> they support
+        ordered = sorted(formats, key=lambda f: list(MIME_TYPES).index(f) if f in MIME_TYPES else len(MIME_TYPES))
+        image['sources'] = [{'type': MIME_TYPES.get(f, f'image/{f}'), 'srcset': ', '.join(formats[f])} for f in ordered]
+        image['srcset'] = ', '.join(formats.get('webp') or formats[ordered[0]])
+    return images
+
+
+def _image_paths(item, fields):
+    paths = []
+    for field in fields:
+        value = item.get(field)
+        paths += value if isinstance(value, list) else [value]
+    return [p for p in paths if p]
+
+
+def attach_images(session, items, fields):
+    """Add `images` (srcsets of the paths in `fields`) to each dict in `items` that has any of them; returns `items`"""
+    with_images = [item for item in items if any(f in item for f in fields)]
+    found = srcsets(session, [p for item in with_images for p in _image_paths(item, fields)])
+    for item in with_images:
+        item['images'] = {p: found[p] for p in _image_paths(item, fields) if p in found}
+    return items
+
+
+def uploaded_paths():
+    """Every image path referenced by a project or event"""
+    paths = set()
+    for column in (Project.thumbnail, Event.main_image, Media.path):
+        paths.update(p for (p,) in db.session.query(column).distinct())
+    return sorted(p for p in paths if p and local_file(p))
+
+
+images_cli = AppGroup('images', help='Responsive image variants.')
+
+
+@images_cli.command('generate')
+@click.option('--missing', is_flag=True, help='Only images that have no variants yet.')
+def generate_command(missing):
+    """Generate variants for existing uploads."""
+    config = current_app.config
+    if not available_formats(config['IMAGE_VARIANT_FORMATS']):
+        raise click.ClickException('Pillow with AVIF or WebP support is required.')
+    paths = uploaded_paths()
+    if missing:
+        done = {p for (p,) in db.session.query(ImageVariant.source_path).distinct()}
+        paths = [p for p in paths if p not in done]
+    count = 0
+    for path in paths:
+        count += len(process_image(db.session, path, config['IMAGE_VARIANT_WIDTHS'], config['IMAGE_VARIANT_FORMATS']))
+        db.session.commit()
+    click.echo(f"Generated {count} variants for {len(paths)} images.")
@@ -0,0 +1,287 @@
+"""Write-behind queue for public form submissions.
+
+submit() validates a submission, appends it to this worker's spool file and
+returns straight away; a background thread writes the queued rows with
+bulk_insert_mappings, one transaction per batch, once INGEST_BATCH_SIZE rows
+are waiting or INGEST_FLUSH_INTERVAL seconds have passed.
+
+The spool is what makes this safe across restarts. Before a batch is written
+the spool file is rotated to a ".flushing" file, which is deleted only after
+the batch committed. When a worker starts serving requests it claims the
+spool files of workers that are no longer running and writes their rows, so a crash or restart
+loses nothing (a crash between commit and delete can replay a batch, so
+delivery is at-least-once). While the database is unreachable batches are
+kept and retried on the next flush; a batch the database rejects is retried
+row by row and rows that still fail are moved to "rejected.ndjson".
+"""
+import atexit
+import ctypes
+import glob
+import json
+import os
+import threading
+import uuid
+from datetime import datetime
+from sqlalchemy.exc import OperationalError
+from services.changes import mark_changed
+
+# Windows process query (see _pid_running)
+PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+ERROR_ACCESS_DENIED = 5
+STILL_ACTIVE = 259
+
+
+class ValidationError(ValueError):
+    pass
+
+
+class Kind:
+    """A submission type: the model and its API field name -> column mapping"""
+
+    def __init__(self, serializer, exclude=('id', 'timestamp')):
+        self.model = serializer.model
+        self.columns = {name: f.column for name, f in serializer.fields.items() if name not in exclude}
+        table = self.model.__table__
+        self.required = [name for name, column in self.columns.items() if not table.c[column].nullable]
+        self.lengths = {name: table.c[column].type.length for name, column in self.columns.items()
+                        if getattr(table.c[column].type, 'length', None)}
+
+    def validate(self, data):
+        """Return the row mapping for `data` or raise ValidationError"""
+        if not isinstance(data, dict):
+            raise ValidationError('Expected a JSON object')
+        missing = [name for name in self.required if data.get(name) in (None, '')]
+        if missing:
+            raise ValidationError(f"Missing required fields: {', '.join(missing)}")
+        row = {}
+        for name, column in self.columns.items():
+            value = data.get(name)
+            if value is not None and not isinstance(value, str):
+                raise ValidationError(f"Field {name} must be a string")
+            if value and name in self.lengths and len(value) > self.lengths[name]:
+                raise ValidationError(f"Field {name} is longer than {self.lengths[name]} characters")
+            row[column] = value
+        return row
+
+
+def _pid_running(pid):
+    if os.name == 'nt':
+        # os.kill(pid, 0) would send CTRL_C_EVENT on Windows; ask the kernel instead
+        kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
+        handle = kernel32.OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+        if not handle:
+            return ctypes.get_last_error() == ERROR_ACCESS_DENIED
+        try:
+            code = ctypes.c_ulong()
+            return bool(kernel32.GetExitCodeProcess(handle, ctypes.byref(code))) and code.value == STILL_ACTIVE
+        finally:
+            kernel32.CloseHandle(handle)
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class SubmissionQueue:
+    def __init__(self, app=None):
+        self.kinds = {}
+        self.enabled = True
+        self.batch_size = 100
+        self.flush_interval = 1.0
+        self.spool_dir = None
+        self.app = None
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._pending = []
+        self._spool = None
+        self._pid = None
+        self._retry = []
+        self._in_flight = set()
+        self._thread = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('INGEST_ENABLED', os.environ.get('INGEST_ENABLED', 'true').lower() == 'true')
+        app.config.setdefault('INGEST_BATCH_SIZE', int(os.environ.get('INGEST_BATCH_SIZE', 100)))
+        app.config.setdefault('INGEST_FLUSH_INTERVAL', float(os.environ.get('INGEST_FLUSH_INTERVAL', 1.0)))
+        app.config.setdefault('INGEST_FSYNC', os.environ.get('INGEST_FSYNC', 'false').lower() == 'true')
+        app.config.setdefault('INGEST_SPOOL_DIR', os.environ.get(
+            'INGEST_SPOOL_DIR', os.path.join(app.instance_path, 'spool')))
+
+        self.app = app
+        self.enabled = app.config['INGEST_ENABLED']
+        self.batch_size = app.config['INGEST_BATCH_SIZE']
+        self.flush_interval = app.config['INGEST_FLUSH_INTERVAL']
+        self.fsync = app.config['INGEST_FSYNC']
+        self.spool_dir = app.config['INGEST_SPOOL_DIR']
+        if self.enabled:
+            os.makedirs(self.spool_dir, exist_ok=True)
+            # Start the flusher, and recover what earlier processes left, once a worker serves traffic
+            app.before_request(self._start)
+        app.extensions['submission_queue'] = self
+
+    def register(self, name, serializer):
+        self.kinds[name] = Kind(serializer)
+
+    def submit(self, name, data):
+        """Validate `data` and queue it. Returns True if queued, False if written synchronously."""
+        kind = self.kinds[name]
+        row = kind.validate(data)
+        row['timestamp'] = datetime.utcnow()
+        record = {'kind': name, 'row': row}
+
+        if not self.enabled:
+            self._write([record])
+            return False
+
+        line = json.dumps({'kind': name, 'row': dict(row, timestamp=row['timestamp'].isoformat())}) + '\n'
+        with self._lock:
+            self._ensure_started()
+            self._spool.write(line)
+            self._spool.flush()
+            if self.fsync:
+                os.fsync(self._spool.fileno())
+            self._pending.append(record)
+            full = len(self._pending) >= self.batch_size
+        if full:
+            self._wakeup.set()
+        return True
+
+    def flush(self):
+        """Write everything queued so far (called by the flusher thread and at exit)"""
+        with self._lock:
+            if self._pid != os.getpid():
+                return
+            retry, self._retry = self._retry, []
+            if self._pending:
+                records, self._pending = self._pending, []
+                self._spool.close()
+                batch_path = self._batch_path()
+                os.replace(self._spool_path(), batch_path)
+                self._spool = open(self._spool_path(), 'a', encoding='utf-8')
+                retry.append((records, batch_path))
+            # recover() must not mistake these for an abandoned batch while they are written
+            self._in_flight.update(path for _, path in retry)
+        for records, batch_path in retry:
+            self._write_batch(records, batch_path)
+
+    def _spool_path(self):
+        return os.path.join(self.spool_dir, f'{self._pid}.ndjson')
+
+    def _batch_path(self):
+        return os.path.join(self.spool_dir, f'{os.getpid()}-{uuid.uuid4().hex[:12]}.flushing')
+
+    def _start(self):
+        if self._pid != os.getpid():
+            with self._lock:
+                self._ensure_started()
+
+    def _ensure_started(self):
+        # Called with the lock held. Threads do not survive a fork, so each
+        # worker process starts its own flusher.
+        if self._pid == os.getpid():
+            return
+        self._pid = os.getpid()
+        self._pending = []
+        self._retry = []
+        self._in_flight = set()
+        # Files left by an earlier process that had the same pid: written with the first flush
+        if os.path.exists(self._spool_path()):
+            os.replace(self._spool_path(), self._batch_path())
+        for batch_path in glob.glob(os.path.join(self.spool_dir, f'{self._pid}-*.flushing')):
+            self._retry.append((self._read(batch_path), batch_path))
+        self._spool = open(self._spool_path(), 'a', encoding='utf-8')
+        self._thread = threading.Thread(target=self._run, name='submission-flusher', daemon=True)
+        self._thread.start()
+        atexit.register(self.flush)
+
+    def _run(self):
+        self.recover()
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Submission flush failed: {e}")
+
+    def recover(self):
+        """Claim and write the spool files left behind by workers that are gone"""
+        with self._lock:
+            in_flight = set(self._in_flight)
+        for path in glob.glob(os.path.join(self.spool_dir, '*.ndjson')) + glob.glob(os.path.join(self.spool_dir, '*.flushing')):
+            if path in in_flight:
+                continue
+            owner = os.path.basename(path).split('.')[0].split('-')[0]
+            # Files of this process (its spool, batches being written or retried) are not abandoned
+            if not owner.isdigit() or int(owner) == os.getpid() or _pid_running(int(owner)):
+                continue
+            claimed = self._batch_path()
+            try:
+                os.rename(path, claimed)
+            except FileNotFoundError:
+                continue  # another worker claimed it first
+            with self._lock:
+                self._in_flight.add(claimed)
+            records = self._read(claimed)
+            if records:  # the spool of every worker that served no submissions is empty
+                print(f"Recovering {len(records)} spooled submissions from {os.path.basename(path)}")
+            self._write_batch(records, claimed)
+
+    def _read(self, path):
+        with open(path, encoding='utf-8') as f:
+            return [r for r in map(self._parse, f) if r]
+
+    def _parse(self, line):
+        if not line.strip():
+            return None
+        try:
+            record = json.loads(line)
+        except ValueError:
+            return None  # torn write from a crash mid-append
+        record['row']['timestamp'] = datetime.fromisoformat(record['row']['timestamp'])
+        return record
+
+    def _write_batch(self, records, batch_path):
+        try:
+            self._write(records)
+        except OperationalError as e:
+            # Database unreachable or locked: keep the batch for the next flush
+            print(f"Batch of {len(records)} submissions deferred: {e}")
+            with self._lock:
+                self._retry.append((records, batch_path))
+            return
+        except Exception as e:
+            print(f"Batch of {len(records)} submissions failed ({e}); retrying row by row")
+            rejected = []
+            for record in records:
+                try:
+                    self._write([record])
+                except Exception:
+                    rejected.append(record)
+            if rejected:
+                with open(os.path.join(self.spool_dir, 'rejected.ndjson'), 'a', encoding='utf-8') as f:
+                    for record in rejected:
+                        f.write(json.dumps(record, default=str) + '\n')
+        os.remove(batch_path)
+        with self._lock:
+            self._in_flight.discard(batch_path)
+
+    def _write(self, records):
+        from extensions import db
+        by_model = {}
+        for record in records:
+            by_model.setdefault(self.kinds[record['kind']].model, []).append(record['row'])
+        with self.app.app_context():
+            try:
+                for model, rows in by_model.items():
+                    db.session.bulk_insert_mappings(model, rows)
+                mark_changed(db.session, *(model.__tablename__ for model in by_model))
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
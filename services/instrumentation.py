@@ -0,0 +1,190 @@
+"""Per-request timings and slow request / slow query logging.
+
+For every request Instrumentation records the wall time, the number of SQL
+queries and the time spent in them (SQLAlchemy cursor events), the time spent
+rendering templates (Flask's template signals) and the size of the response
+body. They show up:
+
+* in a Server-Timing header (app, db, tpl), which browser developer tools
+  display with the request's timing
+* in a warning on this module's logger for requests that take
+  SLOW_REQUEST_MS or more. The line includes the query count, so N+1 query
+  patterns stand out.
+* in a warning with the SQL for every query that takes SLOW_QUERY_MS or more,
+  also outside requests (e.g. the job dispatcher)
+* summed per endpoint at /admin/request-stats, for the worker that answers
+
+The headers of a streamed response go out before its body is produced, so
+its Server-Timing only covers the time until then. The log line and the
+per-endpoint totals are written once the body is complete and cover the
+whole stream.
+"""
+import logging
+import os
+import threading
+import time
+from flask import before_render_template, g, has_app_context, has_request_context, request, template_rendered
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+
+class RequestStats:
+    """What one request spent its time on"""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.elapsed = 0.0
+        self.queries = 0
+        self.sql = 0.0
+        self.templates = 0.0
+        self.size = 0
+        self.method = self.path = self.endpoint = None
+        self.status = None
+
+    def server_timing(self):
+        elapsed = time.perf_counter() - self.start
+        metrics = [f'app;dur={elapsed * 1000:.1f}', f'db;dur={self.sql * 1000:.1f};desc="{self.queries} queries"']
+        if self.templates:
+            metrics.append(f'tpl;dur={self.templates * 1000:.1f}')
+        return ', '.join(metrics)
+
+
+def _current():
+    return g.get('_request_stats') if has_app_context() else None
+
+
+class Instrumentation:
+    def __init__(self, app=None):
+        self.enabled = True
+        self.server_timing = True
+        self.slow_request_ms = 500
+        self.slow_query_ms = 100
+        self.endpoints = {}
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('INSTRUMENTATION_ENABLED', os.environ.get('INSTRUMENTATION_ENABLED', 'true').lower() == 'true')
+        app.config.setdefault('SERVER_TIMING_ENABLED', os.environ.get('SERVER_TIMING_ENABLED', 'true').lower() == 'true')
+        app.config.setdefault('SLOW_REQUEST_MS', int(os.environ.get('SLOW_REQUEST_MS', 500)))
+        app.config.setdefault('SLOW_QUERY_MS', int(os.environ.get('SLOW_QUERY_MS', 100)))
+
+        self.enabled = app.config['INSTRUMENTATION_ENABLED']
+        self.server_timing = app.config['SERVER_TIMING_ENABLED']
+        self.slow_request_ms = app.config['SLOW_REQUEST_MS']
+        self.slow_query_ms = app.config['SLOW_QUERY_MS']
+        if self.enabled:
+            # Initialised before the other extensions: the clock starts first and,
+            # as after_request hooks run in reverse order, the size is taken last
+            # (after compression)
+            app.before_request(self._start)
+            app.after_request(self._finish)
+            before_render_template.connect(self._template_started, app)
+            template_rendered.connect(self._template_finished, app)
+        app.extensions['instrumentation'] = self
+
+    def watch_engine(self, engine):
+        """Count and time the queries run on `engine`"""
+        if not self.enabled:
+            return
+        event.listen(engine, 'before_cursor_execute', self._query_started)
+        event.listen(engine, 'after_cursor_execute', self._query_finished)
+
+    def _query_started(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info['query_start'] = time.perf_counter()
+
+    def _query_finished(self, conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info.pop('query_start', time.perf_counter())
+        stats = _current()
+        if stats is not None:
+            stats.queries += 1
+            stats.sql += elapsed
+        if self.slow_query_ms and elapsed * 1000 >= self.slow_query_ms:
+            where = f'{request.method} {request.path}' if has_request_context() else 'outside a request'
+            logger.warning('Slow query (%.1f ms, %s): %s', elapsed * 1000, where, ' '.join(statement.split())[:2000])
+
+    def _template_started(self, sender, template, context, **extra):
+        g.setdefault('_template_starts', []).append(time.perf_counter())
+
+    def _template_finished(self, sender, template, context, **extra):
+        stats, starts = _current(), g.get('_template_starts')
+        if stats is not None and starts:
+            stats.templates += time.perf_counter() - starts.pop()
+
+    def _start(self):
+        g._request_stats = RequestStats()
+
+    def _finish(self, response):
+        stats = _current()
+        if stats is None:
+            return response
+        stats.method, stats.path, stats.endpoint = request.method, request.path, request.endpoint
+        stats.status = response.status_code
+        if self.server_timing:
+            response.headers['Server-Timing'] = stats.server_timing()
+        if response.direct_passthrough:
+            # A file handed to the WSGI server as is (send_file); close callbacks never run for it
+            stats.size = response.content_length or 0
+            self._record(stats)
+            return response
+        if response.is_streamed:
+            response.response = self._count(response.response, stats)
+        else:
+            stats.size = response.content_length or 0
+        response.call_on_close(lambda: self._record(stats))
+        return response
+
+    def _count(self, chunks, stats):
+        try:
+            for chunk in chunks:
+                if isinstance(chunk, str):
+                    chunk = chunk.encode()
+                stats.size += len(chunk)
+                yield chunk
+        finally:
+            if hasattr(chunks, 'close'):
+                chunks.close()
+
+    def _record(self, stats):
+        stats.elapsed = time.perf_counter() - stats.start
+        key = (stats.method, stats.endpoint or '<unmatched>')
+        with self._lock:
+            totals = self.endpoints.setdefault(key, {
+                'requests': 0, 'time': 0.0, 'max_time': 0.0, 'queries': 0, 'max_queries': 0,
+                'sql': 0.0, 'templates': 0.0, 'bytes': 0,
+            })
+            totals['requests'] += 1
+            totals['time'] += stats.elapsed
+            totals['max_time'] = max(totals['max_time'], stats.elapsed)
+            totals['queries'] += stats.queries
+            totals['max_queries'] = max(totals['max_queries'], stats.queries)
+            totals['sql'] += stats.sql
+            totals['templates'] += stats.templates
+            totals['bytes'] += stats.size
+        if self.slow_request_ms and stats.elapsed * 1000 >= self.slow_request_ms:
+            logger.warning('Slow request: %s %s -> %s in %.0f ms (%d queries, %.0f ms SQL, %.0f ms templates, %d bytes)',
+                           stats.method, stats.path, stats.status, stats.elapsed * 1000, stats.queries,
+                           stats.sql * 1000, stats.templates * 1000, stats.size)
+
+    def snapshot(self):
+        """Per-endpoint averages and maxima since the worker started, slowest in total first"""
+        with self._lock:
+            items = [(key, dict(totals)) for key, totals in self.endpoints.items()]
+        rows = []
+        for (method, endpoint), t in items:
+            n = t['requests']
+            rows.append({
+                'endpoint': endpoint, 'method': method, 'requests': n,
+                'totalMs': round(t['time'] * 1000, 1),
+                'avgMs': round(t['time'] * 1000 / n, 2), 'maxMs': round(t['max_time'] * 1000, 2),
+                'avgQueries': round(t['queries'] / n, 2), 'maxQueries': t['max_queries'],
+                'avgSqlMs': round(t['sql'] * 1000 / n, 2), 'avgTemplateMs': round(t['templates'] * 1000 / n, 2),
+                'avgBytes': round(t['bytes'] / n),
+            })
+        return sorted(rows, key=lambda r: r['totalMs'], reverse=True)
+
+    def reset(self):
+        with self._lock:
+            self.endpoints.clear()
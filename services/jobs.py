@@ -0,0 +1,281 @@
+"""Background jobs for work that should not hold up a request.
+
+enqueue() adds a row to the job table in the caller's transaction, so a job
+exists exactly when the change that needs it has been committed. Each web
+worker runs a dispatcher thread that claims runnable jobs with a conditional
+UPDATE (two workers never run the same job), hands the heavy part to a
+process pool and records the outcome. Everything lives in the application
+database; no broker is involved.
+
+A job kind is registered with two functions:
+
+    run(payload)                      runs in a pool process without an app context;
+                                      returns a JSON-serializable result
+    finish(session, payload, result)  runs in the dispatcher with an app context, in the
+                                      transaction that marks the job done
+
+A job that raises is retried after JOBS_RETRY_DELAY, 2 * JOBS_RETRY_DELAY, ...
+seconds until it has been attempted JOBS_MAX_ATTEMPTS times, then marked
+failed. While a worker runs a job it refreshes the job's heartbeat_at on
+every dispatcher pass; a job whose heartbeat is JOBS_TIMEOUT seconds old
+(its worker died) is put back in the queue. A long job in a live worker
+is never taken away from it.
+"""
+import atexit
+import json
+import multiprocessing
+import os
+import socket
+import threading
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta
+from sqlalchemy import func, select, update
+from services.changes import on_commit
+
+STATUSES = ('queued', 'running', 'done', 'failed')
+
+
+class JobKind:
+    def __init__(self, run, finish=None, max_attempts=None):
+        self.run = run
+        self.finish = finish
+        self.max_attempts = max_attempts
+
+
+class JobQueue:
+    def __init__(self, app=None):
+        self.kinds = {}
+        self.enabled = True
+        self.workers = 2
+        self.app = None
+        self.worker_id = None
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._pid = None
+        self._pool = None
+        self._running = {}
+        on_commit(self._committed)
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('JOBS_ENABLED', os.environ.get('JOBS_ENABLED', 'true').lower() == 'true')
+        app.config.setdefault('JOBS_WORKERS', int(os.environ.get('JOBS_WORKERS', 2)))
+        app.config.setdefault('JOBS_MAX_ATTEMPTS', int(os.environ.get('JOBS_MAX_ATTEMPTS', 3)))
+        app.config.setdefault('JOBS_RETRY_DELAY', float(os.environ.get('JOBS_RETRY_DELAY', 10)))
+        app.config.setdefault('JOBS_POLL_INTERVAL', float(os.environ.get('JOBS_POLL_INTERVAL', 5)))
+        app.config.setdefault('JOBS_TIMEOUT', float(os.environ.get('JOBS_TIMEOUT', 600)))
+
+        self.app = app
+        self.enabled = app.config['JOBS_ENABLED']
+        self.workers = app.config['JOBS_WORKERS']
+        self.retry_delay = app.config['JOBS_RETRY_DELAY']
+        self.poll_interval = app.config['JOBS_POLL_INTERVAL']
+        self.timeout = app.config['JOBS_TIMEOUT']
+        if self.enabled:
+            # Web workers pick up queued jobs (including those left by earlier processes) once they serve traffic
+            app.before_request(self._ensure_started)
+        app.extensions['job_queue'] = self
+
+    def register(self, name, run, finish=None, max_attempts=None):
+        self.kinds[name] = JobKind(run, finish, max_attempts)
+
+    def enqueue(self, name, payload, session=None):
+        """Add a job to `session` (committed with the caller's transaction) and return it.
+
+        When the queue is disabled the job runs right away and is recorded as done.
+        """
+        from extensions import db
+        from models import Job
+        session = session or db.session
+        kind = self.kinds[name]
+        job = Job(kind=name, payload=json.dumps(payload),
+                  max_attempts=kind.max_attempts or self.app.config['JOBS_MAX_ATTEMPTS'])
+        if not self.enabled:
+            now = datetime.utcnow()
+            result = kind.run(payload)
+            if kind.finish:
+                kind.finish(session, payload, result)
+            job.status, job.attempts, job.result = 'done', 1, json.dumps(result)
+            job.started_at = job.finished_at = now
+        session.add(job)
+        return job
+
+    def _committed(self, tables):
+        if 'job' in tables and self._pid == os.getpid():
+            self._wakeup.set()
+
+    def _ensure_started(self):
+        # Threads and process pools do not survive a fork, so each worker process starts its own
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self.worker_id = f'{socket.gethostname()}:{self._pid}'
+            self._running = {}
+            self._pool = None
+            threading.Thread(target=self._run, name='job-dispatcher', daemon=True).start()
+            atexit.register(self.shutdown)
+
+    def _new_pool(self):
+        if self.workers <= 0:
+            return None  # run jobs in the dispatcher thread
+        # spawn: forking a threaded web worker could copy held locks and open database connections
+        return ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context('spawn'))
+
+    def _run(self):
+        self._pool = self._new_pool()
+        while True:
+            try:
+                self._heartbeat()
+                self.requeue_stale()
+                self._collect()
+                self._dispatch()
+            except Exception as e:
+                print(f"Job dispatcher error: {e}")
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+
+    def _dispatch(self):
+        free = max(self.workers, 1) - len(self._running)
+        for job_id, name, payload in self._claim(free):
+            kind = self.kinds.get(name)
+            if kind is None:
+                self._failed(job_id, f'Unknown job kind {name!r}', retry=False)
+                continue
+            payload = json.loads(payload)
+            if self._pool is None:
+                self._finish(job_id, kind, payload, *self._call(kind.run, payload))
+                continue
+            try:
+                future = self._pool.submit(kind.run, payload)
+            except BrokenProcessPool:
+                self._pool = self._new_pool()
+                future = self._pool.submit(kind.run, payload)
+            future.add_done_callback(lambda _: self._wakeup.set())
+            self._running[job_id] = (kind, payload, future)
+
+    def _collect(self):
+        for job_id, (kind, payload, future) in list(self._running.items()):
+            if not future.done():
+                continue
+            del self._running[job_id]
+            try:
+                result, error = future.result(), None
+            except BrokenProcessPool as e:
+                # A pool process died (e.g. out of memory); the other jobs in it are lost too
+                result, error = None, f'Worker process died: {e}'
+                self._pool = self._new_pool()
+            except Exception:
+                result, error = None, traceback.format_exc()
+            self._finish(job_id, kind, payload, result, error)
+
+    def _call(self, fn, payload):
+        try:
+            return fn(payload), None
+        except Exception:
+            return None, traceback.format_exc()
+
+    def _claim(self, limit):
+        """Mark up to `limit` runnable jobs as running by this worker; returns (id, kind, payload)"""
+        from extensions import db
+        from models import Job
+        if limit <= 0:
+            return []
+        table = Job.__table__
+        now = datetime.utcnow()
+        with self.app.app_context():
+            candidates = db.session.execute(
+                select(table.c.id, table.c.kind, table.c.payload)
+                .where(table.c.status == 'queued', table.c.run_after <= now)
+                .order_by(table.c.run_after, table.c.id).limit(limit)).all()
+            claimed = []
+            for job_id, name, payload in candidates:
+                result = db.session.execute(
+                    update(table).where(table.c.id == job_id, table.c.status == 'queued')
+                    .values(status='running', attempts=table.c.attempts + 1, worker=self.worker_id,
+                            started_at=now, heartbeat_at=now))
+                if result.rowcount == 1:  # 0 if another worker claimed it first
+                    claimed.append((job_id, name, payload))
+            db.session.commit()
+        return claimed
+
+    def _finish(self, job_id, kind, payload, result, error):
+        from extensions import db
+        from models import Job
+        if error is None:
+            with self.app.app_context():
+                try:
+                    if kind.finish:
+                        kind.finish(db.session, payload, result)
+                    db.session.execute(update(Job.__table__).where(Job.__table__.c.id == job_id).values(
+                        status='done', result=json.dumps(result), last_error=None, finished_at=datetime.utcnow()))
+                    db.session.commit()
+                    return
+                except Exception:
+                    db.session.rollback()
+                    error = traceback.format_exc()
+        self._failed(job_id, error)
+
+    def _failed(self, job_id, error, retry=True):
+        from extensions import db
+        from models import Job
+        with self.app.app_context():
+            job = db.session.get(Job, job_id)
+            job.last_error = error
+            if retry and job.attempts < job.max_attempts:
+                job.status = 'queued'
+                job.run_after = datetime.utcnow() + timedelta(seconds=self.retry_delay * 2 ** (job.attempts - 1))
+            else:
+                job.status = 'failed'
+                job.finished_at = datetime.utcnow()
+            db.session.commit()
+            print(f"Job {job_id} ({job.kind}) failed on attempt {job.attempts}/{job.max_attempts}: {error.strip().splitlines()[-1]}")
+
+    def _heartbeat(self):
+        """Tell other workers that the jobs in this worker's pool are still being run"""
+        from extensions import db
+        from models import Job
+        if not self._running:
+            return
+        table = Job.__table__
+        with self.app.app_context():
+            db.session.execute(update(table).where(table.c.id.in_(list(self._running)), table.c.worker == self.worker_id)
+                               .values(heartbeat_at=datetime.utcnow()))
+            db.session.commit()
+
+    def requeue_stale(self):
+        """Put running jobs without a heartbeat for JOBS_TIMEOUT back in the queue (or fail them)"""
+        from extensions import db
+        from models import Job
+        table = Job.__table__
+        cutoff = datetime.utcnow() - timedelta(seconds=self.timeout)
+        stale = ((table.c.status == 'running') & (func.coalesce(table.c.heartbeat_at, table.c.started_at) < cutoff)
+                 & table.c.id.notin_(list(self._running)))  # never a job this worker is still running
+        with self.app.app_context():
+            db.session.execute(update(table).where(stale, table.c.attempts < table.c.max_attempts)
+                               .values(status='queued', run_after=datetime.utcnow(), last_error='Timed out'))
+            db.session.execute(update(table).where(stale)
+                               .values(status='failed', finished_at=datetime.utcnow(), last_error='Timed out'))
+            db.session.commit()
+
+    def shutdown(self):
+        """Stop the pool and give this worker's unfinished jobs back to the queue"""
+        from extensions import db
+        from models import Job
+        if self._pid != os.getpid():
+            return
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+        table = Job.__table__
+        try:
+            with self.app.app_context():
+                db.session.execute(update(table).where(table.c.status == 'running', table.c.worker == self.worker_id)
+                                   .values(status='queued', attempts=table.c.attempts - 1, run_after=datetime.utcnow()))
+                db.session.commit()
+        except Exception as e:
+            print(f"Could not requeue running jobs: {e}")
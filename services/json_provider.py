@@ -0,0 +1,77 @@
+"""JSON provider that encodes with orjson when it is installed.
+
+Output matches Flask's default provider (sorted keys, compact separators,
+indented in debug mode) except that non-ASCII text is written as UTF-8
+instead of \\u escapes. Dates, dataclasses and anything orjson cannot encode
+natively go through the default provider's rules, and when orjson is missing
+or fails on a value the stdlib encoder is used instead.
+"""
+import json
+from flask import stream_with_context
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    def _orjson_option(self, indent=False, newline=False):
+        option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        if newline:
+            option |= orjson.OPT_APPEND_NEWLINE
+        return option
+
+    def _indent(self):
+        return (self.compact is None and self._app.debug) or self.compact is False
+
+    def dump_bytes(self, obj, indent=False, newline=False):
+        """Encode `obj` to UTF-8 JSON bytes"""
+        if orjson is not None:
+            try:
+                return orjson.dumps(obj, default=self.default, option=self._orjson_option(indent, newline))
+            except TypeError:
+                # e.g. integers wider than 64 bits or non-string keys
+                pass
+        if indent:
+            text = json.dumps(obj, default=self.default, sort_keys=self.sort_keys, ensure_ascii=self.ensure_ascii, indent=2)
+        else:
+            text = json.dumps(obj, default=self.default, sort_keys=self.sort_keys, ensure_ascii=self.ensure_ascii, separators=(',', ':'))
+        return (text + '\n' if newline else text).encode()
+
+    def dumps(self, obj, **kwargs):
+        if orjson is None or kwargs:
+            return super().dumps(obj, **kwargs)
+        return self.dump_bytes(obj).decode()
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.dump_bytes(obj, self._indent(), newline=True), mimetype=self.mimetype)
+
+    def stream_array(self, items, chunk_size=500):
+        """Stream an iterable of JSON-serializable items as one JSON array.
+
+        Items are encoded `chunk_size` at a time, so only one chunk is ever
+        held in memory. Runs inside the request context, which keeps database
+        cursors feeding `items` usable while the body is sent.
+        """
+        def generate():
+            yield b'['
+            chunk = []
+            first = True
+            for item in items:
+                chunk.append(item)
+                if len(chunk) >= chunk_size:
+                    yield (b'' if first else b',') + self.dump_bytes(chunk)[1:-1]
+                    first = False
+                    chunk = []
+            if chunk:
+                yield (b'' if first else b',') + self.dump_bytes(chunk)[1:-1]
+            yield b']\n'
+
+        return self._app.response_class(stream_with_context(generate()), mimetype=self.mimetype)
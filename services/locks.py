@@ -0,0 +1,42 @@
+"""Exclusive locks on open files that work on Windows as well as POSIX.
+
+POSIX uses flock() on the whole file. Windows has no flock, so msvcrt
+locks the first byte of the file instead (locking past the end of the file
+is allowed). Every process that uses the same file must go through
+locked(), so they all lock the same thing.
+"""
+import os
+from contextlib import contextmanager
+
+if os.name == 'nt':
+    import msvcrt
+else:
+    import fcntl
+
+
+@contextmanager
+def locked(f):
+    """Hold an exclusive lock on the open file `f` until the block ends, waiting for it if needed"""
+    if os.name == 'nt':
+        position = f.tell()
+        f.seek(0)
+        while True:
+            try:
+                msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                break
+            except OSError:
+                pass  # LK_LOCK gives up after 10 attempts a second apart; keep waiting
+        f.seek(position)
+        try:
+            yield f
+        finally:
+            f.flush()
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+    else:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield f
+        finally:
+            f.flush()
+            fcntl.flock(f, fcntl.LOCK_UN)
@@ -0,0 +1,176 @@
+"""Project screenshots and event gallery images as rows of the media table.
+
+Each image is one Media row (owner type and id, path, position, dimensions,
+byte size), so galleries can be loaded for many owners with one query and
+single images added, reordered or deleted without touching the others.
+The media rows are the only copy: the comma-separated Project.screenshots
+and Event.gallery columns they were created from (migration 0006) are no
+longer read or written. Readers load the paths of a whole list of owners
+at once with media_paths() or load_media(); the API serializers do this for
+the `screenshots` and `gallery` fields (services/serializers.py).
+
+Dimensions and byte size are copied from the blob row of the upload, which
+has them from the moment the file was stored (services/storage.py), so
+nothing is read from disk while media rows are written. Paths that are not
+stored uploads (e.g. external URLs) get no dimensions.
+"""
+import os
+from flask import current_app, has_app_context
+from sqlalchemy import delete, event, func, insert, select
+from sqlalchemy.orm import Session
+from models import Project, Event, Media, Blob
+from services.changes import mark_changed
+
+# owner_type -> (model, API field listing the owner's media paths)
+OWNERS = {
+    'project': (Project, 'screenshots'),
+    'event': (Event, 'gallery'),
+}
+CHUNK = 500  # owner ids or paths per IN (...) list
+
+
+def split_paths(value):
+    return [path for path in (value or '').split(',') if path]
+
+
+def local_file(path, root=None):
+    """Filesystem path for an uploaded file URL (/static/uploads/...), None for external URLs"""
+    if not path.startswith('/static/'):
+        return None
+    root = root or (current_app.root_path if has_app_context() else os.getcwd())
+    return os.path.join(root, *path.lstrip('/').split('/'))
+
+
+def _chunks(values):
+    values = list(values)
+    for i in range(0, len(values), CHUNK):
+        yield values[i:i + CHUNK]
+
+
+def blob_info(conn, paths):
+    """{path: {byte_size, width, height}} for the paths of `paths` that are stored uploads"""
+    table = Blob.__table__
+    info = {}
+    for chunk in _chunks(set(paths)):
+        for path, byte_size, width, height in conn.execute(
+                select(table.c.path, table.c.byte_size, table.c.width, table.c.height).where(table.c.path.in_(chunk))):
+            info[path] = {'byte_size': byte_size, 'width': width, 'height': height}
+    return info
+
+
+def media_paths(session, owner_type, owner_ids):
+    """{owner_id: [paths in order]} for a list of owners, with one query per CHUNK owners"""
+    table = Media.__table__
+    paths = {owner_id: [] for owner_id in owner_ids}
+    for chunk in _chunks(paths):
+        rows = session.execute(
+            select(table.c.owner_id, table.c.path)
+            .where(table.c.owner_type == owner_type, table.c.owner_id.in_(chunk))
+            .order_by(table.c.owner_id, table.c.position))
+        for owner_id, path in rows:
+            paths[owner_id].append(path)
+    return paths
+
+
+def load_media(session, owner_type, owner_ids):
+    """{owner_id: [Media rows in order]} for a list of owners, with one query"""
+    media = {owner_id: [] for owner_id in owner_ids}
+    if not owner_ids:
+        return media
+    rows = session.query(Media).filter(Media.owner_type == owner_type, Media.owner_id.in_(list(media))) \
+        .order_by(Media.owner_id, Media.position).all()
+    for row in rows:
+        media[row.owner_id].append(row)
+    return media
+
+
+def _changed(session, owner_type):
+    # API responses of the owner embed its media: bump its ETag and drop its cached responses
+    mark_changed(session, OWNERS[owner_type][0].__tablename__)
+
+
+def _check_owner_type(owner_type):
+    if owner_type not in OWNERS:
+        raise ValueError(f"owner type must be one of: {', '.join(OWNERS)}")
+
+
+def add_media(session, owner_type, owner_id, paths):
+    """Append media rows for `paths` after the owner's existing media; returns them"""
+    _check_owner_type(owner_type)
+    if not paths:
+        return []
+    last = session.query(func.max(Media.position)).filter(Media.owner_type == owner_type, Media.owner_id == owner_id).scalar()
+    start = 0 if last is None else last + 1
+    info = blob_info(session, paths)
+    media = [Media(owner_type=owner_type, owner_id=owner_id, path=path, position=start + i, **info.get(path, {}))
+             for i, path in enumerate(paths)]
+    session.add_all(media)
+    _changed(session, owner_type)
+    return media
+
+
+def _remove(session, owner_type, owner_id, doomed):
+    # Delete the media rows for which doomed(row) is true and close the gaps in the ordering
+    kept = []
+    for m in load_media(session, owner_type, [owner_id])[owner_id]:
+        if doomed(m):
+            session.delete(m)
+        else:
+            kept.append(m)
+    for position, m in enumerate(kept):
+        if m.position != position:
+            m.position = position
+    _changed(session, owner_type)
+
+
+def remove_paths(session, owner_type, owner_id, paths):
+    """Delete the owner's media rows whose path is one of `paths`"""
+    _check_owner_type(owner_type)
+    paths = set(paths)
+    if paths:
+        _remove(session, owner_type, owner_id, lambda m: m.path in paths)
+
+
+def delete_media(session, media):
+    """Delete one media row and close the gap in its owner's ordering"""
+    _remove(session, media.owner_type, media.owner_id, lambda m: m.id == media.id)
+
+
+def reorder_media(session, owner_type, owner_id, media_ids):
+    """Put the media of one owner in the order of `media_ids` (which must list all of them)"""
+    _check_owner_type(owner_type)
+    media = {m.id: m for m in load_media(session, owner_type, [owner_id])[owner_id]}
+    if sorted(media) != sorted(media_ids):
+        raise ValueError('order must list every media id of the owner exactly once')
+    for position, media_id in enumerate(media_ids):
+        media[media_id].position = position
+    _changed(session, owner_type)
+
+
+def inserted_hook(owner_type):
+    """BulkImporter hook that creates the media rows of freshly inserted owners from their path lists"""
+    field = OWNERS[owner_type][1]
+
+    def hook(conn, rows_by_id):
+        paths = {owner_id: row.get(field) or [] for owner_id, row in rows_by_id.items()}
+        info = blob_info(conn, [p for values in paths.values() for p in values])
+        rows = [dict(owner_type=owner_type, owner_id=owner_id, path=path, position=position, **info.get(path, {}))
+                for owner_id, values in paths.items() for position, path in enumerate(values)]
+        if rows:
+            conn.execute(insert(Media.__table__), rows)
+    return hook
+
+
+def remove_owners(conn, owner_type, owner_ids):
+    table = Media.__table__
+    for chunk in _chunks(owner_ids):
+        conn.execute(delete(table).where(table.c.owner_type == owner_type, table.c.owner_id.in_(chunk)))
+
+
+@event.listens_for(Session, 'after_flush')
+def _remove_deleted_owners(session, flush_context):
+    # Their blob references were already released by services/storage.py before the flush
+    for owner_type, (model, _) in OWNERS.items():
+        deleted = [obj.id for obj in session.deleted if isinstance(obj, model)]
+        if deleted:
+            remove_owners(session.connection(), owner_type, deleted)
@@ -0,0 +1,175 @@
+"""Versioned schema migrations.
+
+Migration scripts live in migrations/ as NNNN_description.py and define
+upgrade(conn). Applied versions are recorded in the schema_version table;
+each script runs in its own transaction together with its version row.
+`flask migrate upgrade` applies pending scripts; on boot create_app only
+reads MAX(version), and applies them itself only when AUTO_MIGRATE is on
+(off by default, as every web worker boots). upgrade() holds a lock for the
+database while it runs (an advisory lock on PostgreSQL, a lock file next to
+the database on SQLite), so processes that upgrade at the same time take
+turns and the later ones find nothing left to do.
+
+Scripts spell out their tables, columns and indexes as they were when the
+script was written, rather than reading models.py, so replaying the history
+always produces the same schema. They use checkfirst and the helpers below,
+so each one is safe to run against a database that already has (part of)
+the change, e.g. a database created before versioning existed.
+"""
+import importlib.util
+import os
+import re
+from contextlib import contextmanager
+from datetime import datetime
+import click
+from flask.cli import AppGroup
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, func, inspect, select, text
+from sqlalchemy.exc import IntegrityError, OperationalError, ProgrammingError
+from extensions import db
+from services.locks import locked
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'migrations')
+LOCK_KEY = 0x4D494752  # pg_advisory_lock key for schema upgrades
+
+schema_version = Table(
+    'schema_version', MetaData(),
+    Column('version', Integer, primary_key=True),
+    Column('name', String(150), nullable=False),
+    Column('applied_at', DateTime, nullable=False)
+)
+
+
+# --- Helpers for migration scripts ---
+
+def create_tables(conn, *tables):
+    """Create each of `tables` (Table objects defined in the migration) that does not exist yet"""
+    for table in tables:
+        table.create(conn, checkfirst=True)
+
+
+def add_column_if_missing(conn, table, column, ddl_type):
+    if column not in [c['name'] for c in inspect(conn).get_columns(table)]:
+        conn.execute(db.text(f'ALTER TABLE {table} ADD COLUMN {column} {ddl_type}'))
+
+
+def create_indexes(conn, *tables):
+    """Create every index declared on `tables` that the database lacks"""
+    inspector = inspect(conn)
+    for table in tables:
+        existing = {ix['name'] for ix in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(conn)
+
+
+# --- Runner ---
+
+def discover():
+    """Return [(version, name, module)] for every script in migrations/, in order"""
+    migrations = []
+    for filename in sorted(os.listdir(MIGRATIONS_DIR)):
+        match = re.match(r'^(\d+)_(\w+)\.py$', filename)
+        if not match:
+            continue
+        spec = importlib.util.spec_from_file_location(f'migrations.{filename[:-3]}', os.path.join(MIGRATIONS_DIR, filename))
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        migrations.append((int(match.group(1)), match.group(2), module))
+    return migrations
+
+
+def head_version():
+    versions = [int(m.group(1)) for m in (re.match(r'^(\d+)_\w+\.py$', f) for f in os.listdir(MIGRATIONS_DIR)) if m]
+    return max(versions, default=0)
+
+
+def current_version(engine):
+    """Highest applied version, 0 for a database that was never migrated"""
+    try:
+        with engine.connect() as conn:
+            return conn.execute(select(func.max(schema_version.c.version))).scalar() or 0
+    except (OperationalError, ProgrammingError):
+        # schema_version does not exist yet
+        return 0
+
+
+@contextmanager
+def migration_lock(engine):
+    """Keep other processes from migrating the same database until the block ends"""
+    if engine.dialect.name == 'postgresql':
+        with engine.connect() as conn:
+            conn.execute(text('SELECT pg_advisory_lock(:key)'), {'key': LOCK_KEY})
+            try:
+                yield
+            finally:
+                conn.execute(text('SELECT pg_advisory_unlock(:key)'), {'key': LOCK_KEY})
+    elif engine.dialect.name == 'sqlite' and engine.url.database not in (None, '', ':memory:'):
+        with open(f'{engine.url.database}.migrate-lock', 'ab') as f, locked(f):
+            yield
+    else:
+        yield
+
+
+def upgrade(engine, target=None):
+    """Apply pending migrations up to `target` (default: all). Returns the versions applied."""
+    with migration_lock(engine):
+        return _upgrade(engine, target)
+
+
+def _upgrade(engine, target):
+    schema_version.create(engine, checkfirst=True)
+    applied = []
+    for version, name, module in discover():
+        if target is not None and version > target:
+            break
+        if version <= current_version(engine):
+            continue
+        try:
+            with engine.begin() as conn:
+                module.upgrade(conn)
+                conn.execute(schema_version.insert().values(version=version, name=name, applied_at=datetime.utcnow()))
+        except IntegrityError:
+            # Another process recorded this version first
+            continue
+        applied.append(version)
+        print(f"Applied migration {version:04d}_{name}")
+    return applied
+
+
+def check_schema(app):
+    """Boot path: one version read; migrate only when the database is behind.
+
+    Returns whether the schema is up to date afterwards.
+    """
+    version = current_version(db.engine)
+    head = head_version()
+    if version >= head:
+        return True
+    if app.config['AUTO_MIGRATE']:
+        upgrade(db.engine)
+        return True
+    app.logger.warning("Database schema is at version %s, code expects %s. Run `flask migrate upgrade`.", version, head)
+    return False
+
+
+migrate_cli = AppGroup('migrate', help='Database schema migrations.')
+
+
+@migrate_cli.command('upgrade')
+@click.option('--to', 'target', type=int, default=None, help='Stop after this version.')
+def upgrade_command(target):
+    """Apply pending migrations."""
+    applied = upgrade(db.engine, target)
+    if not applied:
+        click.echo(f"Already at version {current_version(db.engine)}.")
+    elif current_version(db.engine) >= head_version():
+        from app import create_initial_admin
+        create_initial_admin()
+
+
+@migrate_cli.command('status')
+def status_command():
+    """Show applied and pending migrations."""
+    version = current_version(db.engine)
+    for number, name, _ in discover():
+        click.echo(f"[{'x' if number <= version else ' '}] {number:04d}_{name}")
@@ -0,0 +1,120 @@
+import base64
+from datetime import datetime
+from sqlalchemy import or_
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(timestamp, id):
+    """Encode the (timestamp, id) of the last row of a page as an opaque token"""
+    raw = f"{timestamp.isoformat() if timestamp else ''}|{id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Decode a token produced by encode_cursor back into (timestamp, id)"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        timestamp, id = base64.urlsafe_b64decode(padded.encode()).decode().split('|')
+        return (datetime.fromisoformat(timestamp) if timestamp else None), int(id)
+    except (ValueError, UnicodeDecodeError):
+        raise InvalidCursor('Invalid cursor')
+
+
+def parse_limit(value, default, maximum):
+    """Parse a ?limit= argument, clamping it to 1..maximum"""
+    if value in (None, ''):
+        return default
+    try:
+        limit = int(value)
+    except ValueError:
+        raise ValueError('limit must be an integer')
+    return max(1, min(limit, maximum))
+
+
+def keyset_page(query, model, cursor=None, limit=20):
+    """Return (rows, next_cursor) for a newest-first page of `query`.
+
+    Rows are ordered by (timestamp DESC, id DESC) and the page starts right
+    after `cursor`, so the database seeks straight to it through the
+    timestamp index instead of skipping over earlier pages. Rows without a
+    timestamp sort last.
+    """
+    ordered = query.order_by(model.timestamp.desc().nulls_last(), model.id.desc())
+    if not cursor:
+        rows = ordered.limit(limit + 1).all()
+    else:
+        timestamp, id = decode_cursor(cursor)
+        if timestamp is None:
+            rows = []
+        else:
+            # Kept free of an "OR timestamp IS NULL" branch so it stays an index range scan
+            rows = ordered.filter(
+                model.timestamp <= timestamp,
+                or_(model.timestamp < timestamp, model.id < id)
+            ).limit(limit + 1).all()
+        if len(rows) <= limit:
+            # Continue into the rows without a timestamp
+            null_query = query.filter(model.timestamp.is_(None)).order_by(model.id.desc())
+            if timestamp is None:
+                null_query = null_query.filter(model.id < id)
+            rows += null_query.limit(limit + 1 - len(rows)).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(last.timestamp, last.id)
+    return rows, next_cursor
+
+
+class Listing:
+    """Paginated, sortable and searchable listing of one model for the admin pages.
+
+    `sortable` maps ?sort= keys to column names and is the only way a sort
+    column can be chosen; `searchable` lists the columns ?q= is matched
+    against (case-insensitive substring).
+    """
+
+    def __init__(self, model, sortable, searchable, default_sort='timestamp', default_dir='desc',
+                 per_page=25, max_per_page=100, options=()):
+        self.model = model
+        self.sortable = sortable
+        self.searchable = searchable
+        self.default_sort = default_sort
+        self.default_dir = default_dir
+        self.per_page = per_page
+        self.max_per_page = max_per_page
+        self.options = options
+
+    def paginate(self, args):
+        sort = args.get('sort') if args.get('sort') in self.sortable else self.default_sort
+        direction = args.get('dir') if args.get('dir') in ('asc', 'desc') else self.default_dir
+        q = (args.get('q') or '').strip()
+
+        query = self.model.query.options(*self.options)
+        if q:
+            pattern = '%' + q.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+            query = query.filter(or_(*[
+                getattr(self.model, c).ilike(pattern, escape='\\') for c in self.searchable
+            ]))
+
+        column = getattr(self.model, self.sortable[sort])
+        tiebreak = self.model.id
+        if direction == 'desc':
+            query = query.order_by(column.desc(), tiebreak.desc())
+        else:
+            query = query.order_by(column.asc(), tiebreak.asc())
+
+        page = query.paginate(
+            page=args.get('page', 1, type=int),
+            per_page=args.get('per_page', self.per_page, type=int),
+            max_per_page=self.max_per_page,
+            error_out=False
+        )
+        page.sort = sort
+        page.dir = direction
+        page.q = q
+        return page
@@ -0,0 +1,195 @@
+"""Full-text search over projects, events and vacancies.
+
+Each searchable row has one document (title plus the other text fields) in a
+search index: an FTS5 table on SQLite, a table with a generated tsvector
+column and a GIN index on PostgreSQL. Documents are written in the same
+transaction as the row itself, by an after_flush listener for ORM writes and
+by index_rows() for direct inserts (bulk import, migrations). Only active
+vacancies are indexed.
+
+The FTS5 rowid encodes the document key as ref_id * 4 + kind code, so a
+document is replaced or deleted through the rowid instead of a table scan.
+Snippets are returned as HTML: the indexed text is escaped and the matched
+terms are wrapped in <mark>.
+"""
+import html
+import re
+from types import SimpleNamespace
+from sqlalchemy import event, select, text
+from sqlalchemy.orm import Session
+from models import Project, Event, Vacancy
+
+KINDS = {
+    'project': (1, Project, ['description', 'full_description', 'student_name', 'college', 'tech_stack']),
+    'event': (2, Event, ['short_desc', 'full_desc', 'venue', 'organizer', 'category']),
+    'vacancy': (3, Vacancy, ['description', 'requirements', 'location', 'type']),
+}
+KIND_CODES = {code: kind for kind, (code, _, _) in KINDS.items()}
+MODEL_KINDS = {model: kind for kind, (_, model, _) in KINDS.items()}
+BATCH_SIZE = 1000
+SNIPPET_WORDS = 16
+# Highlight markers that cannot occur in user text; swapped for <mark> after escaping
+START, STOP = '\x02', '\x03'
+
+
+class SearchUnavailable(Exception):
+    pass
+
+
+def supported(conn):
+    return conn.dialect.name in ('sqlite', 'postgresql')
+
+
+def create_index(conn):
+    if conn.dialect.name == 'sqlite':
+        conn.execute(text(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5("
+            "slug UNINDEXED, title, body, tokenize='porter unicode61 remove_diacritics 2')"))
+    elif conn.dialect.name == 'postgresql':
+        conn.execute(text(
+            "CREATE TABLE IF NOT EXISTS search_document ("
+            "kind VARCHAR(20) NOT NULL, ref_id INTEGER NOT NULL, slug VARCHAR(150), "
+            "title TEXT NOT NULL, body TEXT NOT NULL, "
+            "document tsvector GENERATED ALWAYS AS ("
+            "setweight(to_tsvector('english', title), 'A') || setweight(to_tsvector('english', body), 'B')) STORED, "
+            "PRIMARY KEY (kind, ref_id))"))
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_search_document ON search_document USING GIN (document)"))
+
+
+def _document(kind, obj):
+    """(title, body) of a row or ORM object, None when it should not be searchable"""
+    if kind == 'vacancy' and obj.is_active is False:
+        return None
+    _, _, columns = KINDS[kind]
+    body = '\n'.join(value for value in (getattr(obj, c) for c in columns) if value)
+    return obj.title or '', body
+
+
+def _delete(conn, kind, ids):
+    code = KINDS[kind][0]
+    if not ids:
+        return
+    if conn.dialect.name == 'sqlite':
+        conn.execute(text("DELETE FROM search_index WHERE rowid = :rowid"), [{'rowid': i * 4 + code} for i in ids])
+    else:
+        conn.execute(text("DELETE FROM search_document WHERE kind = :kind AND ref_id = :ref_id"),
+                     [{'kind': kind, 'ref_id': i} for i in ids])
+
+
+def index_rows(conn, kind, rows):
+    """(Re)index rows or objects of one kind; each needs id, slug, title and the body columns"""
+    if not supported(conn) or not rows:
+        return
+    code = KINDS[kind][0]
+    _delete(conn, kind, [row.id for row in rows])
+    docs = []
+    for row in rows:
+        document = _document(kind, row)
+        if document:
+            docs.append({'rowid': row.id * 4 + code, 'kind': kind, 'ref_id': row.id, 'slug': row.slug,
+                         'title': document[0], 'body': document[1]})
+    if not docs:
+        return
+    if conn.dialect.name == 'sqlite':
+        conn.execute(text("INSERT INTO search_index (rowid, slug, title, body) VALUES (:rowid, :slug, :title, :body)"), docs)
+    else:
+        conn.execute(text("INSERT INTO search_document (kind, ref_id, slug, title, body) "
+                          "VALUES (:kind, :ref_id, :slug, :title, :body)"), docs)
+
+
+def rebuild(conn):
+    """Index every row from scratch"""
+    if not supported(conn):
+        return
+    conn.execute(text("DELETE FROM search_index" if conn.dialect.name == 'sqlite' else "DELETE FROM search_document"))
+    for kind, (_, model, columns) in KINDS.items():
+        table = model.__table__
+        selected = [table.c.id, table.c.slug, table.c.title] + [table.c[c] for c in columns]
+        if kind == 'vacancy':
+            selected.append(table.c.is_active)
+        last_id = 0
+        while True:
+            rows = conn.execute(select(*selected).where(table.c.id > last_id).order_by(table.c.id).limit(BATCH_SIZE)).all()
+            if not rows:
+                break
+            index_rows(conn, kind, rows)
+            last_id = rows[-1].id
+
+
+def inserted_hook(kind):
+    """BulkImporter hook that indexes freshly inserted rows"""
+    def hook(conn, rows_by_id):
+        index_rows(conn, kind, [SimpleNamespace(**dict({'is_active': True}, **row), id=id) for id, row in rows_by_id.items()])
+    return hook
+
+
+def parse_query(q):
+    """Search words of a user query; the last one is matched as a prefix (search as you type)"""
+    return re.findall(r'\w+', q.lower())[:10]
+
+
+def _highlight(snippet):
+    return html.escape(snippet).replace(START, '<mark>').replace(STOP, '</mark>')
+
+
+def search(session, q, kinds=None, limit=20, offset=0):
+    """Ranked matches for `q`: [{type, id, slug, title, snippet, score}]"""
+    conn = session.connection()
+    if not supported(conn):
+        raise SearchUnavailable(f'Search is not available on {conn.dialect.name}')
+    words = parse_query(q)
+    if not words:
+        return []
+    kinds = kinds or list(KINDS)
+    params = {'limit': limit, 'offset': offset, 'start': START, 'stop': STOP}
+
+    if conn.dialect.name == 'sqlite':
+        params['match'] = ' '.join(f'"{w}"' for w in words[:-1]) + f' "{words[-1]}"*'
+        codes = ', '.join(str(KINDS[k][0]) for k in kinds)
+        # bm25 column weights: slug 0, title 10, body 1
+        rows = conn.execute(text(
+            "SELECT rowid, slug, title, "
+            f"snippet(search_index, -1, :start, :stop, '…', {SNIPPET_WORDS}) AS snippet, "
+            "-bm25(search_index, 0.0, 10.0, 1.0) AS score "
+            "FROM search_index WHERE search_index MATCH :match "
+            f"AND rowid % 4 IN ({codes}) "
+            "ORDER BY bm25(search_index, 0.0, 10.0, 1.0) LIMIT :limit OFFSET :offset"), params).all()
+        results = [(KIND_CODES[row.rowid % 4], row.rowid // 4, row) for row in rows]
+    else:
+        params['query'] = ' & '.join(words[:-1] + [words[-1] + ':*'])
+        params['kinds'] = list(kinds)
+        rows = conn.execute(text(
+            "SELECT kind, ref_id, slug, title, "
+            "ts_headline('english', title || ' ' || body, q, "
+            f"'StartSel=' || :start || ', StopSel=' || :stop || ', MaxWords={SNIPPET_WORDS}, MinWords=5') AS snippet, "
+            "ts_rank_cd(document, q) AS score "
+            "FROM search_document, to_tsquery('english', :query) AS q "
+            "WHERE document @@ q AND kind = ANY(:kinds) "
+            "ORDER BY score DESC LIMIT :limit OFFSET :offset"), params).all()
+        results = [(row.kind, row.ref_id, row) for row in rows]
+
+    return [{'type': kind, 'id': ref_id, 'slug': row.slug, 'title': row.title,
+             'snippet': _highlight(row.snippet), 'score': round(float(row.score), 6)}
+            for kind, ref_id, row in results]
+
+
+@event.listens_for(Session, 'after_flush')
+def _index_flushed(session, flush_context):
+    changed, deleted = {}, {}
+    for obj in list(session.new) + list(session.dirty):
+        kind = MODEL_KINDS.get(type(obj))
+        if kind:
+            changed.setdefault(kind, []).append(obj)
+    for obj in session.deleted:
+        kind = MODEL_KINDS.get(type(obj))
+        if kind:
+            deleted.setdefault(kind, []).append(obj.id)
+    if not changed and not deleted:
+        return
+    conn = session.connection()
+    if not supported(conn):
+        return
+    for kind, objs in changed.items():
+        index_rows(conn, kind, objs)
+    for kind, ids in deleted.items():
+        _delete(conn, kind, ids)
@@ -0,0 +1,205 @@
+"""Declarative serializers for the JSON API.
+
+A Serializer lists the API fields of a model once. For every field subset it
+generates (and caches) a function that turns a plain row tuple into the API
+dict in a single dict literal, so list endpoints can query just the needed
+columns and skip building ORM instances altogether. Media fields (project
+screenshots, event gallery) are filled in afterwards for all dumped rows
+with one query.
+"""
+import json
+from functools import lru_cache
+from extensions import db
+from models import ContactQuery, PartnershipRequest, JobApplication, Project, Event, Vacancy, Media, Job
+from services.media import media_paths
+
+
+def split_csv(value):
+    return value.split(',') if value else []
+
+
+def isoformat(value):
+    return value.isoformat() if value else None
+
+
+def load_json(value):
+    return json.loads(value) if value else None
+
+
+class Field:
+    def __init__(self, name, column, convert=None):
+        self.name = name
+        self.column = column
+        self.convert = convert
+
+
+class MediaField(Field):
+    """The owner's media paths in order (services/media.py).
+
+    Selects the owner's id, which Serializer replaces with the list of paths.
+    """
+
+    def __init__(self, name, owner_type):
+        super().__init__(name, 'id')
+        self.owner_type = owner_type
+
+
+class Serializer:
+    def __init__(self, model, fields):
+        self.model = model
+        self.fields = {f.name: f for f in fields}
+        self.media_fields = [f for f in fields if isinstance(f, MediaField)]
+        self.compile = lru_cache(maxsize=64)(self._compile)
+        # The full field set is what most requests use; build it up front
+        self.compile(tuple(self.fields))
+
+    def parse_fields(self, value):
+        """Parse a comma-separated ?fields= argument, defaulting to every field"""
+        if not value:
+            return tuple(self.fields)
+        names = tuple(dict.fromkeys(f.strip() for f in value.split(',') if f.strip()))
+        unknown = [n for n in names if n not in self.fields]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+        return names
+
+    def columns(self, names, extra=()):
+        """Columns for `names` in order, followed by any `extra` ones not already selected"""
+        selected = [self.fields[n].column for n in names]
+        selected += [c for c in extra if c not in selected]
+        return [getattr(self.model, c) for c in selected]
+
+    def query(self, names, extra=()):
+        """A row query selecting just the columns behind `names` (plus `extra`)"""
+        return db.session.query(*self.columns(names, extra))
+
+    def _compile(self, names):
+        namespace = {}
+        items = []
+        for i, name in enumerate(names):
+            field = self.fields[name]
+            if field.convert:
+                namespace[f'_convert{i}'] = field.convert
+                items.append(f'{name!r}: _convert{i}(row[{i}])')
+            else:
+                items.append(f'{name!r}: row[{i}]')
+        source = 'def serialize(row):\n    return {' + ', '.join(items) + '}\n'
+        exec(compile(source, f'<serializer {self.model.__name__}>', 'exec'), namespace)
+        return namespace['serialize']
+
+    def fill_media(self, items, names):
+        """Replace the owner ids in the media fields of `items` with their paths; returns `items`"""
+        for field in self.media_fields:
+            if field.name in names and items:
+                paths = media_paths(db.session, field.owner_type, {item[field.name] for item in items})
+                for item in items:
+                    item[field.name] = paths[item[field.name]]
+        return items
+
+    def dump_row(self, row, names=None):
+        return self.dump_rows([row], names)[0]
+
+    def dump_rows(self, rows, names=None):
+        names = names or tuple(self.fields)
+        serialize = self.compile(names)
+        return self.fill_media([serialize(row) for row in rows], names)
+
+    def dump(self, obj, names=None):
+        """Serialize an ORM instance"""
+        names = names or tuple(self.fields)
+        return self.dump_rows([tuple(getattr(obj, self.fields[n].column) for n in names)], names)[0]
+
+
+project_serializer = Serializer(Project, [
+    Field('id', 'id'),
+    Field('title', 'title'),
+    Field('slug', 'slug'),
+    Field('studentName', 'student_name'),
+    Field('college', 'college'),
+    Field('year', 'year'),
+    Field('description', 'description'),
+    Field('fullDescription', 'full_description'),
+    Field('duration', 'duration'),
+    Field('techStack', 'tech_stack', split_csv),
+    Field('thumbnail', 'thumbnail'),
+    MediaField('screenshots', 'project'),
+    Field('liveLink', 'live_link'),
+    Field('repoLink', 'repo_link'),
+    Field('timestamp', 'timestamp', isoformat),
+])
+
+event_serializer = Serializer(Event, [
+    Field('id', 'id'),
+    Field('title', 'title'),
+    Field('slug', 'slug'),
+    Field('category', 'category'),
+    Field('date', 'date'),
+    Field('time', 'time'),
+    Field('venue', 'venue'),
+    Field('organizer', 'organizer'),
+    Field('shortDesc', 'short_desc'),
+    Field('fullDesc', 'full_desc'),
+    Field('mainImage', 'main_image'),
+    MediaField('gallery', 'event'),
+    Field('timestamp', 'timestamp', isoformat),
+])
+
+vacancy_serializer = Serializer(Vacancy, [
+    Field('id', 'id'),
+    Field('title', 'title'),
+    Field('slug', 'slug'),
+    Field('location', 'location'),
+    Field('type', 'type'),
+    Field('description', 'description'),
+    Field('requirements', 'requirements', split_csv),
+    Field('timestamp', 'timestamp', isoformat),
+])
+
+contact_serializer = Serializer(ContactQuery, [
+    Field('id', 'id'),
+    Field('name', 'name'),
+    Field('email', 'email'),
+    Field('type', 'type'),
+    Field('message', 'message'),
+    Field('timestamp', 'timestamp', isoformat),
+])
+
+partnership_serializer = Serializer(PartnershipRequest, [
+    Field('id', 'id'),
+    Field('collegeName', 'college_name'),
+    Field('email', 'email'),
+    Field('phone', 'phone'),
+    Field('timestamp', 'timestamp', isoformat),
+])
+
+application_serializer = Serializer(JobApplication, [
+    Field('id', 'id'),
+    Field('jobRole', 'job_role'),
+    Field('name', 'name'),
+    Field('email', 'email'),
+    Field('resumeLink', 'resume_link'),
+    Field('coverLetter', 'cover_letter'),
+    Field('timestamp', 'timestamp', isoformat),
+])
+
+media_serializer = Serializer(Media, [
+    Field('id', 'id'),
+    Field('path', 'path'),
+    Field('position', 'position'),
+    Field('width', 'width'),
+    Field('height', 'height'),
+    Field('byteSize', 'byte_size'),
+])
+
+job_serializer = Serializer(Job, [
+    Field('id', 'id'),
+    Field('kind', 'kind'),
+    Field('status', 'status'),
+    Field('attempts', 'attempts'),
+    Field('maxAttempts', 'max_attempts'),
+    Field('lastError', 'last_error'),
+    Field('result', 'result', load_json),
+    Field('createdAt', 'created_at', isoformat),
+    Field('startedAt', 'started_at', isoformat),
+    Field('finishedAt', 'finished_at', isoformat),
+])
@@ -0,0 +1,97 @@
+"""URL slugs for projects, events and vacancies.
+
+Slugs are allocated by reading, in one query, every existing slug that is
+either the wanted slug or the wanted slug plus a "-suffix", then picking the
+lowest free "-2", "-3", ... suffix in memory. The prefix match is written as
+a range (slug >= 'base-' AND slug < 'base.') rather than LIKE, so it is served
+by the unique slug index on every database. A concurrent writer can still
+take the same slug between the read and the commit; save_with_slug() and the
+bulk importer catch the resulting IntegrityError and allocate again.
+"""
+import re
+from sqlalchemy import or_, and_
+from sqlalchemy.exc import IntegrityError
+from extensions import db
+
+QUERY_CHUNK = 500  # wanted slugs per query; keeps bound parameters well under SQLite's limit
+MAX_ATTEMPTS = 5
+
+
+def slugify(text):
+    if not text: return ""
+    text = text.lower()
+    text = re.sub(r'[^\w\s-]', '', text)
+    text = re.sub(r'[\s_-]+', '-', text).strip('-')
+    return text
+
+
+def taken_slugs(model, bases):
+    """Existing slugs equal to one of `bases` or starting with base + '-'"""
+    bases = sorted(set(bases))
+    taken = set()
+    for i in range(0, len(bases), QUERY_CHUNK):
+        conditions = []
+        for base in bases[i:i + QUERY_CHUNK]:
+            conditions.append(model.slug == base)
+            # '.' sorts right after '-', so this range is exactly the 'base-' prefix
+            conditions.append(and_(model.slug >= base + '-', model.slug < base + '.'))
+        taken.update(slug for (slug,) in db.session.query(model.slug).filter(or_(*conditions)))
+    return taken
+
+
+def allocate_batch(model, wanted):
+    """Unique slugs for a list of wanted slugs (duplicates within the list included)"""
+    taken = taken_slugs(model, wanted)
+    next_suffix = {}
+    slugs = []
+    for base in wanted:
+        slug = base
+        if slug in taken:
+            n = next_suffix.get(base, 2)
+            while f'{base}-{n}' in taken:
+                n += 1
+            slug = f'{base}-{n}'
+            next_suffix[base] = n + 1
+        taken.add(slug)
+        slugs.append(slug)
+    return slugs
+
+
+def allocate(model, wanted):
+    return allocate_batch(model, [wanted])[0]
+
+
+def wanted_slug(model, slug=None, title=None):
+    """The slug to ask for: an explicit slug, else the slugified title, else the table name"""
+    return slugify(slug) or slugify(title) or model.__tablename__
+
+
+def save_with_slug(obj, wanted, then=None):
+    """Give `obj` a unique slug based on `wanted` and commit it.
+
+    `then(obj)`, if given, runs in the same savepoint once `obj` has its id,
+    to add rows that point at it (e.g. its media).
+
+    If a concurrent writer commits the same slug first, the unique index
+    raises IntegrityError; the slug is then allocated again and the insert
+    retried. Only the insert is undone, inside a savepoint, so whatever the
+    caller already added to the transaction (stored uploads, queued jobs)
+    is kept. IntegrityErrors that are not about the slug are re-raised.
+    """
+    model = type(obj)
+    for attempt in range(MAX_ATTEMPTS):
+        try:
+            with db.session.begin_nested():
+                obj.slug = allocate(model, wanted)
+                db.session.add(obj)
+                if then is not None:
+                    db.session.flush()
+                    then(obj)
+        except IntegrityError:
+            slug_taken = db.session.query(model.id).filter(model.slug == obj.slug).first() is not None
+            if not slug_taken or attempt == MAX_ATTEMPTS - 1:
+                db.session.rollback()
+                raise
+            continue
+        db.session.commit()
+        return obj
@@ -0,0 +1,188 @@
+"""Static file serving with long-lived caching.
+
+StaticFiles replaces Flask's handler for /static/<filename>:
+
+* Files whose URL changes whenever their content does are sent with
+  `Cache-Control: public, max-age=31536000, immutable`. These are
+  content-addressed uploads (uploads/blobs/, see services/storage.py), their
+  image variants, and the fingerprinted CSS/JS written by `flask assets
+  build`. Everything else gets STATIC_MAX_AGE and is revalidated through
+  ETag / Last-Modified.
+* When the client accepts it and a precompressed copy exists next to the
+  file (<file>.br, <file>.gz), that copy is sent with Content-Encoding.
+* Range requests are answered by send_file, which seeks to the range instead
+  of reading the whole file.
+* Static responses do not vary on Cookie, so shared caches can store them.
+* With STATIC_OFFLOAD=x-sendfile or x-accel the response carries only
+  headers and an X-Sendfile / X-Accel-Redirect header, and the front web
+  server sends the file.
+
+`flask assets build` copies static/css and static/js to static/dist with the
+content hash in the name (admin.css -> admin.3f9a0c1b2d4e.css), writes .gz
+and .br (if the brotli package is installed) copies and a manifest.
+url_for('static', filename='css/admin.css') then points at the fingerprinted
+copy, so templates need no changes.
+"""
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import shutil
+import click
+from flask import abort, current_app, request, send_file
+from flask.cli import AppGroup
+from flask.sessions import SecureCookieSessionInterface
+from werkzeug.security import safe_join
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+IMMUTABLE = 'public, max-age=31536000, immutable'
+IMMUTABLE_PATHS = re.compile(
+    r'^(uploads/blobs/[0-9a-f]{2}/[0-9a-f]{64}(-\d+w)?\.\w+'  # content-addressed uploads and their variants
+    r'|dist/.+\.[0-9a-f]{12}\.\w+)$')                        # fingerprinted assets
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+BUILD_DIRS = ('css', 'js')
+DIST_DIR = 'dist'
+MIN_COMPRESS_SIZE = 256
+
+
+class SessionInterface(SecureCookieSessionInterface):
+    """The default cookie session, minus the `Vary: Cookie` it adds to static files.
+
+    Flask-Login looks at the session on every response, which makes Flask
+    vary every response on Cookie and keeps shared caches from storing
+    static files once for all visitors.
+    """
+
+    def save_session(self, app, session, response):
+        if request.endpoint == 'static' and not session.modified:
+            return
+        super().save_session(app, session, response)
+
+
+class StaticFiles:
+    def __init__(self, app=None):
+        self.manifest = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('STATIC_MAX_AGE', int(os.environ.get('STATIC_MAX_AGE', 3600)))
+        app.config.setdefault('STATIC_OFFLOAD', os.environ.get('STATIC_OFFLOAD', '').lower())  # '', x-sendfile, x-accel
+        app.config.setdefault('STATIC_ACCEL_PREFIX', os.environ.get('STATIC_ACCEL_PREFIX', '/internal-static/'))
+        if app.config['STATIC_OFFLOAD'] == 'x-sendfile':
+            app.config['USE_X_SENDFILE'] = True
+
+        self.manifest = load_manifest(app.static_folder)
+        app.view_functions['static'] = self.send
+        app.session_interface = SessionInterface()
+        app.url_defaults(self._fingerprint)
+        app.extensions['static_files'] = self
+
+    def _fingerprint(self, endpoint, values):
+        if endpoint == 'static' and values.get('filename') in self.manifest:
+            values['filename'] = self.manifest[values['filename']]
+
+    def send(self, filename):
+        config = current_app.config
+        path = safe_join(current_app.static_folder, filename)
+        if path is None or not os.path.isfile(path):
+            abort(404)
+        mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+
+        encoding, sent = None, path
+        # A range refers to the bytes of the encoded file, so ranges are served from the original
+        if 'Range' not in request.headers:
+            for name, ext in ENCODINGS:
+                if request.accept_encodings[name] and os.path.isfile(path + ext):
+                    encoding, sent = name, path + ext
+                    break
+
+        if config['STATIC_OFFLOAD'] == 'x-accel':
+            response = current_app.response_class(mimetype=mimetype)
+            response.headers['X-Accel-Redirect'] = config['STATIC_ACCEL_PREFIX'] + os.path.relpath(
+                sent, current_app.static_folder).replace(os.sep, '/')
+        else:
+            response = send_file(sent, mimetype=mimetype, conditional=True, max_age=config['STATIC_MAX_AGE'])
+
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        if any(os.path.isfile(path + ext) for _, ext in ENCODINGS):
+            response.vary.add('Accept-Encoding')
+        if IMMUTABLE_PATHS.match(filename.replace(os.sep, '/')):
+            response.headers['Cache-Control'] = IMMUTABLE
+        elif config['STATIC_OFFLOAD'] == 'x-accel':
+            response.headers['Cache-Control'] = f"public, max-age={config['STATIC_MAX_AGE']}"
+        return response
+
+
+def load_manifest(static_folder):
+    try:
+        with open(os.path.join(static_folder, DIST_DIR, 'manifest.json'), encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def precompress(path):
+    """Write <path>.gz and, with brotli installed, <path>.br when that saves space"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    if len(data) < MIN_COMPRESS_SIZE:
+        return
+    copies = {'.gz': gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        copies['.br'] = brotli.compress(data, quality=11)
+    for ext, compressed in copies.items():
+        if len(compressed) < len(data):
+            with open(path + ext, 'wb') as f:
+                f.write(compressed)
+
+
+def build(static_folder):
+    """Fingerprint and precompress static/css and static/js into static/dist; returns the manifest"""
+    dist = os.path.join(static_folder, DIST_DIR)
+    if os.path.isdir(dist):
+        shutil.rmtree(dist)
+    manifest = {}
+    for directory in BUILD_DIRS:
+        for root, _, files in os.walk(os.path.join(static_folder, directory)):
+            for name in sorted(files):
+                source = os.path.join(root, name)
+                rel = os.path.relpath(source, static_folder).replace(os.sep, '/')
+                with open(source, 'rb') as f:
+                    digest = hashlib.sha256(f.read()).hexdigest()[:12]
+                stem, ext = os.path.splitext(rel)
+                target = f'{DIST_DIR}/{stem}.{digest}{ext}'
+                os.makedirs(os.path.dirname(os.path.join(static_folder, target)), exist_ok=True)
+                shutil.copyfile(source, os.path.join(static_folder, target))
+                precompress(os.path.join(static_folder, target))
+                manifest[rel] = target
+    with open(os.path.join(dist, 'manifest.json'), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+
+assets_cli = AppGroup('assets', help='Fingerprinted, precompressed static assets.')
+
+
+@assets_cli.command('build')
+def build_command():
+    """Fingerprint and precompress static/css and static/js."""
+    manifest = build(current_app.static_folder)
+    current_app.extensions['static_files'].manifest = manifest
+    click.echo(f"Built {len(manifest)} assets into static/{DIST_DIR}"
+               f"{'' if brotli else ' (gzip only: install brotli for .br copies)'}.")
+
+
+@assets_cli.command('clean')
+def clean_command():
+    """Remove static/dist; url_for falls back to the plain files."""
+    shutil.rmtree(os.path.join(current_app.static_folder, DIST_DIR), ignore_errors=True)
+    current_app.extensions['static_files'].manifest = {}
+    click.echo(f"Removed static/{DIST_DIR}.")
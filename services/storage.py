@@ -0,0 +1,321 @@
+"""Content-addressed storage for uploaded images.
+
+store() takes an upload that was hashed while it was written to a
+temporary file in STORAGE_TEMP_DIR (HashingFile, see services/uploads.py),
+outside the publicly served static tree, and moves it to
+/static/uploads/blobs/<first two hex digits>/<sha256>.<ext>. If a blob with
+the same content already exists the new copy is discarded, so an image
+uploaded as both thumbnail and screenshot, or re-uploaded on every edit, is
+kept once. A blob's URL never changes content, so it can be served
+with far-future cache headers.
+
+The blob table counts, per blob, how many project thumbnails, event main
+images and media rows (screenshots and gallery images, services/media.py)
+point at it. Counts are adjusted in the same transaction as the owner row,
+by a before_flush listener for ORM writes and by inserted_hook() for the
+bulk importer. Blobs also keep the byte size and image dimensions, read
+when the file is stored, which media rows copy when they are created.
+After a commit that left blobs unreferenced, those blobs are deleted along
+with their image variants. Blobs stored in the last STORAGE_GC_GRACE
+seconds are spared, because a form that is still being submitted may be
+about to reference them; `flask storage gc` removes them later, together
+with files whose upload transaction was rolled back.
+"""
+import hashlib
+import os
+import shutil
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import bindparam, delete, event, insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session, attributes
+from werkzeug.exceptions import RequestEntityTooLarge
+from werkzeug.utils import secure_filename
+from extensions import db
+from models import Project, Event, Media, Blob, ImageVariant
+from services.media import OWNERS, local_file, media_paths, split_paths
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+BLOB_PREFIX = '/static/uploads/blobs/'
+CHUNK_SIZE = 64 * 1024
+# Image fields that reference uploads
+REFERENCES = {
+    Project: ('thumbnail',),
+    Event: ('main_image',),
+    Media: ('path',),
+}
+
+
+def load_config(app):
+    app.config.setdefault('STORAGE_GC_GRACE', int(os.environ.get('STORAGE_GC_GRACE', 600)))
+    app.config.setdefault('STORAGE_TEMP_DIR', os.environ.get('STORAGE_TEMP_DIR', os.path.join(app.instance_path, 'uploads', 'tmp')))
+
+
+def blob_path(digest, ext):
+    return f'{BLOB_PREFIX}{digest[:2]}/{digest}{ext}'
+
+
+def image_size(filename):
+    """(width, height) of the image file `filename`, (None, None) if it cannot be read"""
+    if Image is None or not filename or not os.path.isfile(filename):
+        return None, None
+    try:
+        with Image.open(filename) as image:  # reads the header only
+            return image.size
+    except Exception:
+        return None, None
+
+
+def _upsert(session, row):
+    # Refresh stored_at when the blob exists, so the GC grace period restarts for the new upload
+    table = Blob.__table__
+    dialect = session.connection().dialect.name
+    if dialect in ('sqlite', 'postgresql'):
+        stmt = (sqlite if dialect == 'sqlite' else postgresql).insert(table).values(row)
+        session.execute(stmt.on_conflict_do_update(index_elements=['hash'], set_={'stored_at': row['stored_at']}))
+    elif session.execute(update(table).where(table.c.hash == row['hash']).values(stored_at=row['stored_at'])).rowcount == 0:
+        session.execute(insert(table).values(row))
+
+
+class HashingFile:
+    """A temporary file in STORAGE_TEMP_DIR that hashes and counts what is written to it.
+
+    Writing more than `limit` bytes raises RequestEntityTooLarge. Closing the
+    file without claim() deletes it.
+    """
+
+    def __init__(self, limit=None):
+        directory = current_app.config['STORAGE_TEMP_DIR']
+        os.makedirs(directory, exist_ok=True)
+        fd, self.name = tempfile.mkstemp(dir=directory, prefix='.upload-')
+        self._file = os.fdopen(fd, 'w+b')
+        self._hash = hashlib.sha256()
+        self.size = 0
+        self.limit = limit
+        self.claimed = False
+
+    def write(self, data):
+        self.size += len(data)
+        if self.limit and self.size > self.limit:
+            raise RequestEntityTooLarge(f'Files may be at most {self.limit // (1024 * 1024)} MB')
+        self._hash.update(data)
+        return self._file.write(data)
+
+    def __getattr__(self, name):
+        # read, seek, tell, flush, ... of the underlying file
+        return getattr(self._file, name)
+
+    def claim(self):
+        """Close the file and take it over: returns (filename, sha256 hex digest, size)"""
+        self._file.close()
+        self.claimed = True
+        return self.name, self._hash.hexdigest(), self.size
+
+    def close(self):
+        self._file.close()
+        if not self.claimed and os.path.exists(self.name):
+            os.remove(self.name)
+
+
+def place(filename, digest, size, ext, session=None):
+    """Move a fully written file into the blob store; returns (path, True if the content is new)"""
+    session = session or db.session
+    width, height = image_size(filename)
+    try:
+        existing = session.execute(select(Blob.__table__.c.path).where(Blob.__table__.c.hash == digest)).scalar()
+        if existing and os.path.isfile(local_file(existing)):
+            os.remove(filename)
+            path, created = existing, False
+        else:
+            path, created = existing or blob_path(digest, ext), True
+            target = local_file(path)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            shutil.move(filename, target)  # a rename unless the file comes from another filesystem
+    except Exception:
+        if os.path.exists(filename):
+            os.remove(filename)
+        raise
+    _upsert(session, {'hash': digest, 'path': path, 'byte_size': size, 'width': width, 'height': height,
+                      'ref_count': 0, 'stored_at': datetime.utcnow()})
+    return path, created
+
+
+def file_ext(filename):
+    return os.path.splitext(secure_filename(filename or ''))[1].lower()
+
+
+def store(file, session=None):
+    """Save an uploaded FileStorage in the blob store; returns (path, True if the content is new)"""
+    stream = file.stream
+    if not isinstance(stream, HashingFile):
+        # Not parsed by UploadRequest (services/uploads.py): copy it through a HashingFile
+        stream = HashingFile()
+        try:
+            shutil.copyfileobj(file.stream, stream, CHUNK_SIZE)
+        except Exception:
+            stream.close()
+            raise
+    return place(*stream.claim(), file_ext(file.filename), session)
+
+
+def _blob_paths(value):
+    return [p for p in split_paths(value) if p.startswith(BLOB_PREFIX)]
+
+
+def adjust_refs(conn, added, removed):
+    """Apply reference count changes for Counters of blob paths"""
+    deltas = Counter(added)
+    deltas.subtract(removed)
+    changes = [{'blob_path': path, 'delta': delta} for path, delta in deltas.items() if delta]
+    if changes:
+        table = Blob.__table__
+        conn.execute(update(table).where(table.c.path == bindparam('blob_path'))
+                     .values(ref_count=table.c.ref_count + bindparam('delta')), changes)
+    return [path for path, delta in deltas.items() if delta < 0]
+
+
+def inserted_hook(owner_type):
+    """BulkImporter hook that counts the references of freshly inserted owners"""
+    model, field = OWNERS[owner_type]
+    columns = REFERENCES[model]
+
+    def hook(conn, rows_by_id):
+        paths = [p for row in rows_by_id.values() for c in columns for p in _blob_paths(row.get(c))]
+        # The media paths the importer hands to media.inserted_hook()
+        paths += [p for row in rows_by_id.values() for p in row.get(field) or () if p.startswith(BLOB_PREFIX)]
+        adjust_refs(conn, Counter(paths), Counter())
+    return hook
+
+
+def _old_values(session, obj, columns):
+    model = type(obj)
+    row = session.execute(select(*(getattr(model, c) for c in columns)).where(model.id == obj.id)).first()
+    return dict(zip(columns, row)) if row else {}
+
+
+@event.listens_for(Session, 'before_flush')
+def _count_flushed(session, flush_context, instances):
+    added, removed = Counter(), Counter()
+    for obj in session.new:
+        for column in REFERENCES.get(type(obj), ()):
+            added.update(_blob_paths(getattr(obj, column)))
+    for obj in session.dirty:
+        columns = REFERENCES.get(type(obj), ())
+        histories = {c: attributes.get_history(obj, c) for c in columns}
+        changed = [c for c, h in histories.items() if h.has_changes()]
+        if not changed:
+            continue
+        unloaded = [c for c in changed if not histories[c].deleted]
+        old = _old_values(session, obj, unloaded) if unloaded else {}
+        for column in changed:
+            history = histories[column]
+            added.update(p for value in history.added for p in _blob_paths(value))
+            previous = history.deleted or [old.get(column)]
+            removed.update(p for value in previous for p in _blob_paths(value))
+    for obj in session.deleted:
+        for column in REFERENCES.get(type(obj), ()):
+            removed.update(_blob_paths(getattr(obj, column)))
+    # Media rows of deleted owners are removed after the flush (services/media.py)
+    for owner_type, (model, _) in OWNERS.items():
+        deleted = [obj.id for obj in session.deleted if isinstance(obj, model)]
+        if deleted:
+            removed.update(p for paths in media_paths(session, owner_type, deleted).values()
+                           for p in paths if p.startswith(BLOB_PREFIX))
+    if added or removed:
+        unreferenced = adjust_refs(session.connection(), added, removed)
+        session.info.setdefault('unreferenced_blobs', set()).update(unreferenced)
+
+
+def collect(conn, paths=None, grace=0):
+    """Delete unreferenced blobs (all, or those among `paths`) stored more than `grace` seconds ago.
+
+    Their files and image variants go too. Returns the number of blobs deleted.
+    """
+    table, variants = Blob.__table__, ImageVariant.__table__
+    query = select(table.c.hash, table.c.path).where(
+        table.c.ref_count <= 0, table.c.stored_at < datetime.utcnow() - timedelta(seconds=grace))
+    if paths is not None:
+        query = query.where(table.c.path.in_(list(paths)))
+    blobs = conn.execute(query).all()
+    for digest, path in blobs:
+        variant_paths = conn.execute(select(variants.c.path).where(variants.c.source_path == path)).scalars().all()
+        conn.execute(delete(variants).where(variants.c.source_path == path))
+        conn.execute(delete(table).where(table.c.hash == digest, table.c.ref_count <= 0))
+        for p in [path] + variant_paths:
+            filename = local_file(p)
+            if filename and os.path.exists(filename):
+                os.remove(filename)
+    return len(blobs)
+
+
+@event.listens_for(Session, 'after_commit')
+def _collect_committed(session):
+    paths = session.info.pop('unreferenced_blobs', None)
+    if paths:
+        try:
+            with db.engine.begin() as conn:
+                collect(conn, paths, current_app.config['STORAGE_GC_GRACE'])
+        except Exception as e:
+            print(f"Blob cleanup failed (run `flask storage gc`): {e}")
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_unreferenced(session):
+    session.info.pop('unreferenced_blobs', None)
+
+
+storage_cli = AppGroup('storage', help='Content-addressed upload storage.')
+
+
+@storage_cli.command('gc')
+def gc_command():
+    """Delete unreferenced blobs and leftover upload files."""
+    grace = current_app.config['STORAGE_GC_GRACE']
+    with db.engine.begin() as conn:
+        count = collect(conn, grace=grace)
+        known = set(conn.execute(select(Blob.__table__.c.hash)).scalars())
+    # Files without a blob row: temp files of interrupted uploads, uploads whose transaction rolled back
+    orphans = 0
+    cutoff = time.time() - grace
+    for directory, _, files in os.walk(local_file(BLOB_PREFIX)):
+        for name in files:
+            filename = os.path.join(directory, name)
+            if name.split('.')[0].split('-')[0] in known and not name.startswith('.'):
+                continue
+            if os.path.getmtime(filename) < cutoff:
+                os.remove(filename)
+                orphans += 1
+    temp_dir = current_app.config['STORAGE_TEMP_DIR']
+    for name in os.listdir(temp_dir) if os.path.isdir(temp_dir) else ():
+        filename = os.path.join(temp_dir, name)
+        if name.startswith('.upload-') and os.path.getmtime(filename) < cutoff:
+            os.remove(filename)
+            orphans += 1
+    from services.uploads import expire
+    expired = expire(current_app.config['UPLOAD_RESUME_DIR'], current_app.config['UPLOAD_RESUME_TTL'])
+    click.echo(f"Deleted {count} unreferenced blobs, {orphans} orphaned files and {expired} expired resumable uploads.")
+
+
+@storage_cli.command('recount')
+def recount_command():
+    """Recompute every blob's reference count from projects, events and media."""
+    counts = Counter()
+    for model, columns in REFERENCES.items():
+        for row in db.session.query(*(getattr(model, c) for c in columns)):
+            counts.update(p for value in row for p in _blob_paths(value))
+    table = Blob.__table__
+    db.session.execute(update(table).values(ref_count=0))
+    if counts:
+        db.session.execute(update(table).where(table.c.path == bindparam('blob_path')).values(ref_count=bindparam('refs')),
+                           [{'blob_path': path, 'refs': refs} for path, refs in counts.items()])
+    db.session.commit()
+    click.echo(f"Counted {sum(counts.values())} references to {len(counts)} blobs.")
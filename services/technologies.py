@@ -0,0 +1,114 @@
+"""Normalized project tech stacks.
+
+Project.tech_stack stays the comma-separated value the API returns as
+techStack; the technology and project_technology tables mirror it so that
+projects can be filtered by technology through an index instead of scanning
+and splitting every row. The mirror is updated in the same transaction as the
+project: by an after_flush listener for ORM writes and by sync_projects()
+for code that inserts rows directly (bulk import, migrations).
+"""
+from sqlalchemy import delete, event, func, insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session, attributes
+from models import Project, Technology, ProjectTechnology
+
+CHUNK = 500  # ids / keys per IN (...) list
+
+
+def tech_key(name):
+    return name.strip().lower()[:100]
+
+
+def parse_stack(value):
+    """{key: display name} for a comma-separated tech stack, in order and without duplicates"""
+    techs = {}
+    for name in (value or '').split(','):
+        name = name.strip()
+        if name:
+            techs.setdefault(tech_key(name), name[:100])
+    return techs
+
+
+def _insert_missing(conn, table):
+    # Two writers may add the same new technology at once; let the second one skip it
+    if conn.dialect.name == 'sqlite':
+        return sqlite.insert(table).on_conflict_do_nothing()
+    if conn.dialect.name == 'postgresql':
+        return postgresql.insert(table).on_conflict_do_nothing()
+    return insert(table)
+
+
+def technology_ids(conn, techs):
+    """{key: id} for the technologies in {key: name}, creating the missing ones"""
+    table = Technology.__table__
+    keys = list(techs)
+    ids = {}
+
+    def load():
+        for i in range(0, len(keys), CHUNK):
+            ids.update(conn.execute(select(table.c.key, table.c.id).where(table.c.key.in_(keys[i:i + CHUNK]))).all())
+
+    load()
+    missing = [{'key': key, 'name': techs[key]} for key in keys if key not in ids]
+    if missing:
+        conn.execute(_insert_missing(conn, table), missing)
+        load()
+    return ids
+
+
+def remove_projects(conn, project_ids):
+    links = ProjectTechnology.__table__
+    project_ids = list(project_ids)
+    for i in range(0, len(project_ids), CHUNK):
+        conn.execute(delete(links).where(links.c.project_id.in_(project_ids[i:i + CHUNK])))
+
+
+def sync_projects(conn, stacks):
+    """Rewrite the technology links of the projects in {project_id: tech_stack}"""
+    if not stacks:
+        return
+    parsed = {project_id: parse_stack(stack) for project_id, stack in stacks.items()}
+    techs = {}
+    for project_techs in parsed.values():
+        for key, name in project_techs.items():
+            techs.setdefault(key, name)
+    ids = technology_ids(conn, techs) if techs else {}
+
+    remove_projects(conn, parsed)
+    links = [{'technology_id': ids[key], 'project_id': project_id}
+             for project_id, project_techs in parsed.items() for key in project_techs]
+    if links:
+        conn.execute(insert(ProjectTechnology.__table__), links)
+
+
+def sync_inserted(conn, rows_by_id):
+    """BulkImporter hook: link freshly inserted project rows"""
+    sync_projects(conn, {project_id: row['tech_stack'] for project_id, row in rows_by_id.items()})
+
+
+def filter_by_technologies(query, names):
+    """Restrict a Project query to projects that use every technology in `names`"""
+    keys = list(dict.fromkeys(tech_key(name) for name in names if name.strip()))
+    if not keys:
+        return query
+    links, techs = ProjectTechnology.__table__, Technology.__table__
+    matching = select(links.c.project_id) \
+        .join(techs, techs.c.id == links.c.technology_id) \
+        .where(techs.c.key.in_(keys)) \
+        .group_by(links.c.project_id) \
+        .having(func.count() == len(keys))
+    return query.filter(Project.id.in_(matching))
+
+
+@event.listens_for(Session, 'after_flush')
+def _sync_flushed(session, flush_context):
+    stacks = {
+        obj.id: obj.tech_stack
+        for obj in list(session.new) + list(session.dirty)
+        if isinstance(obj, Project) and (obj in session.new or attributes.get_history(obj, 'tech_stack').has_changes())
+    }
+    deleted = [obj.id for obj in session.deleted if isinstance(obj, Project)]
+    if stacks or deleted:
+        conn = session.connection()
+        sync_projects(conn, stacks)
+        remove_projects(conn, deleted)
@@ -0,0 +1,161 @@
+"""Upload paths that keep memory and temp disk bounded per file.
+
+UploadRequest replaces Werkzeug's stream factory for multipart file parts
+sent to the admin panel by a logged-in admin. Werkzeug's default buffers
+each part in a SpooledTemporaryFile, after which save_file copied it again.
+Here each part is written, as the parser reads it, straight into a
+HashingFile in STORAGE_TEMP_DIR (under instance/), which hashes it and
+enforces UPLOAD_MAX_FILE_SIZE along the way. storage.store() then only has
+to rename it. A request that is rejected or fails half way deletes its
+files when it is closed.
+
+Large gallery batches can also be uploaded resumably, one file at a time,
+through /admin/uploads:
+
+    POST /admin/uploads         {"filename", "size"}  -> {"id", "offset": 0, "chunkSize"}
+    PUT  /admin/uploads/<id>    raw bytes, Upload-Offset header -> {"offset"}, once complete {"path"}
+    GET  /admin/uploads/<id>    -> {"offset", "size"}, where to resume after a dropped connection
+
+Partial files live in UPLOAD_RESUME_DIR and are expired after
+UPLOAD_RESUME_TTL seconds by `flask storage gc`. A chunk is appended under an
+exclusive lock and only at the current end of the file, so a retried or
+duplicated chunk is refused with the offset to continue from.
+"""
+import hashlib
+import json
+import os
+import re
+import time
+import uuid
+from flask import Request, current_app
+from flask_login import current_user
+from services.locks import locked
+from services.storage import CHUNK_SIZE, HashingFile, file_ext, place
+
+ID_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+
+
+class UploadError(ValueError):
+    pass
+
+
+class OffsetMismatch(Exception):
+    def __init__(self, offset):
+        super().__init__(f'Upload is at offset {offset}')
+        self.offset = offset
+
+
+def load_config(app):
+    app.config.setdefault('UPLOAD_MAX_FILE_SIZE', int(os.environ.get('UPLOAD_MAX_FILE_SIZE', 16 * 1024 * 1024)))
+    app.config.setdefault('UPLOAD_CHUNK_SIZE', int(os.environ.get('UPLOAD_CHUNK_SIZE', 4 * 1024 * 1024)))
+    app.config.setdefault('UPLOAD_RESUME_DIR', os.environ.get('UPLOAD_RESUME_DIR', os.path.join(app.instance_path, 'uploads')))
+    app.config.setdefault('UPLOAD_RESUME_TTL', int(os.environ.get('UPLOAD_RESUME_TTL', 24 * 3600)))
+
+
+class UploadRequest(Request):
+    """Request class that streams the multipart file parts of admin uploads into HashingFiles"""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        if self.blueprint != 'admin' or not current_user.is_authenticated:
+            # Anonymous and public API requests never get to write into the upload storage
+            return super()._get_file_stream(total_content_length, content_type, filename, content_length)
+        stream = HashingFile(current_app.config['UPLOAD_MAX_FILE_SIZE'])
+        self.__dict__.setdefault('_upload_streams', []).append(stream)
+        return stream
+
+    def close(self):
+        super().close()
+        # Also the parts of a form whose parsing was aborted (e.g. a file over the size limit)
+        for stream in self.__dict__.get('_upload_streams', ()):
+            stream.close()
+
+
+def _files(directory, upload_id):
+    if not ID_PATTERN.match(upload_id):
+        raise UploadError('Invalid upload id')
+    return os.path.join(directory, f'{upload_id}.part'), os.path.join(directory, f'{upload_id}.json')
+
+
+def start(directory, filename, size, limit):
+    """Begin a resumable upload of `size` bytes; returns its id"""
+    if not isinstance(size, int) or size <= 0:
+        raise UploadError('size must be a positive integer')
+    if size > limit:
+        raise UploadError(f'Files may be at most {limit // (1024 * 1024)} MB')
+    if not file_ext(filename):
+        raise UploadError('filename must have an extension')
+    os.makedirs(directory, exist_ok=True)
+    upload_id = uuid.uuid4().hex
+    part, meta = _files(directory, upload_id)
+    open(part, 'xb').close()
+    with open(meta, 'w', encoding='utf-8') as f:
+        json.dump({'filename': filename, 'size': size}, f)
+    return upload_id
+
+
+def status(directory, upload_id):
+    """{'id', 'filename', 'size', 'offset'} of an upload, None if unknown or expired"""
+    part, meta = _files(directory, upload_id)
+    try:
+        with open(meta, encoding='utf-8') as f:
+            info = json.load(f)
+        offset = os.path.getsize(part)
+    except FileNotFoundError:
+        return None
+    return dict(info, id=upload_id, offset=offset)
+
+
+def append(directory, upload_id, offset, stream):
+    """Append `stream` at `offset`; returns the new offset. Raises OffsetMismatch if offset is not the end."""
+    info = status(directory, upload_id)
+    if info is None:
+        raise FileNotFoundError(upload_id)
+    part, _ = _files(directory, upload_id)
+    with open(part, 'ab') as f, locked(f):
+        end = os.fstat(f.fileno()).st_size
+        if offset != end:
+            raise OffsetMismatch(end)
+        while True:
+            chunk = stream.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            if end + len(chunk) > info['size']:
+                f.truncate(offset)
+                raise UploadError(f"Chunk goes past the declared size of {info['size']} bytes")
+            f.write(chunk)
+            end += len(chunk)
+    return end
+
+
+def finish(directory, upload_id, session=None):
+    """Move a complete upload into the blob store; returns (path, True if the content is new)"""
+    info = status(directory, upload_id)
+    part, meta = _files(directory, upload_id)
+    if info is None or info['offset'] != info['size']:
+        raise UploadError('Upload is not complete')
+    digest = hashlib.sha256()
+    with open(part, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    result = place(part, digest.hexdigest(), info['size'], file_ext(info['filename']), session)
+    os.remove(meta)
+    return result
+
+
+def expire(directory, max_age):
+    """Delete resumable uploads untouched for `max_age` seconds; returns how many"""
+    if not os.path.isdir(directory):
+        return 0
+    cutoff = time.time() - max_age
+    expired = 0
+    for name in os.listdir(directory):
+        filename = os.path.join(directory, name)
+        if name.endswith('.json') and os.path.getmtime(filename) < cutoff:
+            part = filename[:-len('.json')] + '.part'
+            if os.path.exists(part) and os.path.getmtime(part) >= cutoff:
+                continue  # still receiving chunks
+            for f in (filename, part):
+                if os.path.exists(f):
+                    os.remove(f)
+            expired += 1
+    return expired
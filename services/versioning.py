@@ -0,0 +1,76 @@
+"""Conditional GET (ETag / Last-Modified) for the content API.
+
+Each versioned table has a row in ContentVersion (seeded by migration 0003)
+whose counter is bumped in the same transaction as any write to the table. Validators are derived from
+that row alone, so a 304 is answered without loading any content rows.
+"""
+import hashlib
+from datetime import datetime, timezone
+from functools import wraps
+from flask import current_app, make_response, request
+from extensions import db
+from models import ContentVersion
+from services.changes import before_commit
+
+_versioned_tables = set()
+
+
+@before_commit
+def _bump_versions(session, tables):
+    tables = tables & _versioned_tables
+    if not tables:
+        return
+    table = ContentVersion.__table__
+    session.connection().execute(
+        table.update()
+        .where(table.c.table_name.in_(sorted(tables)))
+        .values(version=table.c.version + 1, updated_at=datetime.utcnow())
+    )
+
+
+def get_versions(tables):
+    """Return ({table: version}, last updated_at) for `tables`"""
+    rows = db.session.query(ContentVersion.table_name, ContentVersion.version, ContentVersion.updated_at) \
+        .filter(ContentVersion.table_name.in_(tables)).all()
+    versions = {name: version for name, version, _ in rows}
+    updated = [updated_at for _, _, updated_at in rows if updated_at]
+    return versions, (max(updated) if updated else None)
+
+
+def conditional(*models):
+    """Add ETag/Last-Modified to a GET view and answer 304 when the client is current"""
+    tables = tuple(sorted(m.__tablename__ for m in models))
+    _versioned_tables.update(tables)
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            versions, last_modified = get_versions(tables)
+            key = '|'.join([request.path, repr(sorted(request.args.items(multi=True)))] +
+                           [f"{t}:{versions.get(t, 0)}" for t in tables])
+            etag = hashlib.sha1(key.encode()).hexdigest()
+            if last_modified:
+                last_modified = last_modified.replace(microsecond=0, tzinfo=timezone.utc)
+
+            not_modified = False
+            if request.if_none_match:
+                # Weak comparison: compressed responses carry the ETag as W/"..." (services/compression.py)
+                not_modified = request.if_none_match.contains_weak(etag)
+            elif request.if_modified_since and last_modified:
+                not_modified = last_modified <= request.if_modified_since
+
+            if not_modified:
+                response = current_app.response_class(status=304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag)
+            if last_modified:
+                response.last_modified = last_modified
+            # Let browsers keep the body but revalidate it on every use
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+        return wrapper
+    return decorator
@@ -52,52 +52,63 @@ document.addEventListener('DOMContentLoaded', function () {
         }
     }
 
-    // Chart.js Initialization (Dummy Data)
-    if (document.getElementById('marketChart')) {
+    // Chart.js Initialization (submission stats rendered by the dashboard view)
+    const statsEl = document.getElementById('dashboardStats');
+    const stats = statsEl ? JSON.parse(statsEl.textContent) : null;
+    const series = [
+        { key: 'contacts', label: 'Contact Messages', color: '#e74a3b' },
+        { key: 'partnerships', label: 'Partnership Requests', color: '#1cc88a' },
+        { key: 'applications', label: 'Job Applications', color: '#f6c23e' }
+    ];
+
+    if (stats && document.getElementById('marketChart')) {
         const ctx = document.getElementById('marketChart').getContext('2d');
         const marketChart = new Chart(ctx, {
             type: 'line',
             data: {
-                labels: ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun'],
-                datasets: [{
-                    label: 'Website Visits',
-                    data: [120, 190, 300, 500, 200, 350],
-                    borderColor: '#4e73df',
-                    backgroundColor: 'rgba(78, 115, 223, 0.1)',
+                labels: stats.days.map(d => d.slice(5)),
+                datasets: series.map(s => ({
+                    label: s.label,
+                    data: stats.daily[s.key],
+                    borderColor: s.color,
+                    backgroundColor: 'transparent',
                     borderWidth: 2,
-                    fill: true
-                }]
+                    tension: 0.3
+                }))
             },
             options: {
                 responsive: true,
                 maintainAspectRatio: false,
                 plugins: {
-                    legend: { display: false }
+                    legend: { position: 'bottom' }
                 },
                 scales: {
-                    y: { beginAtZero: true }
+                    y: { beginAtZero: true, ticks: { precision: 0 } }
                 }
             }
         });
     }
 
-    if (document.getElementById('sourcesChart')) {
+    if (stats && document.getElementById('sourcesChart')) {
         const ctx2 = document.getElementById('sourcesChart').getContext('2d');
         const sourcesChart = new Chart(ctx2, {
-            type: 'doughnut',
+            type: 'bar',
             data: {
-                labels: ['Organic', 'Direct', 'Referral', 'Social'],
-                datasets: [{
-                    data: [55, 30, 15, 10],
-                    backgroundColor: ['#4e73df', '#1cc88a', '#36b9cc', '#f6c23e'],
-                    hoverBackgroundColor: ['#2e59d9', '#17a673', '#2c9faf', '#dda20a'],
-                    hoverBorderColor: "rgba(234, 236, 244, 1)",
-                }]
+                labels: stats.weeks.map(w => w.slice(5)),
+                datasets: series.map(s => ({
+                    label: s.label,
+                    data: stats.weekly[s.key],
+                    backgroundColor: s.color
+                }))
             },
             options: {
                 maintainAspectRatio: false,
                 plugins: {
                     legend: { position: 'bottom' }
+                },
+                scales: {
+                    x: { stacked: true },
+                    y: { stacked: true, beginAtZero: true, ticks: { precision: 0 } }
                 }
             }
         });